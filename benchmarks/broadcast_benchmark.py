@@ -0,0 +1,60 @@
+"""Benchmark zone broadcasts: one big per-user transaction vs chunked INSERT ... SELECT.
+
+Run with ``python -m benchmarks.broadcast_benchmark [--users 100000] [--chunk 2000]``.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import database.sqlite_service as sqlite_service
+from database.sqlite_service import SQLiteService
+
+
+def populate(db: SQLiteService, users: int, zone_id: int):
+    with db.transaction():
+        db.conn.executemany(
+            "INSERT INTO users(user_login_id,user_id,password_hash,role,zone_id) VALUES(?,?,'x','Resident',?)",
+            ((f"bench{i:07d}", f"bench{i:07d}", zone_id) for i in range(users)),
+        )
+
+
+def per_user_broadcast(db: SQLiteService, zone_id: int, title: str, message: str) -> int:
+    """The previous implementation: fetch every user, then one INSERT each inside one transaction."""
+    users = db.conn.execute("SELECT user_login_id FROM users WHERE zone_id=? AND is_active=1", (zone_id,)).fetchall()
+    with db.transaction():
+        for user in users:
+            db.conn.execute(
+                "INSERT INTO notification(user_id,type,title,message) VALUES(?,?,?,?)", (user["user_login_id"], "SYSTEM", title, message)
+            )
+    return len(users)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--chunk", type=int, default=sqlite_service.BROADCAST_CHUNK)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SQLiteService(os.path.join(tmp, "bench.db"))
+        zone_id = db.get_zone_id_by_name("Zone A")
+        populate(db, args.users, zone_id)
+
+        started = time.perf_counter()
+        sent = per_user_broadcast(db, zone_id, "Per-user", "Benchmark")
+        elapsed = time.perf_counter() - started
+        print(f"per-user: {sent} rows in {elapsed:.2f}s ({sent / elapsed:,.0f} rows/s), write lock held {elapsed:.2f}s")
+
+        longest, sent = 0.0, 0
+        started = last = time.perf_counter()
+        for sent, _total in db.iter_broadcast("Chunked", "Benchmark", zone_id=zone_id, chunk_size=args.chunk):
+            now = time.perf_counter()
+            longest, last = max(longest, now - last), now
+        elapsed = time.perf_counter() - started
+        print(f" chunked: {sent} rows in {elapsed:.2f}s ({sent / elapsed:,.0f} rows/s), longest write lock {longest * 1000:.1f}ms")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Benchmark fleet planning: 50 zones x 300 stops, serial vs process pool.
+
+Run with ``python -m benchmarks.fleet_benchmark [--zones 50] [--stops 300] [--vehicles 4] [--cache-dir DIR]``.
+"""
+import argparse
+import random
+import time
+
+from services.fleet_service import plan_zones
+from services.route_service import RouteStop, Vehicle
+
+
+def make_zone(zone_id: int, stops: int, vehicles: int) -> tuple[list[RouteStop], list[Vehicle]]:
+    rnd = random.Random(zone_id)
+    lat0, lon0 = 3.0 + rnd.random(), 101.0 + rnd.random()
+    zone_stops = [
+        RouteStop(f"Z{zone_id}-{i}", lat0 + rnd.uniform(-0.05, 0.05), lon0 + rnd.uniform(-0.05, 0.05), rnd.uniform(5, 40))
+        for i in range(stops)
+    ]
+    fleet = [Vehicle(f"Z{zone_id}-collector{k:02d}", 1000, lat0, lon0) for k in range(1, vehicles + 1)]
+    return zone_stops, fleet
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--zones", type=int, default=50)
+    parser.add_argument("--stops", type=int, default=300)
+    parser.add_argument("--vehicles", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache-dir", default=None, help="read distances from memory-mapped matrices kept here")
+    args = parser.parse_args(argv)
+
+    problems = {z: make_zone(z, args.stops, args.vehicles) for z in range(1, args.zones + 1)}
+    for label, workers in (("serial", 1), ("pool", args.workers)):
+        started = time.perf_counter()
+        plans = plan_zones(problems, max_workers=workers, cache_root=args.cache_dir)
+        elapsed = time.perf_counter() - started
+        distance = sum(r.distance_km for routes in plans.values() for r in routes)
+        print(f"{label:>6}: {elapsed:.2f}s for {args.zones} zones x {args.stops} stops, total {distance:.1f} km")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Benchmark the route solvers on reproducible synthetic instances and compare runs.
+
+Run with ``python -m benchmarks.route_benchmark run [--sizes 50,200,1000] [--out results.json]`` and
+``python -m benchmarks.route_benchmark compare old.json new.json``. Sizes up to 5000 stops work
+but need NumPy for the distance matrix to build in reasonable time and memory.
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from services.route_service import (
+    DEFAULT_SERVICE_MINUTES,
+    DEFAULT_SPEED_KMH,
+    DEPOT_ID,
+    LATENESS_WEIGHT,
+    RouteStop,
+    Vehicle,
+    compute_optimal_path,
+    compute_time_window_path,
+    haversine_km,
+    np,
+    route_length_km,
+    solve_anytime,
+)
+
+FAMILIES = ("uniform", "clustered", "grid")
+MODES = ("optimal", "anytime", "time_window")
+DEFAULT_SIZES = (50, 200, 1000)
+BEST_KNOWN_PATH = Path(__file__).with_name("route_best_known.json")
+TIME_WINDOW_MAX_STOPS = 500
+CAPACITY_KG = 500.0
+START = datetime(2026, 1, 5, 8, 0)
+DEPOT = (3.15, 101.65)
+SPAN_DEG = 0.1  # about 11 km square around the depot
+
+
+def instance_id(family: str, size: int, capacity: bool, windows: bool, seed: int) -> str:
+    return f"{family}-{size}{'-cap' if capacity else ''}{'-tw' if windows else ''}-s{seed}"
+
+
+def _points(family: str, size: int, rnd: random.Random) -> list[tuple[float, float]]:
+    lat0, lon0 = DEPOT[0] - SPAN_DEG / 2, DEPOT[1] - SPAN_DEG / 2
+    if family == "uniform":
+        return [(lat0 + rnd.random() * SPAN_DEG, lon0 + rnd.random() * SPAN_DEG) for _ in range(size)]
+    if family == "clustered":
+        centres = [(lat0 + rnd.random() * SPAN_DEG, lon0 + rnd.random() * SPAN_DEG) for _ in range(max(3, size // 60))]
+        return [(c[0] + rnd.gauss(0, SPAN_DEG / 40), c[1] + rnd.gauss(0, SPAN_DEG / 40)) for c in (rnd.choice(centres) for _ in range(size))]
+    if family == "grid":
+        # Houses along a street grid: one coordinate snapped to a street, the other anywhere on it.
+        streets = 20
+        block = SPAN_DEG / streets
+        points = []
+        for _ in range(size):
+            along, street = rnd.random() * SPAN_DEG, rnd.randrange(streets + 1) * block
+            points.append((lat0 + street, lon0 + along) if rnd.random() < 0.5 else (lat0 + along, lon0 + street))
+        return points
+    raise ValueError(f"Unknown instance family: {family}")
+
+
+def sweep_route(stops: list[RouteStop], vehicle: Vehicle) -> list[RouteStop]:
+    """Stops by angle around the depot, unloading whenever the next one would not fit."""
+    route, load = [], 0.0
+    for stop in sorted(stops, key=lambda s: math.atan2(s.latitude - DEPOT[0], s.longitude - DEPOT[1])):
+        if load + stop.demand_kg > vehicle.capacity_kg:
+            route.append(vehicle.depot_stop())
+            load = 0.0
+        route.append(stop)
+        load += stop.demand_kg
+    return route
+
+
+def make_instance(family: str, size: int, capacity: bool, windows: bool, seed: int = 1) -> tuple[list[RouteStop], Vehicle]:
+    """Stops and vehicle for one instance; windows are the slots each stop is reached in along :func:`sweep_route`."""
+    rnd = random.Random(f"{family}-{size}-{seed}")
+    stops = [RouteStop(f"S{i}", lat, lon, rnd.uniform(5, 40)) for i, (lat, lon) in enumerate(_points(family, size, rnd))]
+    vehicle = Vehicle("bench", CAPACITY_KG if capacity else math.inf, *DEPOT)
+    if windows:
+        minutes, prev = 0.0, vehicle.depot_stop()
+        for stop in sweep_route(stops, vehicle):
+            minutes += haversine_km(prev.latitude, prev.longitude, stop.latitude, stop.longitude) * 60 / DEFAULT_SPEED_KMH
+            prev = stop
+            if stop.stop_id == DEPOT_ID:
+                continue
+            stop.window_start = START + timedelta(minutes=30 * math.floor(minutes / 30))
+            stop.window_end = stop.window_start + timedelta(minutes=30)
+            minutes += DEFAULT_SERVICE_MINUTES
+    return stops, vehicle
+
+
+def lateness_minutes(route: list[RouteStop], vehicle: Vehicle) -> float:
+    """Total minutes served after ``window_end``, driving ``route`` as the time-window solver would."""
+    minutes, late, prev = 0.0, 0.0, vehicle.depot_stop()
+    for stop in route:
+        minutes += haversine_km(prev.latitude, prev.longitude, stop.latitude, stop.longitude) * 60 / DEFAULT_SPEED_KMH
+        prev = stop
+        if stop.stop_id == DEPOT_ID:
+            continue
+        if stop.window_start is not None:
+            minutes = max(minutes, (stop.window_start - START).total_seconds() / 60)
+        if stop.window_end is not None:
+            late += max(0.0, minutes - (stop.window_end - START).total_seconds() / 60)
+        minutes += DEFAULT_SERVICE_MINUTES
+    return late
+
+
+def run_mode(mode: str, stops: list[RouteStop], vehicle: Vehicle, budget_s: float) -> dict:
+    started = time.perf_counter()
+    if mode == "optimal":
+        route = compute_optimal_path(stops, vehicle)
+    elif mode == "anytime":
+        route = solve_anytime(stops, vehicle, budget_s)
+    elif mode == "time_window":
+        route = compute_time_window_path(stops, vehicle, START).route
+    else:
+        raise ValueError(f"Unknown solver mode: {mode}")
+    runtime = time.perf_counter() - started
+    distance = route_length_km(route, vehicle)
+    late = lateness_minutes(route, vehicle)
+    return {"cost": distance + LATENESS_WEIGHT * late, "distance_km": distance, "lateness_min": late, "runtime_s": runtime}
+
+
+def load_best_known(path: Path = BEST_KNOWN_PATH) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def run(args) -> dict:
+    best_known = load_best_known()
+    records = []
+    for family in args.families:
+        for size in args.sizes:
+            for capacity in (False, True):
+                for windows in (False, True):
+                    iid = instance_id(family, size, capacity, windows, args.seed)
+                    stops, vehicle = make_instance(family, size, capacity, windows, args.seed)
+                    # The sweep the windows were built from is a feasible solution, so it bounds the best known cost.
+                    reference = route_length_km(sweep_route(stops, vehicle), vehicle)
+                    best_known[iid] = min(best_known.get(iid, math.inf), reference)
+                    for mode in args.modes:
+                        record = {"instance": iid, "family": family, "size": size, "capacity": capacity, "windows": windows, "mode": mode}
+                        if mode == "time_window" and (not windows or size > TIME_WINDOW_MAX_STOPS):
+                            records.append({**record, "status": "skipped"})
+                            continue
+                        record.update(run_mode(mode, stops, vehicle, args.budget), status="ok")
+                        records.append(record)
+                        print(f"{iid:<28} {mode:<12} {record['cost']:>10.2f} {record['runtime_s']:>8.2f}s")
+    for record in records:
+        if record["status"] == "ok":
+            best_known[record["instance"]] = min(best_known.get(record["instance"], math.inf), record["cost"])
+    for record in records:
+        if record["status"] == "ok":
+            best = best_known[record["instance"]]
+            record["gap_pct"] = 100.0 * (record["cost"] - best) / best if best > 0 else 0.0
+    if args.update_best:
+        BEST_KNOWN_PATH.write_text(json.dumps(best_known, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np is not None,
+        "budget_s": args.budget,
+        "seed": args.seed,
+        "results": records,
+    }
+
+
+def geometric_mean(values: list[float]) -> float:
+    return math.exp(sum(math.log(max(v, 1e-12)) for v in values) / len(values))
+
+
+def compare(old: dict, new: dict) -> list[str]:
+    """Report cost and runtime changes for every ``(instance, mode)`` present in both runs."""
+    before = {(r["instance"], r["mode"]): r for r in old["results"] if r["status"] == "ok"}
+    lines = [f"{'instance':<28} {'mode':<12} {'cost old':>10} {'cost new':>10} {'cost %':>8} {'time old':>9} {'time new':>9}"]
+    cost_ratios, time_ratios = [], []
+    for r in new["results"]:
+        prev = before.get((r["instance"], r["mode"]))
+        if r["status"] != "ok" or prev is None:
+            continue
+        change = 100.0 * (r["cost"] - prev["cost"]) / prev["cost"] if prev["cost"] else 0.0
+        cost_ratios.append(r["cost"] / prev["cost"] if prev["cost"] else 1.0)
+        time_ratios.append(r["runtime_s"] / max(prev["runtime_s"], 1e-9))
+        lines.append(
+            f"{r['instance']:<28} {r['mode']:<12} {prev['cost']:>10.2f} {r['cost']:>10.2f} {change:>+7.2f}% "
+            f"{prev['runtime_s']:>8.2f}s {r['runtime_s']:>8.2f}s"
+        )
+    if cost_ratios:
+        lines.append(
+            f"geometric mean: cost x{geometric_mean(cost_ratios):.4f}, runtime x{geometric_mean(time_ratios):.3f} over {len(cost_ratios)} results"
+        )
+    else:
+        lines.append("No results in common.")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run", help="solve every instance with every mode")
+    run_parser.add_argument("--families", default=",".join(FAMILIES), type=lambda v: v.split(","))
+    run_parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), type=lambda v: [int(x) for x in v.split(",")])
+    run_parser.add_argument("--modes", default=",".join(MODES), type=lambda v: v.split(","))
+    run_parser.add_argument("--budget", type=float, default=2.0, help="seconds for the anytime solver")
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--out", default=f"route-bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    run_parser.add_argument("--update-best", action="store_true", help=f"record new best costs in {BEST_KNOWN_PATH.name}")
+    compare_parser = sub.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run(args)
+        Path(args.out).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Wrote {len(results['results'])} results to {args.out}")
+    else:
+        old, new = (json.loads(Path(p).read_text(encoding="utf-8")) for p in (args.old, args.new))
+        print("\n".join(compare(old, new)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Benchmark Treeview refreshes: delete-and-reinsert every row vs the keyed diff of ``TreeBinding``.
+
+Run with ``python -m benchmarks.treeview_benchmark [--rows 10000] [--repeat 5]`` (needs a display), or
+with ``--headless`` to count the Treeview item operations each refresh makes against an in-memory stand-in.
+"""
+import argparse
+import random
+import time
+import tkinter as tk
+from collections import Counter
+from tkinter import ttk
+
+from ui.common_widgets import TreeBinding
+
+COLUMNS = ("id", "resident", "zone", "dt", "status")
+STATUSES = ("PENDING", "ACCEPTED", "IN_PROGRESS")
+
+
+def make_rows(count: int, start: int = 1) -> list[dict]:
+    return [
+        {"pickup_id": i, "resident_id": f"resident{i % 900:04d}", "zone": f"Zone {i % 7}", "requested_datetime": f"2026-01-{i % 28 + 1:02d} {8 + i % 10:02d}:00", "current_status": STATUSES[i % 3]}
+        for i in range(start, start + count)
+    ]
+
+
+def row_values(r: dict) -> tuple:
+    return (r["pickup_id"], r["resident_id"], r["zone"], r["requested_datetime"], r["current_status"])
+
+
+def scenarios(rows: list[dict], rnd: random.Random) -> dict[str, list[dict]]:
+    """Next result sets a refresh typically sees: nothing changed, a few statuses moved, a few rows came and went."""
+    changed = [dict(r) for r in rows]
+    for r in rnd.sample(changed, max(1, len(rows) // 100)):
+        r["current_status"] = "ACCEPTED" if r["current_status"] != "ACCEPTED" else "IN_PROGRESS"
+    churn = max(1, len(rows) // 100)
+    removed = set(r["pickup_id"] for r in rnd.sample(rows, churn))
+    churned = [r for r in rows if r["pickup_id"] not in removed] + make_rows(churn, start=len(rows) + 1)
+    return {"unchanged": list(rows), "1% updated": changed, "1% in/out": churned}
+
+
+def rebuild(tree: ttk.Treeview, rows: list[dict]):
+    """The previous refresh: clear the tree and insert every row again."""
+    for item in tree.get_children():
+        tree.delete(item)
+    for r in rows:
+        tree.insert("", "end", values=row_values(r))
+
+
+class CountingTree:
+    """Display-free stand-in for the Treeview calls the two refreshes make, counting each item touched."""
+
+    def __init__(self):
+        self.items: dict[str, tuple] = {}
+        self.calls = Counter()
+        self._next = 0
+
+    def get_children(self, _item=""):
+        self.calls["get_children"] += 1
+        return tuple(self.items)
+
+    def delete(self, *iids):
+        self.calls["delete"] += len(iids)
+        for iid in iids:
+            del self.items[iid]
+
+    def _place(self, iid, index, values):
+        order = list(self.items)
+        if index == "end" or index >= len(order):
+            self.items[iid] = values
+            return
+        order.insert(index, iid)
+        self.items = {k: self.items.get(k, values) for k in order}
+
+    def insert(self, _parent, index, iid=None, values=(), tags=()):
+        self.calls["insert"] += 1
+        if iid is None:
+            self._next += 1
+            iid = f"I{self._next}"
+        self._place(iid, index, values)
+        return iid
+
+    def item(self, iid, values=(), tags=()):
+        self.calls["item"] += 1
+        self.items[iid] = values
+
+    def move(self, iid, _parent, index):
+        self.calls["move"] += 1
+        values = self.items.pop(iid)
+        self._place(iid, index, values)
+
+
+def count_calls(base: list[dict], scenarios_: dict[str, list[dict]]):
+    print(f"{'scenario':<12} {'rebuild ops':>14} {'keyed diff ops':>17}")
+    for name, nxt in scenarios_.items():
+        tree = CountingTree()
+        rebuild(tree, base)
+        tree.calls.clear()
+        rebuild(tree, nxt)
+        full = sum(tree.calls.values())
+        tree = CountingTree()
+        binding = TreeBinding(tree, lambda r: r["pickup_id"], row_values)
+        binding.update(base)
+        tree.calls.clear()
+        binding.update(nxt)
+        print(f"{name:<12} {full:>14,} {sum(tree.calls.values()):>17,}  {dict(tree.calls)}")
+
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--headless", action="store_true", help="count Treeview calls instead of timing a real widget")
+    args = parser.parse_args(argv)
+    if args.headless:
+        base = make_rows(args.rows)
+        count_calls(base, scenarios(base, random.Random(args.seed)))
+        return
+
+    root = tk.Tk()
+    root.withdraw()
+    rnd = random.Random(args.seed)
+    base = make_rows(args.rows)
+    print(f"{'scenario':<12} {'rebuild':>10} {'keyed diff':>11} {'speedup':>8}")
+    for name, nxt in scenarios(base, rnd).items():
+        full, diff = [], []
+        for _ in range(args.repeat):
+            tree = ttk.Treeview(root, columns=COLUMNS, show="headings")
+            rebuild(tree, base)
+            full.append(timed(lambda: rebuild(tree, nxt)))
+            tree.destroy()
+            tree = ttk.Treeview(root, columns=COLUMNS, show="headings")
+            binding = TreeBinding(tree, lambda r: r["pickup_id"], row_values)
+            binding.update(base)
+            diff.append(timed(lambda: binding.update(nxt)))
+            tree.destroy()
+        best_full, best_diff = min(full), min(diff)
+        print(f"{name:<12} {best_full * 1000:>8.1f}ms {best_diff * 1000:>9.1f}ms {best_full / max(best_diff, 1e-9):>7.1f}x")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,13 @@ import tkinter as tk
 from tkinter import messagebox
 
 from database.sqlite_service import SQLiteService
+from services.eta_service import EtaService
+from services.forecast_service import DemandForecaster
+from services.geo_service import OpenPickupIndex
 from services.i18n_service import t
+from services.outbox_service import OutboxDispatcher, channels_from_env
+from services.reminder_service import ReminderScheduler
+from services.route_repair_service import RouteRepairService
 from services.theme_service import THEMES
 from services.validation_service import (
     validate_filling_info,
@@ -37,6 +43,7 @@ class SmartWasteApp(tk.Tk):
         self.minsize(860, 620)
 
         self.language = "en"
+        self.language_chosen = False  # picked on a screen before login, so it beats the stored preference
         self.theme_mode = "light"
         self.current_frame = None
         self.pending_user = {}
@@ -44,11 +51,21 @@ class SmartWasteApp(tk.Tk):
 
         try:
             self.db = SQLiteService()
+            self.forecaster = DemandForecaster(self.db)
+            self.eta = EtaService(self.db)
+            # Collector routes are short, so repairs and re-optimizations stay on the Tk thread.
+            self.route_repair = RouteRepairService(self.db, background=False)
+            self.pickup_index = OpenPickupIndex(self.db)
+            self.outbox = OutboxDispatcher(self.db.path, channels_from_env())
+            self.db.add_pickup_listener(lambda _pickup_id, _status: self.outbox.wake())
+            self.outbox.start()
+            self.reminders = ReminderScheduler(self.db)
         except ValueError as exc:
             messagebox.showerror("Database Error", str(exc))
             self.destroy()
             raise
 
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
 
@@ -61,6 +78,21 @@ class SmartWasteApp(tk.Tk):
 
         self.center_window()
         self.show_screen("Login")
+        self._tick_reminders()
+
+    def _tick_reminders(self):
+        try:
+            if self.reminders.tick():
+                self.outbox.wake()
+        except Exception:
+            logger.exception("Pickup reminders failed")
+        # Wake for the next due reminder, but at least once a minute in case the clock jumps.
+        self.after(int(min(self.reminders.seconds_until_next(), 60) * 1000) + 50, self._tick_reminders)
+
+    def _on_close(self):
+        self.outbox.stop()
+        self.forecaster.flush()
+        self.destroy()
 
     def center_window(self):
         self.update_idletasks()
@@ -79,6 +111,12 @@ class SmartWasteApp(tk.Tk):
 
     def set_language(self, language: str):
         self.language = language
+        user_id = getattr(self.current_frame, "user_id", None)
+        if not user_id:
+            self.language_chosen = True
+        else:
+            # Emails and exports render the user's notifications in their last chosen language.
+            self.db.set_user_language(user_id, language)
         if self.current_frame:
             self.current_frame.refresh_ui()
 
@@ -125,6 +163,7 @@ class SmartWasteApp(tk.Tk):
             messagebox.showwarning("Step Required", "Please complete registration details first.")
             name = "Registration"
         if name == "Login":
+            self.language_chosen = False
             self.pending_user = {}
             self.nav_stack = []
         frame_cls = routes[name]
@@ -141,6 +180,7 @@ class SmartWasteApp(tk.Tk):
                     left = status.split(":", 1)[1]
                     raise ValueError(self.translate("login_failed_attempts", count=left))
                 raise ValueError("Invalid User ID or Password.")
+            self._adopt_language(status)
             self.show_screen("Dashboard", user_id=status)
         except ValueError as exc:
             logger.info("Login failed for user_id=%s: %s", user_id, exc)
@@ -149,6 +189,14 @@ class SmartWasteApp(tk.Tk):
             logger.exception("Unexpected login error")
             messagebox.showerror("Error", "Unexpected error during login.")
 
+    def _adopt_language(self, user_id: str):
+        """Use the user's saved language, unless one was picked before login; that one is saved instead."""
+        stored = self.db.get_user(user_id)["language"]
+        if stored and not self.language_chosen:
+            self.language = stored
+        elif stored != self.language:
+            self.db.set_user_language(user_id, self.language)
+
     def save_registration_step1(self, user_id: str, password: str, confirm_password: str):
         try:
             uid, pwd = validate_registration_step1(user_id, password, confirm_password)
@@ -1,7 +1,10 @@
 """SQLite data access layer for Smart Waste desktop demo prototype."""
 from __future__ import annotations
 
+import heapq
+import json
 import logging
+import re
 import shutil
 import sqlite3
 from contextlib import contextmanager
@@ -12,6 +15,7 @@ from utils.security import hash_password, verify_password
 
 logger = logging.getLogger(__name__)
 
+# Seed values for reward multiplier version 1; live values are read from reward_multiplier.
 CATEGORY_MULTIPLIERS = {
     "Plastic": 2,
     "Paper": 1,
@@ -22,20 +26,120 @@ CATEGORY_MULTIPLIERS = {
     "Other": 1,
 }
 
+# Points for a pickup joined as ``p``/``r``, using the multiplier version in effect at its slot.
+POINTS_SQL = """CAST(r.weight_kg * COALESCE((
+    SELECT m.multiplier FROM reward_multiplier m
+    WHERE m.category=r.category AND m.version_id=(
+        SELECT v.version_id FROM reward_multiplier_version v
+        WHERE v.effective_from <= p.requested_datetime
+        ORDER BY v.effective_from DESC, v.version_id DESC LIMIT 1)
+), 1) AS INTEGER)"""
+
+BROADCAST_CHUNK = 2000  # users per broadcast transaction
+
+# Sortable columns of the paged list queries, keyed by the Treeview column ids that show them.
+PICKUP_SORT_COLUMNS = {
+    "id": "p.pickup_id",
+    "zone": "z.name",
+    "dt": "p.requested_datetime",
+    "status": "p.current_status",
+    "eta": "p.eta",
+    "updated": "p.last_update",
+    "points": "p.points_awarded",
+}
+USER_SORT_COLUMNS = {
+    "id": "u.user_login_id",
+    "name": "u.name",
+    "role": "u.role",
+    "zone": "COALESCE(z.name,'')",
+    "active": "u.is_active",
+    "points": "u.total_points",
+}
+
+# Tables with a per-table version in change_log, for dashboards polling for changes. Writers bump
+# it once per transaction with touch_tables(), never per row, so bulk statements stay cheap.
+CHANGE_TRACKED_TABLES = ("users", "zone", "pickup_request", "recycling_log", "notification", "notification_outbox")
+# A notification write also moves users.unread_count and may queue outbox rows (both by trigger).
+NOTIFICATION_TABLES = ("notification", "users", "notification_outbox")
+
+
+def _order_by(columns: dict, sort: str, descending: bool, tiebreak: str) -> str:
+    """ORDER BY clause for a whitelisted sort key, with a unique tiebreak so pages never overlap."""
+    if sort not in columns:
+        raise ValueError(f"Cannot sort by {sort}.")
+    direction = "DESC" if descending else "ASC"
+    return f"{columns[sort]} {direction},{tiebreak} {direction}"
+
+
+def _seek_after(columns: dict, sort: str, descending: bool, tiebreak: str, value, key) -> tuple[str, tuple]:
+    """WHERE condition for the rows that follow ``(value, key)`` in :func:`_order_by` order.
+
+    SQLite sorts NULLs first, so they come before every value ascending and after it descending.
+    """
+    column = columns[sort]
+    if value is None:
+        if descending:
+            return f"({column} IS NULL AND {tiebreak}<?)", (key,)
+        return f"({column} IS NOT NULL OR {tiebreak}>?)", (key,)
+    if descending:
+        return f"(({column},{tiebreak})<(?,?) OR {column} IS NULL)", (value, key)
+    return f"({column},{tiebreak})>(?,?)", (value, key)
+
+
+def touch_tables(conn: sqlite3.Connection, *tables: str):
+    """Bump the change_log versions of ``tables``; run it in the transaction that wrote them."""
+    conn.execute(f"UPDATE change_log SET version=version+1 WHERE table_name IN ({','.join('?' * len(tables))})", tables)
+
+
+def address_key(address: str | None) -> str:
+    """Normalized lookup key for the offline geocode table."""
+    return re.sub(r"[^a-z0-9]+", " ", (address or "").lower()).strip()
+
+
+def stored_note_text(_language, _part, _template_key, _params, _status_trail, stored):
+    """Fallback ``note_text``: the stored title/message, until the i18n service registers its renderer."""
+    return stored
+
+
+# Deterministic SQL functions added to every connection: name -> (argument count, callable).
+SQL_FUNCTIONS: dict[str, tuple[int, object]] = {"address_key": (1, address_key), "note_text": (6, stored_note_text)}
+
+
+def register_sql_function(name: str, nargs: int, func):
+    """Make ``func`` callable from SQL on connections opened from now on (e.g. by a service module)."""
+    SQL_FUNCTIONS[name] = (nargs, func)
+
 
 class SQLiteService:
     LOCK_MINUTES = 10
+    OPEN_STATUSES = ("PENDING", "ACCEPTED", "IN_PROGRESS")
+    STATUS_COALESCE_MINUTES = 10  # 0 gives every pickup status change its own notification
 
-    def __init__(self, path: str = "db/prototype.db"):
+    def __init__(self, path: str = "db/prototype.db", read_only: bool = False):
+        """Open (creating, migrating and seeding) the database at ``path``.
+
+        ``read_only`` opens an existing database for queries only, skipping all setup, for
+        connections owned by worker threads.
+        """
         self.path = path
+        self.pickup_listeners = []
+        self.status_coalesce_minutes = self.STATUS_COALESCE_MINUTES
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{Path(path).resolve().as_posix()}?mode=ro", uri=True)
+            self.conn.row_factory = sqlite3.Row
+            self._register_functions()
+            return
         Path(path).parent.mkdir(parents=True, exist_ok=True)
         try:
             self.conn = sqlite3.connect(path)
             self.conn.row_factory = sqlite3.Row
             self.conn.execute("PRAGMA foreign_keys = ON")
+            self._register_functions()
             self._init_schema()
             self._apply_migrations()
+            self._create_indexes()
             self._seed_data()
+            self.assign_open_pickups()
         except sqlite3.DatabaseError as exc:
             self._backup_corrupt_db()
             logger.exception("Database initialization failed")
@@ -43,11 +147,18 @@ class SQLiteService:
                 "Database failed to initialize. Please restore from backup and restart."
             ) from exc
 
+    def _register_functions(self):
+        for name, (nargs, func) in SQL_FUNCTIONS.items():
+            self.conn.create_function(name, nargs, func, deterministic=True)
+
     @contextmanager
-    def transaction(self):
+    def transaction(self, *touched: str):
+        """Run the block in one transaction, bumping the change_log versions of ``touched`` tables."""
         try:
             self.conn.execute("BEGIN")
             yield
+            if touched:
+                touch_tables(self.conn, *touched)
             self.conn.commit()
         except sqlite3.DatabaseError:
             self.conn.rollback()
@@ -80,7 +191,12 @@ class SQLiteService:
                 phone TEXT,
                 passport_no TEXT,
                 address TEXT,
+                latitude REAL,
+                longitude REAL,
                 is_active INTEGER NOT NULL DEFAULT 1,
+                available INTEGER NOT NULL DEFAULT 1,
+                unread_count INTEGER NOT NULL DEFAULT 0,
+                language TEXT,
                 failed_attempts INTEGER NOT NULL DEFAULT 0,
                 locked_until TEXT,
                 created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
@@ -94,6 +210,9 @@ class SQLiteService:
                 current_status TEXT NOT NULL DEFAULT 'PENDING' CHECK(current_status IN ('PENDING','ACCEPTED','IN_PROGRESS','COMPLETED','FAILED','CANCELLED')),
                 cancelled_reason TEXT,
                 points_awarded INTEGER NOT NULL DEFAULT 0,
+                eta TEXT,
+                assigned_collector TEXT REFERENCES users(user_login_id),
+                reminder_sent_at TEXT,
                 created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
                 last_update TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
             );
@@ -126,7 +245,68 @@ class SQLiteService:
                 title TEXT NOT NULL,
                 message TEXT NOT NULL,
                 created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                read_at TEXT
+                read_at TEXT,
+                pickup_id INTEGER REFERENCES pickup_request(pickup_id) ON DELETE CASCADE,
+                status_trail TEXT,
+                template_key TEXT,
+                params TEXT,
+                updated_at TEXT
+            );
+
+            CREATE TABLE IF NOT EXISTS notification_outbox (
+                outbox_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                notification_id INTEGER NOT NULL REFERENCES notification(notification_id) ON DELETE CASCADE,
+                channel TEXT NOT NULL,
+                recipient TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'PENDING' CHECK(status IN ('PENDING','SENT','FAILED')),
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                last_error TEXT,
+                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                sent_at TEXT
+            );
+
+            CREATE TABLE IF NOT EXISTS reward_multiplier_version (
+                version_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                effective_from TEXT NOT NULL,
+                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE TABLE IF NOT EXISTS reward_multiplier (
+                version_id INTEGER NOT NULL REFERENCES reward_multiplier_version(version_id) ON DELETE CASCADE,
+                category TEXT NOT NULL,
+                multiplier REAL NOT NULL,
+                PRIMARY KEY(version_id, category)
+            );
+
+            CREATE TABLE IF NOT EXISTS geocode (
+                address_key TEXT PRIMARY KEY,
+                address TEXT NOT NULL,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS demand_forecast (
+                zone_id INTEGER NOT NULL REFERENCES zone(zone_id) ON DELETE CASCADE,
+                weekday INTEGER NOT NULL,
+                slot TEXT NOT NULL,
+                ewma_count REAL,
+                ewma_kg REAL,
+                ewma_date TEXT,
+                day_count REAL NOT NULL DEFAULT 0,
+                day_kg REAL NOT NULL DEFAULT 0,
+                day_date TEXT,
+                PRIMARY KEY(zone_id, weekday, slot)
+            );
+
+            CREATE TABLE IF NOT EXISTS forecast_watermark (
+                name TEXT PRIMARY KEY,
+                last_status_update_id INTEGER NOT NULL DEFAULT 0
+            );
+
+            CREATE TABLE IF NOT EXISTS change_log (
+                table_name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
             );
             """
         )
@@ -139,6 +319,20 @@ class SQLiteService:
             self.conn.execute("UPDATE users SET user_login_id = user_id WHERE user_login_id IS NULL")
         if "is_active" not in user_cols:
             self.conn.execute("ALTER TABLE users ADD COLUMN is_active INTEGER NOT NULL DEFAULT 1")
+        if "latitude" not in user_cols:
+            self.conn.execute("ALTER TABLE users ADD COLUMN latitude REAL")
+            self.conn.execute("ALTER TABLE users ADD COLUMN longitude REAL")
+        if "available" not in user_cols:
+            self.conn.execute("ALTER TABLE users ADD COLUMN available INTEGER NOT NULL DEFAULT 1")
+        if "unread_count" not in user_cols:
+            self.conn.execute("ALTER TABLE users ADD COLUMN unread_count INTEGER NOT NULL DEFAULT 0")
+            self.conn.execute(
+                """UPDATE users SET unread_count=n.c FROM (
+                       SELECT user_id,COUNT(*) c FROM notification WHERE read_at IS NULL GROUP BY user_id) n
+                   WHERE n.user_id=users.user_login_id"""
+            )
+        if "language" not in user_cols:
+            self.conn.execute("ALTER TABLE users ADD COLUMN language TEXT")
 
         pickup_cols = self._table_columns("pickup_request")
         if "current_status" not in pickup_cols:
@@ -150,6 +344,22 @@ class SQLiteService:
             self.conn.execute("ALTER TABLE pickup_request ADD COLUMN points_awarded INTEGER NOT NULL DEFAULT 0")
         if "last_update" not in pickup_cols:
             self.conn.execute("ALTER TABLE pickup_request ADD COLUMN last_update TEXT DEFAULT CURRENT_TIMESTAMP")
+        if "eta" not in pickup_cols:
+            self.conn.execute("ALTER TABLE pickup_request ADD COLUMN eta TEXT")
+        if "assigned_collector" not in pickup_cols:
+            self.conn.execute("ALTER TABLE pickup_request ADD COLUMN assigned_collector TEXT REFERENCES users(user_login_id)")
+        if "reminder_sent_at" not in pickup_cols:
+            self.conn.execute("ALTER TABLE pickup_request ADD COLUMN reminder_sent_at TEXT")
+
+        notification_cols = self._table_columns("notification")
+        if "pickup_id" not in notification_cols:
+            self.conn.execute("ALTER TABLE notification ADD COLUMN pickup_id INTEGER REFERENCES pickup_request(pickup_id) ON DELETE CASCADE")
+            self.conn.execute("ALTER TABLE notification ADD COLUMN status_trail TEXT")
+        if "template_key" not in notification_cols:
+            self.conn.execute("ALTER TABLE notification ADD COLUMN template_key TEXT")
+            self.conn.execute("ALTER TABLE notification ADD COLUMN params TEXT")
+        if "updated_at" not in notification_cols:
+            self.conn.execute("ALTER TABLE notification ADD COLUMN updated_at TEXT")
 
         recycle_cols = self._table_columns("recycling_log")
         if "pickup_id" not in recycle_cols:
@@ -162,6 +372,59 @@ class SQLiteService:
 
         self.conn.commit()
 
+    def _create_indexes(self):
+        self.conn.executescript(
+            """
+            CREATE INDEX IF NOT EXISTS idx_pickup_assigned ON pickup_request(assigned_collector, current_status, requested_datetime);
+            CREATE INDEX IF NOT EXISTS idx_notification_user ON notification(user_id, created_at);
+            CREATE INDEX IF NOT EXISTS idx_notification_unread ON notification(user_id, created_at) WHERE read_at IS NULL;
+
+            -- users.unread_count follows notification.read_at so badges never count rows.
+            CREATE TRIGGER IF NOT EXISTS trg_notification_unread_insert AFTER INSERT ON notification WHEN NEW.read_at IS NULL
+            BEGIN
+                UPDATE users SET unread_count=unread_count+1 WHERE user_login_id=NEW.user_id;
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_notification_unread_read AFTER UPDATE OF read_at ON notification
+            WHEN (OLD.read_at IS NULL) <> (NEW.read_at IS NULL)
+            BEGIN
+                UPDATE users SET unread_count=unread_count+(CASE WHEN NEW.read_at IS NULL THEN 1 ELSE -1 END) WHERE user_login_id=NEW.user_id;
+            END;
+            CREATE INDEX IF NOT EXISTS idx_notification_pickup ON notification(pickup_id, user_id) WHERE pickup_id IS NOT NULL;
+            CREATE INDEX IF NOT EXISTS idx_pickup_resident ON pickup_request(resident_id, requested_datetime);
+            CREATE INDEX IF NOT EXISTS idx_pickup_reminder_due ON pickup_request(requested_datetime) WHERE reminder_sent_at IS NULL;
+            CREATE INDEX IF NOT EXISTS idx_outbox_due ON notification_outbox(next_attempt_at) WHERE status='PENDING';
+
+            -- Queue an email in the same transaction as the notification; delivery happens later.
+            CREATE TRIGGER IF NOT EXISTS trg_notification_outbox AFTER INSERT ON notification
+            BEGIN
+                INSERT INTO notification_outbox(notification_id,channel,recipient)
+                SELECT NEW.notification_id,'email',email FROM users
+                WHERE user_login_id=NEW.user_id AND email IS NOT NULL AND email<>'';
+            END;
+            -- A coalesced pickup notice moved on: email it again, unless an unsent email for it is
+            -- still queued (that one renders the latest status when it goes out).
+            CREATE INDEX IF NOT EXISTS idx_outbox_notification ON notification_outbox(notification_id) WHERE status='PENDING';
+            CREATE TRIGGER IF NOT EXISTS trg_notification_outbox_update AFTER UPDATE OF status_trail ON notification
+            BEGIN
+                INSERT INTO notification_outbox(notification_id,channel,recipient)
+                SELECT NEW.notification_id,'email',email FROM users
+                WHERE user_login_id=NEW.user_id AND email IS NOT NULL AND email<>''
+                AND NOT EXISTS (SELECT 1 FROM notification_outbox o WHERE o.notification_id=NEW.notification_id AND o.status='PENDING');
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_notification_unread_delete AFTER DELETE ON notification WHEN OLD.read_at IS NULL
+            BEGIN
+                UPDATE users SET unread_count=unread_count-1 WHERE user_login_id=OLD.user_id;
+            END;
+            """
+        )
+        script = []
+        for table in CHANGE_TRACKED_TABLES:
+            script.append(f"INSERT OR IGNORE INTO change_log(table_name) VALUES('{table}');")
+            # Per-row version triggers from earlier builds cost a hot-row update per row written.
+            for event in ("insert", "update", "delete"):
+                script.append(f"DROP TRIGGER IF EXISTS trg_change_{table}_{event};")
+        self.conn.executescript("\n".join(script))
+
     def _backup_corrupt_db(self):
         src = Path(self.path)
         if src.exists():
@@ -198,6 +461,13 @@ class SQLiteService:
                 """,
                 (login_id, user_id, name, hash_password(password), role, zone_id),
             )
+        if not self.conn.execute("SELECT 1 FROM reward_multiplier_version LIMIT 1").fetchone():
+            cur = self.conn.execute("INSERT INTO reward_multiplier_version(effective_from) VALUES('0000-01-01')")
+            self.conn.executemany(
+                "INSERT INTO reward_multiplier(version_id,category,multiplier) VALUES(?,?,?)",
+                [(cur.lastrowid, category, multiplier) for category, multiplier in CATEGORY_MULTIPLIERS.items()],
+            )
+        touch_tables(self.conn, "zone", "users")
         self.conn.commit()
 
     def get_zone_id_by_name(self, name: str):
@@ -211,6 +481,7 @@ class SQLiteService:
                 "INSERT INTO users(user_login_id,user_id,password_hash,role) VALUES(?,?,?,'Resident')",
                 (user_id, user_id, hash_password(password)),
             )
+            touch_tables(self.conn, "users")
             self.conn.commit()
         except sqlite3.IntegrityError as exc:
             raise ValueError("error_duplicate_user") from exc
@@ -232,6 +503,12 @@ class SQLiteService:
         )
         if cur.rowcount == 0:
             raise ValueError("Registration session expired. Please start again.")
+        self.conn.execute(
+            """UPDATE users SET latitude=g.latitude,longitude=g.longitude
+               FROM geocode g WHERE g.address_key=address_key(users.address) AND users.user_login_id=?""",
+            (data["user_id"],),
+        )
+        touch_tables(self.conn, "users")
         self.conn.commit()
 
     def verify_credentials(self, user_id: str, password: str):
@@ -247,6 +524,7 @@ class SQLiteService:
                 return False, "locked"
         if verify_password(password, user["password_hash"]):
             self.conn.execute("UPDATE users SET failed_attempts=0,locked_until=NULL WHERE user_login_id=?", (user_id,))
+            touch_tables(self.conn, "users")
             self.conn.commit()
             return True, user_id
         attempts = user["failed_attempts"] + 1
@@ -254,9 +532,15 @@ class SQLiteService:
             self.conn.execute("UPDATE users SET failed_attempts=?,locked_until=datetime('now','+10 minutes') WHERE user_login_id=?", (attempts, user_id))
         else:
             self.conn.execute("UPDATE users SET failed_attempts=? WHERE user_login_id=?", (attempts, user_id))
+        touch_tables(self.conn, "users")
         self.conn.commit()
         return False, f"attempts_left:{max(0, 5-attempts)}"
 
+    def set_user_language(self, user_id: str, language: str):
+        """Remember ``user_id``'s language, used for their notification emails and exports (NULL until chosen)."""
+        with self.transaction("users"):
+            self.conn.execute("UPDATE users SET language=? WHERE user_login_id=?", (language, user_id))
+
     def get_user(self, user_id: str):
         return self.conn.execute(
             """SELECT u.*,z.name AS zone_name FROM users u
@@ -269,7 +553,7 @@ class SQLiteService:
         user = self.get_user(resident_id)
         if not user or not user["zone_id"]:
             raise ValueError("Resident zone is not configured.")
-        with self.transaction():
+        with self.transaction("pickup_request", "recycling_log", *NOTIFICATION_TABLES):
             cur = self.conn.execute(
                 "INSERT INTO pickup_request(resident_id,zone_id,requested_datetime,current_status) VALUES(?,?,?,'PENDING')",
                 (resident_id, user["zone_id"], requested_datetime),
@@ -283,17 +567,42 @@ class SQLiteService:
                 "INSERT INTO pickup_status_update(pickup_id,updated_by,new_status,comment) VALUES(?,?,?,?)",
                 (pickup_id, resident_id, "PENDING", "Pickup request submitted"),
             )
-            self.add_notification(resident_id, "STATUS_UPDATE", "Pickup submitted", f"Pickup request #{pickup_id} submitted.")
+            self._pickup_notification(resident_id, pickup_id, "PENDING", "STATUS_UPDATE", "pickup_status")
+            self._assign_open_pickups(user["zone_id"], [pickup_id])
+        self._notify_pickup(pickup_id, "PENDING")
         return pickup_id
 
     def list_resident_pickups(self, resident_id: str):
         return self.conn.execute(
-            """SELECT p.pickup_id,z.name AS zone,p.requested_datetime,p.current_status,p.last_update,p.points_awarded
+            """SELECT p.pickup_id,z.name AS zone,p.requested_datetime,p.current_status,p.last_update,p.points_awarded,p.eta
                FROM pickup_request p JOIN zone z ON z.zone_id=p.zone_id
                WHERE p.resident_id=? ORDER BY p.requested_datetime DESC""",
             (resident_id,),
         ).fetchall()
 
+    def count_resident_pickups(self, resident_id: str) -> int:
+        return self.conn.execute("SELECT COUNT(*) c FROM pickup_request WHERE resident_id=?", (resident_id,)).fetchone()["c"]
+
+    def list_resident_pickups_page(self, resident_id: str, offset: int, limit: int, sort: str = "dt", descending: bool = True, after=None):
+        """One page of :meth:`list_resident_pickups`, ordered by a :data:`PICKUP_SORT_COLUMNS` key.
+
+        Given ``after``, the last row of the previous page, the page seeks past it on the sort key
+        and ignores ``offset``, so deep pages cost no more than the first.
+        """
+        order = _order_by(PICKUP_SORT_COLUMNS, sort, descending, "p.pickup_id")
+        where, params = "p.resident_id=?", [resident_id]
+        if after is not None:
+            cond, values = _seek_after(PICKUP_SORT_COLUMNS, sort, descending, "p.pickup_id", after["sort_key"], after["pickup_id"])
+            where, offset = f"{where} AND {cond}", 0
+            params.extend(values)
+        return self.conn.execute(
+            f"""SELECT p.pickup_id,z.name AS zone,p.requested_datetime,p.current_status,p.last_update,p.points_awarded,p.eta,
+                       {PICKUP_SORT_COLUMNS[sort]} AS sort_key
+                FROM pickup_request p JOIN zone z ON z.zone_id=p.zone_id
+                WHERE {where} ORDER BY {order} LIMIT ? OFFSET ?""",
+            (*params, limit, offset),
+        ).fetchall()
+
     def cancel_resident_pickup(self, resident_id: str, pickup_id: int, reason: str):
         row = self.conn.execute("SELECT current_status FROM pickup_request WHERE pickup_id=? AND resident_id=?", (pickup_id, resident_id)).fetchone()
         if not row:
@@ -302,24 +611,155 @@ class SQLiteService:
             raise ValueError("Only pending/accepted pickups can be cancelled.")
         self._set_pickup_status(pickup_id, "CANCELLED", resident_id, reason)
 
+    def reschedule_pickup(self, resident_id: str, pickup_id: int, requested_datetime: str):
+        """Move a pending/accepted pickup to ``requested_datetime``, validated by the caller as for a new request."""
+        with self.transaction("pickup_request"):
+            # The status guard is part of the UPDATE so a pickup accepted meanwhile cannot move.
+            moved = self.conn.execute(
+                """UPDATE pickup_request SET requested_datetime=?,reminder_sent_at=NULL,eta=NULL,last_update=CURRENT_TIMESTAMP
+                   WHERE pickup_id=? AND resident_id=? AND current_status IN ('PENDING','ACCEPTED')
+                   RETURNING current_status""",
+                (requested_datetime, pickup_id, resident_id),
+            ).fetchone()
+            if moved:
+                self.conn.execute(
+                    "INSERT INTO pickup_status_update(pickup_id,updated_by,new_status,comment) VALUES(?,?,?,?)",
+                    (pickup_id, resident_id, moved["current_status"], f"Rescheduled to {requested_datetime}"),
+                )
+        if not moved:
+            found = self.conn.execute("SELECT 1 FROM pickup_request WHERE pickup_id=? AND resident_id=?", (pickup_id, resident_id)).fetchone()
+            raise ValueError("Only pending/accepted pickups can be rescheduled." if found else "Pickup not found.")
+        self._notify_pickup(pickup_id, moved["current_status"])
+
+    # reminders
+    def list_reminder_candidates(self, after: str, until: str, pickup_id: int | None = None):
+        """Unreminded PENDING/ACCEPTED pickups requested in ``(after, until]``, soonest first."""
+        only = " AND pickup_id=?" if pickup_id is not None else ""
+        return self.conn.execute(
+            f"""SELECT pickup_id,requested_datetime FROM pickup_request
+                WHERE reminder_sent_at IS NULL AND requested_datetime>? AND requested_datetime<=?
+                AND current_status IN ('PENDING','ACCEPTED'){only} ORDER BY requested_datetime""",
+            (after, until, *([pickup_id] if pickup_id is not None else [])),
+        ).fetchall()
+
+    def send_pickup_reminders(self, pickup_ids) -> int:
+        """Mark the given pickups reminded and notify their residents, in one transaction.
+
+        Pickups already reminded or no longer open are skipped, so a reminder is never sent twice.
+        """
+        ids = list(pickup_ids)
+        if not ids:
+            return 0
+        placeholders = ",".join("?" * len(ids))
+        with self.transaction("pickup_request", *NOTIFICATION_TABLES):
+            claimed = self.conn.execute(
+                f"""UPDATE pickup_request SET reminder_sent_at=CURRENT_TIMESTAMP
+                    WHERE pickup_id IN ({placeholders}) AND reminder_sent_at IS NULL AND current_status IN ('PENDING','ACCEPTED')
+                    RETURNING pickup_id,resident_id,requested_datetime""",
+                ids,
+            ).fetchall()
+            self.conn.executemany(
+                "INSERT INTO notification(user_id,type,title,message,pickup_id,template_key,params) VALUES(?,'PICKUP_REMINDER','','',?,'pickup_reminder',?)",
+                [
+                    (r["resident_id"], r["pickup_id"], json.dumps({"pickup_id": r["pickup_id"], "requested": r["requested_datetime"]}, separators=(",", ":")))
+                    for r in claimed
+                ],
+            )
+        return len(claimed)
+
     # collector
     def list_collector_tasks(self, collector_id: str):
-        collector = self.get_user(collector_id)
         return self.conn.execute(
             """SELECT p.pickup_id,p.resident_id,p.requested_datetime,p.current_status,z.name AS zone
                FROM pickup_request p JOIN zone z ON z.zone_id=p.zone_id
-               WHERE p.zone_id=? AND p.current_status IN ('PENDING','ACCEPTED','IN_PROGRESS')
+               WHERE p.assigned_collector=? AND p.current_status IN ('PENDING','ACCEPTED','IN_PROGRESS')
                ORDER BY p.requested_datetime""",
-            (collector["zone_id"],),
+            (collector_id,),
         ).fetchall()
 
+    def _assign_open_pickups(self, zone_id: int, pickup_ids=None) -> int:
+        """Give unassigned open pickups in ``zone_id`` to the least-loaded available collectors.
+
+        Load is ``(open pickups, open kg)``; collectors sit in a min-heap so each pickup goes to
+        the lightest one and pushes it back with the new load. Runs inside the caller's transaction.
+        """
+        placeholders = ",".join("?" * len(self.OPEN_STATUSES))
+        heap = [
+            (r["count"], r["kg"], r["user_login_id"])
+            for r in self.conn.execute(
+                f"""SELECT u.user_login_id,COUNT(p.pickup_id) AS count,COALESCE(SUM(r.weight_kg),0) AS kg
+                    FROM users u
+                    LEFT JOIN pickup_request p ON p.assigned_collector=u.user_login_id AND p.current_status IN ({placeholders})
+                    LEFT JOIN recycling_log r ON r.pickup_id=p.pickup_id
+                    WHERE u.role='WasteCollector' AND u.is_active=1 AND u.available=1 AND u.zone_id=?
+                    GROUP BY u.user_login_id""",
+                (*self.OPEN_STATUSES, zone_id),
+            )
+        ]
+        if not heap:
+            return 0
+        heapq.heapify(heap)
+        sql = f"""SELECT p.pickup_id,COALESCE(r.weight_kg,0) AS kg FROM pickup_request p
+                  LEFT JOIN recycling_log r ON r.pickup_id=p.pickup_id
+                  WHERE p.zone_id=? AND p.assigned_collector IS NULL AND p.current_status IN ({placeholders})"""
+        params = [zone_id, *self.OPEN_STATUSES]
+        if pickup_ids is not None:
+            sql += f" AND p.pickup_id IN ({','.join('?' * len(pickup_ids))})"
+            params.extend(pickup_ids)
+        assignments = []
+        for row in self.conn.execute(sql + " ORDER BY p.requested_datetime,p.pickup_id", params).fetchall():
+            count, kg, collector_id = heap[0]
+            heapq.heapreplace(heap, (count + 1, kg + row["kg"], collector_id))
+            assignments.append((collector_id, row["pickup_id"]))
+        self.conn.executemany("UPDATE pickup_request SET assigned_collector=? WHERE pickup_id=?", assignments)
+        return len(assignments)
+
+    def _release_collector(self, collector_id: str) -> set[int]:
+        """Unassign open pickups the collector can no longer serve; return the affected zones."""
+        placeholders = ",".join("?" * len(self.OPEN_STATUSES))
+        released = self.conn.execute(
+            f"""UPDATE pickup_request SET assigned_collector=NULL
+                WHERE assigned_collector=? AND current_status IN ({placeholders}) AND NOT EXISTS (
+                    SELECT 1 FROM users u WHERE u.user_login_id=pickup_request.assigned_collector AND u.role='WasteCollector'
+                    AND u.is_active=1 AND u.available=1 AND u.zone_id=pickup_request.zone_id)
+                RETURNING zone_id""",
+            (collector_id, *self.OPEN_STATUSES),
+        ).fetchall()
+        return {r["zone_id"] for r in released}
+
+    def _rebalance_collector(self, collector_id: str):
+        zones = self._release_collector(collector_id)
+        user = self.get_user(collector_id)
+        if user and user["role"] == "WasteCollector" and user["zone_id"]:
+            zones.add(user["zone_id"])
+        for zone_id in zones:
+            self._assign_open_pickups(zone_id)
+
+    def assign_open_pickups(self, zone_id: int | None = None) -> int:
+        """Assign every unassigned open pickup (in ``zone_id`` or all zones); returns how many."""
+        zones = [zone_id] if zone_id is not None else [r["zone_id"] for r in self.conn.execute("SELECT zone_id FROM zone")]
+        with self.transaction("pickup_request"):
+            return sum(self._assign_open_pickups(z) for z in zones)
+
+    def set_collector_available(self, collector_id: str, available: bool):
+        """Mark a collector present or absent; an absent collector's open pickups go to the others."""
+        with self.transaction("users", "pickup_request"):
+            self.conn.execute("UPDATE users SET available=? WHERE user_login_id=?", (int(available), collector_id))
+            self._rebalance_collector(collector_id)
+
     def collector_update_pickup(self, collector_id: str, pickup_id: int, new_status: str, comment: str = "", evidence_image: str = ""):
         if new_status in ("FAILED", "CANCELLED") and len(comment.strip()) < 5:
             raise ValueError("Comment/reason must be at least 5 characters.")
+        row = self.conn.execute("SELECT assigned_collector FROM pickup_request WHERE pickup_id=?", (pickup_id,)).fetchone()
+        if row is None:
+            raise ValueError("Pickup not found.")
+        if row["assigned_collector"] != collector_id:
+            raise ValueError("This pickup is not assigned to you.")
         self._set_pickup_status(pickup_id, new_status, collector_id, comment, evidence_image)
 
     def _set_pickup_status(self, pickup_id: int, new_status: str, updated_by: str, comment: str = "", evidence_image: str = ""):
-        with self.transaction():
+        # Completion also awards points to recycling_log and the resident's users row.
+        with self.transaction("pickup_request", "recycling_log", *NOTIFICATION_TABLES):
             self.conn.execute(
                 "UPDATE pickup_request SET current_status=?,last_update=CURRENT_TIMESTAMP,cancelled_reason=CASE WHEN ?='CANCELLED' THEN ? ELSE cancelled_reason END WHERE pickup_id=?",
                 (new_status, new_status, comment, pickup_id),
@@ -329,26 +769,163 @@ class SQLiteService:
                 (pickup_id, updated_by, new_status, comment, evidence_image),
             )
             pickup = self.conn.execute("SELECT pickup_id,resident_id FROM pickup_request WHERE pickup_id=?", (pickup_id,)).fetchone()
-            self.add_notification(pickup["resident_id"], "STATUS_UPDATE", "Pickup status updated", f"Pickup #{pickup_id} status updated to {new_status}.")
+            self._pickup_notification(pickup["resident_id"], pickup_id, new_status, "STATUS_UPDATE", "pickup_status")
             admin_ids = [r["user_login_id"] for r in self.conn.execute("SELECT user_login_id FROM users WHERE role='MunicipalAdmin' AND is_active=1")]
             for aid in admin_ids:
-                self.add_notification(aid, "SYSTEM", "Collector update", f"Pickup #{pickup_id} updated to {new_status}")
+                self._pickup_notification(aid, pickup_id, new_status, "SYSTEM", "collector_update")
             if new_status == "COMPLETED":
                 self._award_points_for_pickup(pickup_id)
+        self._notify_pickup(pickup_id, new_status)
+
+    def add_pickup_listener(self, callback):
+        """Register ``callback(pickup_id, status)``, called after a pickup change is committed."""
+        self.pickup_listeners.append(callback)
+
+    def _notify_pickup(self, pickup_id: int, status: str):
+        for callback in self.pickup_listeners:
+            try:
+                callback(pickup_id, status)
+            except Exception:
+                logger.exception("Pickup listener failed for pickup %s", pickup_id)
 
     def _award_points_for_pickup(self, pickup_id: int):
-        row = self.conn.execute("SELECT p.resident_id,r.category,r.weight_kg FROM pickup_request p JOIN recycling_log r ON r.pickup_id=p.pickup_id WHERE p.pickup_id=?", (pickup_id,)).fetchone()
-        points = int(row["weight_kg"] * CATEGORY_MULTIPLIERS.get(row["category"], 1))
+        row = self.conn.execute(f"SELECT p.resident_id,{POINTS_SQL} AS points FROM pickup_request p JOIN recycling_log r ON r.pickup_id=p.pickup_id WHERE p.pickup_id=?", (pickup_id,)).fetchone()
+        points = row["points"]
         self.conn.execute("UPDATE pickup_request SET points_awarded=? WHERE pickup_id=?", (points, pickup_id))
         self.conn.execute("UPDATE recycling_log SET points_added=? WHERE pickup_id=?", (points, pickup_id))
         self.conn.execute("UPDATE users SET total_points=total_points+? WHERE user_login_id=?", (points, row["resident_id"]))
 
+    # geocoding
+    def import_geocodes(self, rows) -> int:
+        """Load ``(address, latitude, longitude)`` rows into the offline geocode table."""
+        data = [(address_key(a), a, float(lat), float(lon)) for a, lat, lon in rows if address_key(a)]
+        with self.transaction():
+            self.conn.executemany("INSERT OR REPLACE INTO geocode(address_key,address,latitude,longitude) VALUES(?,?,?,?)", data)
+        return len(data)
+
+    def geocode_residents(self) -> int:
+        """Fill resident coordinates from the geocode table in one statement."""
+        with self.transaction("users"):
+            cur = self.conn.execute(
+                """UPDATE users SET latitude=g.latitude,longitude=g.longitude
+                   FROM geocode g WHERE g.address_key=address_key(users.address) AND users.role='Resident'"""
+            )
+        return cur.rowcount
+
+    def set_pickup_etas(self, etas):
+        """Store ``(pickup_id, "YYYY-MM-DD HH:MM")`` estimated arrival times."""
+        with self.transaction("pickup_request"):
+            self.conn.executemany("UPDATE pickup_request SET eta=? WHERE pickup_id=?", [(eta, pickup_id) for pickup_id, eta in etas])
+
+    def list_route_stops(self, zone_id: int, collector_id: str | None = None):
+        """Open pickups in ``zone_id`` (only ``collector_id``'s if given) that have coordinates, with their recycling weight."""
+        placeholders = ",".join("?" * len(self.OPEN_STATUSES))
+        mine = " AND p.assigned_collector=?" if collector_id else ""
+        return self.conn.execute(
+            f"""SELECT p.pickup_id,p.requested_datetime,u.latitude,u.longitude,COALESCE(r.weight_kg,0) AS weight_kg
+                FROM pickup_request p JOIN users u ON u.user_login_id=p.resident_id
+                LEFT JOIN recycling_log r ON r.pickup_id=p.pickup_id
+                WHERE p.zone_id=? AND p.current_status IN ({placeholders}) AND u.latitude IS NOT NULL{mine}
+                ORDER BY p.requested_datetime""",
+            (zone_id, *self.OPEN_STATUSES, *([collector_id] if collector_id else [])),
+        ).fetchall()
+
+    # reward multipliers
+    def get_category_multipliers(self, at: str = "9999-12-31") -> dict:
+        rows = self.conn.execute(
+            """SELECT m.category,m.multiplier FROM reward_multiplier m WHERE m.version_id=(
+                   SELECT version_id FROM reward_multiplier_version WHERE effective_from <= ?
+                   ORDER BY effective_from DESC, version_id DESC LIMIT 1)""",
+            (at,),
+        ).fetchall()
+        return {r["category"]: r["multiplier"] for r in rows}
+
+    def add_multiplier_version(self, changes: dict, effective_from: str) -> int:
+        """Create a new multiplier version: the previous set with ``changes`` applied."""
+        if any(value < 0 for value in changes.values()):
+            raise ValueError("Multipliers cannot be negative.")
+        multipliers = {**self.get_category_multipliers(effective_from), **changes}
+        with self.transaction():
+            version_id = self.conn.execute("INSERT INTO reward_multiplier_version(effective_from) VALUES(?)", (effective_from,)).lastrowid
+            self.conn.executemany(
+                "INSERT INTO reward_multiplier(version_id,category,multiplier) VALUES(?,?,?)",
+                [(version_id, category, multiplier) for category, multiplier in multipliers.items()],
+            )
+        return version_id
+
     # notifications/admin/dashboard
     def add_notification(self, user_id: str, note_type: str, title: str, message: str):
-        self.conn.execute("INSERT INTO notification(user_id,type,title,message) VALUES(?,?,?,?)", (user_id, note_type, title, message))
+        with self.transaction(*NOTIFICATION_TABLES):
+            self.conn.execute("INSERT INTO notification(user_id,type,title,message) VALUES(?,?,?,?)", (user_id, note_type, title, message))
+
+    def _pickup_notification(self, user_id: str, pickup_id: int, status: str, note_type: str, template_key: str):
+        """Notify ``user_id`` of a pickup's new status.
+
+        A notice about the same pickup created in the last ``status_coalesce_minutes`` is updated
+        instead, with the latest status and the transition trail, and shows as unread again. The
+        window stays anchored at ``created_at``; ``updated_at`` records the last change.
+        """
+        row = None
+        if self.status_coalesce_minutes > 0:
+            row = self.conn.execute(
+                """SELECT notification_id,status_trail FROM notification
+                   WHERE pickup_id=? AND user_id=? AND status_trail IS NOT NULL AND created_at>=datetime('now',?)
+                   ORDER BY notification_id DESC LIMIT 1""",
+                (pickup_id, user_id, f"-{self.status_coalesce_minutes} minutes"),
+            ).fetchone()
+        trail = (row["status_trail"].split(",") if row and row["status_trail"] else []) + [status]
+        if len(trail) == 1 and status == "PENDING" and template_key == "pickup_status":
+            template_key = "pickup_submitted"
+        params = json.dumps({"pickup_id": pickup_id, "status": status}, separators=(",", ":"))
+        if row is None:
+            self.conn.execute(
+                "INSERT INTO notification(user_id,type,title,message,pickup_id,status_trail,template_key,params) VALUES(?,?,'','',?,?,?,?)",
+                (user_id, note_type, pickup_id, status, template_key, params),
+            )
+        else:
+            self.conn.execute(
+                """UPDATE notification SET template_key=?,params=?,status_trail=?,updated_at=CURRENT_TIMESTAMP,read_at=NULL
+                   WHERE notification_id=?""",
+                (template_key, params, ",".join(trail), row["notification_id"]),
+            )
+
+    def get_notifications(self, user_id: str, limit: int = 100, language: str = "en") -> list[dict]:
+        """Unread notifications newest first, then read ones, ``limit`` rows in all.
+
+        Templated rows get their title and message rendered in ``language`` by the ``note_text``
+        SQL function, which the i18n service registers.
+        """
+        select = """SELECT *,note_text(?,'title',template_key,params,status_trail,title) AS title_text,
+                           note_text(?,'message',template_key,params,status_trail,message) AS message_text
+                    FROM notification WHERE user_id=? AND read_at IS {} NULL ORDER BY created_at DESC,notification_id DESC LIMIT ?"""
+        unread = self.conn.execute(select.format(""), (language, language, user_id, limit)).fetchall()
+        read = self.conn.execute(select.format("NOT"), (language, language, user_id, limit - len(unread))).fetchall()
+        notes = []
+        for row in unread + read:
+            note = dict(row)
+            note["title"], note["message"] = note.pop("title_text"), note.pop("message_text")
+            notes.append(note)
+        return notes
+
+    def unread_count(self, user_id: str) -> int:
+        row = self.conn.execute("SELECT unread_count FROM users WHERE user_login_id=?", (user_id,)).fetchone()
+        return row["unread_count"] if row else 0
+
+    def mark_notifications_read(self, user_id: str, notification_ids) -> int:
+        ids = list(notification_ids)
+        if not ids:
+            return 0
+        with self.transaction("notification", "users"):
+            cur = self.conn.execute(
+                f"UPDATE notification SET read_at=CURRENT_TIMESTAMP WHERE user_id=? AND read_at IS NULL AND notification_id IN ({','.join('?' * len(ids))})",
+                (user_id, *ids),
+            )
+        return cur.rowcount
 
-    def get_notifications(self, user_id: str):
-        return self.conn.execute("SELECT * FROM notification WHERE user_id=? ORDER BY created_at DESC", (user_id,)).fetchall()
+    def mark_all_read(self, user_id: str) -> int:
+        with self.transaction("notification", "users"):
+            cur = self.conn.execute("UPDATE notification SET read_at=CURRENT_TIMESTAMP WHERE user_id=? AND read_at IS NULL", (user_id,))
+        return cur.rowcount
 
     def get_resident_stats(self, user_id: str):
         total = self.conn.execute("SELECT COUNT(*) c FROM pickup_request WHERE resident_id=?", (user_id,)).fetchone()["c"]
@@ -375,14 +952,46 @@ class SQLiteService:
             "pickups": self.conn.execute("SELECT COUNT(*) c FROM pickup_request").fetchone()["c"],
             "recycling_logs": self.conn.execute("SELECT COUNT(*) c FROM recycling_log").fetchone()["c"],
             "notifications": self.conn.execute("SELECT COUNT(*) c FROM notification").fetchone()["c"],
+            "outbox": self.outbox_status_counts(),
         }
 
+    def data_version(self) -> int:
+        """Changes whenever another connection commits to the database file; costs no table reads."""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def change_versions(self) -> dict[str, int]:
+        return {r["table_name"]: r["version"] for r in self.conn.execute("SELECT table_name,version FROM change_log")}
+
+    def outbox_status_counts(self) -> dict:
+        rows = self.conn.execute("SELECT status,COUNT(*) c FROM notification_outbox GROUP BY status").fetchall()
+        return {"PENDING": 0, "SENT": 0, "FAILED": 0, **{r["status"]: r["c"] for r in rows}}
+
     def list_users(self):
         return self.conn.execute("SELECT u.user_login_id,u.name,u.role,u.total_points,u.is_active,COALESCE(z.name,'') zone_name FROM users u LEFT JOIN zone z ON z.zone_id=u.zone_id ORDER BY u.user_login_id").fetchall()
 
+    def count_users(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) c FROM users").fetchone()["c"]
+
+    def list_users_page(self, offset: int, limit: int, sort: str = "id", descending: bool = False, after=None):
+        """One page of :meth:`list_users`, ordered by a :data:`USER_SORT_COLUMNS` key; ``after`` as for pickups."""
+        order = _order_by(USER_SORT_COLUMNS, sort, descending, "u.user_login_id")
+        where, params = "", ()
+        if after is not None:
+            cond, params = _seek_after(USER_SORT_COLUMNS, sort, descending, "u.user_login_id", after["sort_key"], after["user_login_id"])
+            where, offset = f"WHERE {cond}", 0
+        return self.conn.execute(
+            f"""SELECT u.user_login_id,u.name,u.role,u.total_points,u.is_active,COALESCE(z.name,'') zone_name,
+                       {USER_SORT_COLUMNS[sort]} AS sort_key
+                FROM users u LEFT JOIN zone z ON z.zone_id=u.zone_id
+                {where} ORDER BY {order} LIMIT ? OFFSET ?""",
+            (*params, limit, offset),
+        ).fetchall()
+
     def add_user(self, login_id: str, name: str, password: str, role: str, zone_id: int | None):
-        self.conn.execute("INSERT INTO users(user_login_id,user_id,name,password_hash,role,zone_id) VALUES(?,?,?,?,?,?)", (login_id, login_id, name, hash_password(password), role, zone_id))
-        self.conn.commit()
+        with self.transaction("users", "pickup_request"):
+            self.conn.execute("INSERT INTO users(user_login_id,user_id,name,password_hash,role,zone_id) VALUES(?,?,?,?,?,?)", (login_id, login_id, name, hash_password(password), role, zone_id))
+            if role == "WasteCollector" and zone_id:
+                self._assign_open_pickups(zone_id)
 
     def update_user(self, login_id: str, name: str, role: str, zone_id: int | None, password: str = "", active: int = 1):
         cols = ["name=?", "role=?", "zone_id=?", "is_active=?"]
@@ -391,25 +1000,62 @@ class SQLiteService:
             cols.append("password_hash=?")
             vals.append(hash_password(password))
         vals.append(login_id)
-        self.conn.execute(f"UPDATE users SET {','.join(cols)} WHERE user_login_id=?", vals)
-        self.conn.commit()
+        with self.transaction("users", "pickup_request"):
+            self.conn.execute(f"UPDATE users SET {','.join(cols)} WHERE user_login_id=?", vals)
+            self._rebalance_collector(login_id)
 
     def list_zones(self):
         return self.conn.execute("SELECT zone_id,name,is_active FROM zone ORDER BY zone_id").fetchall()
 
     def create_zone(self, name: str):
         self.conn.execute("INSERT INTO zone(name) VALUES(?)", (name,))
+        touch_tables(self.conn, "zone")
         self.conn.commit()
 
     def update_zone(self, zone_id: int, name: str, active: int = 1):
         self.conn.execute("UPDATE zone SET name=?,is_active=? WHERE zone_id=?", (name, active, zone_id))
+        touch_tables(self.conn, "zone")
         self.conn.commit()
 
-    def send_notification_by_zone(self, zone_id: int, title: str, message: str):
-        users = self.conn.execute("SELECT user_login_id FROM users WHERE zone_id=? AND is_active=1", (zone_id,)).fetchall()
-        with self.transaction():
-            for user in users:
-                self.add_notification(user["user_login_id"], "SYSTEM", title, message)
+    def send_notification_by_zone(self, zone_id: int, title: str, message: str) -> int:
+        return self.broadcast_notification(title, message, zone_id=zone_id)
+
+    def iter_broadcast(self, title: str, message: str, zone_id: int | None = None, role: str | None = None, note_type: str = "SYSTEM", chunk_size: int = BROADCAST_CHUNK):
+        """Notify active users (optionally of one zone and/or role), yielding ``(sent, total)`` per chunk.
+
+        Each chunk is one ``INSERT ... SELECT`` over a ``users.id`` range in its own short
+        transaction, so other writers get the lock between chunks.
+        """
+        where, params = ["is_active=1"], []
+        if zone_id is not None:
+            where.append("zone_id=?")
+            params.append(zone_id)
+        if role:
+            where.append("role=?")
+            params.append(role)
+        cond = " AND ".join(where)
+        bounds = self.conn.execute(f"SELECT MIN(id) lo,MAX(id) hi,COUNT(*) n FROM users WHERE {cond}", params).fetchone()
+        sent, total = 0, bounds["n"]
+        if not total:
+            return
+        for start in range(bounds["lo"], bounds["hi"] + 1, chunk_size):
+            with self.transaction(*NOTIFICATION_TABLES):
+                cur = self.conn.execute(
+                    f"""INSERT INTO notification(user_id,type,title,message)
+                        SELECT user_login_id,?,?,? FROM users WHERE id>=? AND id<? AND {cond} ORDER BY id""",
+                    (note_type, title, message, start, start + chunk_size, *params),
+                )
+            sent += cur.rowcount
+            yield sent, total
+        logger.info("Broadcast '%s' to %s users", title, sent)
+
+    def broadcast_notification(self, title: str, message: str, zone_id: int | None = None, role: str | None = None, progress=None) -> int:
+        """Run :meth:`iter_broadcast` to completion; ``progress(sent, total)`` after each chunk."""
+        sent = 0
+        for sent, total in self.iter_broadcast(title, message, zone_id, role):
+            if progress:
+                progress(sent, total)
+        return sent
 
     def close(self):
         self.conn.close()
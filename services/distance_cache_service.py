@@ -0,0 +1,248 @@
+"""Persistent memory-mapped float32 distance matrices for a zone's known stop locations."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import sys
+from array import array
+from pathlib import Path
+
+from services.route_service import RouteStop, distance_block, distance_matrix, haversine_km, np
+
+logger = logging.getLogger(__name__)
+
+ITEM_SIZE = 4  # float32
+SPARE = 0.25  # room for new stops kept past the stored ones, as a share of them
+BLOCK_ROWS = 512  # rows computed per NumPy block, bounding the float64 scratch memory
+
+
+def stop_set_key(stops) -> str:
+    """Order-independent hash of stop ids and coordinates."""
+    digest = hashlib.sha256()
+    for line in sorted(f"{s.stop_id}|{s.latitude:.6f}|{s.longitude:.6f}" for s in stops):
+        digest.update(line.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class _PermutedRow:
+    """Row view that maps caller indices onto matrix columns without copying."""
+
+    __slots__ = ("view", "base", "columns")
+
+    def __init__(self, view, base: int, columns: list[int]):
+        self.view, self.base, self.columns = view, base, columns
+
+    def __getitem__(self, j):
+        return self.view[self.base + self.columns[j]]
+
+    def __len__(self):
+        return len(self.columns)
+
+    def __iter__(self):
+        return (self.view[self.base + c] for c in self.columns)
+
+
+class CachedMatrix:
+    """A square distance matrix stored row-major with spare ``capacity`` for new stops.
+
+    Rows handed out by :meth:`row` and :meth:`rows_for` are memoryview slices of the mapped
+    file; they stay valid until the matrix grows past its capacity.
+    """
+
+    def __init__(self, store: "DistanceMatrixStore", namespace: str, meta: dict):
+        self.store = store
+        self.namespace = namespace
+        self.meta = meta
+        self.stops = [RouteStop(sid, lat, lon, 0.0) for sid, (lat, lon) in zip(meta["stop_ids"], meta["coords"])]
+        self.index = {s.stop_id: i for i, s in enumerate(self.stops)}
+        self._map(store.data_path(namespace, meta["generation"]))
+
+    def _map(self, path: Path):
+        with open(path, "r+b") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0)
+        self._view = memoryview(self._mm).cast("f")
+
+    @property
+    def n(self) -> int:
+        return len(self.stops)
+
+    @property
+    def capacity(self) -> int:
+        return self.meta["capacity"]
+
+    @property
+    def key(self) -> str:
+        return self.meta["key"]
+
+    @property
+    def stop_ids(self) -> list[str]:
+        return self.meta["stop_ids"]
+
+    def row(self, i: int):
+        base = i * self.capacity
+        return self._view[base : base + self.n]
+
+    def distance(self, a: str, b: str) -> float:
+        return self._view[self.index[a] * self.capacity + self.index[b]]
+
+    def rows_for(self, stop_ids: list[str]) -> list:
+        """Rows aligned with ``stop_ids``; zero-copy slices when they are a prefix of the stored order."""
+        idx = [self.index[sid] for sid in stop_ids]
+        if idx == list(range(len(idx))):
+            cap = self.capacity
+            return [self._view[i * cap : i * cap + len(idx)] for i in idx]
+        return [_PermutedRow(self._view, i * self.capacity, idx) for i in idx]
+
+    def add_stops(self, stops: list[RouteStop]) -> None:
+        """Append unseen stops, filling only their new rows and columns."""
+        new = [s for s in stops if s.stop_id not in self.index]
+        if not new:
+            return
+        needed = self.n + len(new)
+        if needed > self.capacity:
+            self._grow(needed + int(needed * SPARE))
+        n, cap = self.n, self.capacity
+        for k, stop in enumerate(new, start=n):
+            self.stops.append(RouteStop(stop.stop_id, stop.latitude, stop.longitude, 0.0))
+            self.index[stop.stop_id] = k
+        if np is not None:
+            grid = np.frombuffer(self._mm, dtype=np.float32, count=cap * cap).reshape(cap, cap)
+            points = [(s.latitude, s.longitude) for s in self.stops]
+            for start in range(n, needed, BLOCK_ROWS):
+                block = distance_block(points[start : start + BLOCK_ROWS], points)
+                grid[start : start + len(block), :needed] = block
+                grid[:needed, start : start + len(block)] = block.T
+            del grid
+        else:
+            view = self._view
+            for k in range(n, needed):
+                stop = self.stops[k]
+                for i, other in enumerate(self.stops):
+                    d = haversine_km(stop.latitude, stop.longitude, other.latitude, other.longitude)
+                    view[k * cap + i] = d
+                    view[i * cap + k] = d
+        self._mm.flush()
+        self.meta.update(
+            stop_ids=[s.stop_id for s in self.stops],
+            coords=[[s.latitude, s.longitude] for s in self.stops],
+            key=stop_set_key(self.stops),
+        )
+        self.store.write_meta(self.namespace, self.meta)
+
+    def _grow(self, capacity: int):
+        old_cap, n, old_view = self.capacity, self.n, self._view
+        generation = self.meta["generation"] + 1
+        path = self.store.data_path(self.namespace, generation)
+        with open(path, "wb") as fh:
+            fh.truncate(capacity * capacity * ITEM_SIZE)
+            for i in range(n):
+                fh.seek(i * capacity * ITEM_SIZE)
+                fh.write(old_view[i * old_cap : i * old_cap + n].tobytes())
+        old_path = self.store.data_path(self.namespace, self.meta["generation"])
+        self.meta.update(capacity=capacity, generation=generation)
+        self.close()
+        self._map(path)
+        try:
+            os.remove(old_path)
+        except OSError:
+            # Still mapped on platforms that forbid deleting open files; removed on next build.
+            logger.debug("Could not remove old distance matrix %s", old_path)
+
+    def close(self):
+        self._view.release()
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # rows handed out earlier still reference the map; it closes when they are dropped
+
+
+class DistanceMatrixStore:
+    def __init__(self, root: str = "db/distance_cache"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def data_path(self, namespace: str, generation: int) -> Path:
+        return self.root / f"{namespace}.{generation}.f32"
+
+    def meta_path(self, namespace: str) -> Path:
+        return self.root / f"{namespace}.json"
+
+    def write_meta(self, namespace: str, meta: dict):
+        tmp = self.meta_path(namespace).with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, self.meta_path(namespace))
+
+    def open(self, namespace: str, key: str | None = None) -> CachedMatrix | None:
+        """Map a stored matrix; ``None`` when missing, from another platform, or ``key`` differs."""
+        try:
+            meta = json.loads(self.meta_path(namespace).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if meta.get("byteorder") != sys.byteorder or (key is not None and meta.get("key") != key):
+            return None
+        if not self.data_path(namespace, meta["generation"]).exists():
+            return None
+        return CachedMatrix(self, namespace, meta)
+
+    def build(self, namespace: str, stops: list[RouteStop], spare: float = SPARE) -> CachedMatrix:
+        n = len(stops)
+        capacity = max(n + int(n * spare), 8)
+        old = self.open(namespace)
+        generation = old.meta["generation"] + 1 if old else 0
+        if old:
+            old.close()
+        points = [(s.latitude, s.longitude) for s in stops]
+        with open(self.data_path(namespace, generation), "w+b") as fh:
+            fh.truncate(capacity * capacity * ITEM_SIZE)
+            if np is not None:
+                # Blocks of float32 rows go straight into the mapped file at the capacity stride.
+                with mmap.mmap(fh.fileno(), 0) as mm:
+                    grid = np.frombuffer(mm, dtype=np.float32, count=capacity * capacity).reshape(capacity, capacity)
+                    for start in range(0, n, BLOCK_ROWS):
+                        block = distance_block(points[start : start + BLOCK_ROWS], points)
+                        grid[start : start + len(block), :n] = block
+                    del grid
+                    mm.flush()
+            else:
+                padding = array("f", bytes((capacity - n) * ITEM_SIZE))
+                for row in distance_matrix(points):
+                    array("f", row).tofile(fh)
+                    padding.tofile(fh)
+        for stale in self.root.glob(f"{namespace}.*.f32"):
+            if stale != self.data_path(namespace, generation):
+                try:
+                    stale.unlink()
+                except OSError:
+                    pass
+        self.write_meta(
+            namespace,
+            {
+                "key": stop_set_key(stops),
+                "capacity": capacity,
+                "generation": generation,
+                "byteorder": sys.byteorder,
+                "stop_ids": [s.stop_id for s in stops],
+                "coords": [[s.latitude, s.longitude] for s in stops],
+            },
+        )
+        logger.info("Built %sx%s distance matrix for %s", n, n, namespace)
+        return self.open(namespace)
+
+    def ensure(self, namespace: str, stops: list[RouteStop]) -> CachedMatrix:
+        """Open the namespace's matrix, adding any new stops; rebuild if a known stop moved."""
+        matrix = self.open(namespace)
+        if matrix is not None:
+            known = {s.stop_id: s for s in matrix.stops}
+            moved = any(
+                s.stop_id in known and stop_set_key([s]) != stop_set_key([known[s.stop_id]])
+                for s in stops
+            )
+            if not moved:
+                matrix.add_stops(stops)
+                return matrix
+            matrix.close()
+        return self.build(namespace, stops)
@@ -0,0 +1,87 @@
+"""Pickup ETAs derived from a collector's planned route order and progress, without re-planning."""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+
+from services.route_service import DEFAULT_SERVICE_MINUTES, DEFAULT_SPEED_KMH, DEPOT_ID, RouteStop, haversine_km
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ("COMPLETED", "FAILED", "CANCELLED")
+
+
+class EtaService:
+    """Keeps each collector's planned stop order and refreshes ``pickup_request.eta`` as work progresses.
+
+    The vehicle's last known position is an anchor ``(route index, departure time)``: a stop going
+    IN_PROGRESS, COMPLETED or FAILED moves the anchor there, and only the open stops after it are
+    re-timed. A cancelled stop is skipped by the stops after the anchor. Stop ids are pickup ids.
+    """
+
+    def __init__(self, db, speed_kmh: float = DEFAULT_SPEED_KMH, service_minutes: float = DEFAULT_SERVICE_MINUTES, clock=datetime.now):
+        self.db = db
+        self.minutes_per_km = 60.0 / speed_kmh
+        self.service = timedelta(minutes=service_minutes)
+        self.clock = clock
+        self.routes: dict[str, list[RouteStop]] = {}
+        self.anchors: dict[str, tuple[int, datetime]] = {}
+        self.finished: set[str] = set()
+        self.where: dict[str, tuple[str, int]] = {}
+        db.add_pickup_listener(self._on_pickup)
+
+    def set_route(self, collector_id: str, route: list[RouteStop], start: datetime | None = None) -> dict[int, datetime]:
+        """Adopt ``route`` (``DEPOT`` stops allowed) as the collector's plan, leaving at ``start``."""
+        for stop in self.routes.get(collector_id, []):
+            self.where.pop(stop.stop_id, None)
+        self.routes[collector_id] = list(route)
+        for idx, stop in enumerate(route):
+            if stop.stop_id != DEPOT_ID:
+                self.where[stop.stop_id] = (collector_id, idx)
+                self.finished.discard(stop.stop_id)
+        self.anchors[collector_id] = (-1, start or self.clock())
+        return self._retime(collector_id)
+
+    def _travel(self, a: RouteStop, b: RouteStop) -> timedelta:
+        return timedelta(minutes=haversine_km(a.latitude, a.longitude, b.latitude, b.longitude) * self.minutes_per_km)
+
+    def _retime(self, collector_id: str) -> dict[int, datetime]:
+        route = self.routes[collector_id]
+        index, at = self.anchors[collector_id]
+        prev = route[index] if index >= 0 else None
+        etas = {}
+        for stop in route[index + 1 :]:
+            if stop.stop_id in self.finished:
+                continue
+            if prev is not None:
+                at += self._travel(prev, stop)
+            prev = stop
+            if stop.stop_id == DEPOT_ID:
+                continue
+            if stop.window_start is not None and at < stop.window_start:
+                at = stop.window_start
+            etas[int(stop.stop_id)] = at
+            at += self.service
+        self.db.set_pickup_etas((pickup_id, eta.strftime("%Y-%m-%d %H:%M")) for pickup_id, eta in etas.items())
+        logger.debug("Re-timed %s stops for %s", len(etas), collector_id)
+        return etas
+
+    def _on_pickup(self, pickup_id: int, status: str):
+        located = self.where.get(str(pickup_id))
+        if located is None:
+            return
+        collector_id, index = located
+        now = self.clock()
+        if status == "IN_PROGRESS":
+            self.db.set_pickup_etas([(pickup_id, now.strftime("%Y-%m-%d %H:%M"))])
+            self.anchors[collector_id] = (index, now + self.service)
+        elif status in ("COMPLETED", "FAILED"):
+            self.finished.add(str(pickup_id))
+            self.anchors[collector_id] = (index, now)
+        elif status == "CANCELLED":
+            self.finished.add(str(pickup_id))
+            if index <= self.anchors[collector_id][0]:
+                return
+        else:
+            return
+        self._retime(collector_id)
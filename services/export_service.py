@@ -0,0 +1,188 @@
+"""Streaming CSV/JSONL export of pickups, recycling logs and notifications for auditors."""
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from services.i18n_service import register_notification_text
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("csv", "jsonl")
+DEFAULT_CHUNK_SIZE = 5000
+
+# Each dataset declares its base query plus the columns used by the date/zone/status filters.
+DATASETS = {
+    "pickups": {
+        "sql": """SELECT p.pickup_id,p.resident_id,p.zone_id,z.name AS zone,p.requested_datetime,p.current_status,
+                         p.cancelled_reason,p.points_awarded,p.created_at,p.last_update
+                  FROM pickup_request p JOIN zone z ON z.zone_id=p.zone_id""",
+        "date": "p.requested_datetime",
+        "zone": "p.zone_id",
+        "status": "p.current_status",
+        "order": "p.pickup_id",
+    },
+    "recycling_logs": {
+        "sql": """SELECT r.log_id,r.pickup_id,r.resident_id,p.zone_id,r.category,r.weight_kg,r.points_added,
+                         p.current_status,r.logged_at
+                  FROM recycling_log r LEFT JOIN pickup_request p ON p.pickup_id=r.pickup_id""",
+        "date": "r.logged_at",
+        "zone": "p.zone_id",
+        "status": "p.current_status",
+        "order": "r.log_id",
+    },
+    "notifications": {
+        "sql": """SELECT n.notification_id,n.user_id,u.zone_id,n.type,
+                         note_text(COALESCE(u.language,'en'),'title',n.template_key,n.params,n.status_trail,n.title) AS title,
+                         note_text(COALESCE(u.language,'en'),'message',n.template_key,n.params,n.status_trail,n.message) AS message,n.created_at,n.read_at
+                  FROM notification n LEFT JOIN users u ON u.user_login_id=n.user_id""",
+        "date": "n.created_at",
+        "zone": "u.zone_id",
+        "status": "n.type",
+        "order": "n.notification_id",
+    },
+}
+
+
+@dataclass
+class ExportResult:
+    dataset: str
+    path: str
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else float(self.rows)
+
+
+def connect_read_only(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(f"file:{Path(db_path).resolve().as_posix()}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    register_notification_text(conn)
+    return conn
+
+
+def build_query(dataset: str, date_from: str = "", date_to: str = "", zone_id: int | None = None, status: str = "") -> tuple[str, list]:
+    """Return the filtered SQL for a dataset. ``date_to`` is inclusive of the whole day."""
+    spec = DATASETS.get(dataset)
+    if spec is None:
+        raise ValueError(f"Unknown export dataset: {dataset}")
+    where, params = [], []
+    if date_from:
+        where.append(f"{spec['date']} >= ?")
+        params.append(date_from)
+    if date_to:
+        where.append(f"{spec['date']} < date(?, '+1 day')")
+        params.append(date_to)
+    if zone_id is not None:
+        where.append(f"{spec['zone']} = ?")
+        params.append(zone_id)
+    if status:
+        where.append(f"{spec['status']} = ?")
+        params.append(status)
+    sql = spec["sql"]
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return f"{sql} ORDER BY {spec['order']}", params
+
+
+def _open_output(path: Path, compress: bool):
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def export_dataset(
+    db_path: str,
+    dataset: str,
+    out_path: str,
+    fmt: str = "csv",
+    compress: bool | None = None,
+    date_from: str = "",
+    date_to: str = "",
+    zone_id: int | None = None,
+    status: str = "",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress=None,
+) -> ExportResult:
+    """Stream a dataset to CSV/JSONL in fixed-size chunks so memory stays constant.
+
+    ``compress`` defaults to gzip when ``out_path`` ends with ``.gz``. ``progress`` is called
+    with the running row count after every chunk.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Export format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be positive.")
+    sql, params = build_query(dataset, date_from, date_to, zone_id, status)
+    out = Path(out_path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    if compress is None:
+        compress = out.suffix == ".gz"
+
+    started = time.perf_counter()
+    rows = 0
+    conn = connect_read_only(db_path)
+    try:
+        cur = conn.execute(sql, params)
+        columns = [c[0] for c in cur.description]
+        with _open_output(out, compress) as fh:
+            writer = None
+            if fmt == "csv":
+                writer = csv.writer(fh)
+                writer.writerow(columns)
+            while True:
+                chunk = cur.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                if writer is not None:
+                    writer.writerows(chunk)
+                else:
+                    fh.write("".join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in chunk))
+                rows += len(chunk)
+                if progress:
+                    progress(rows)
+    finally:
+        conn.close()
+    result = ExportResult(dataset, str(out), rows, time.perf_counter() - started)
+    logger.info("Exported %s rows of %s to %s (%.0f rows/s)", rows, dataset, out, result.rows_per_second)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export Smart Waste data for auditors.")
+    parser.add_argument("dataset", choices=sorted(DATASETS))
+    parser.add_argument("output", help="Output file; a .gz suffix enables gzip compression")
+    parser.add_argument("--db", default="db/prototype.db")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--from", dest="date_from", default="", help="Start date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", default="", help="End date inclusive (YYYY-MM-DD)")
+    parser.add_argument("--zone", type=int, default=None, help="Zone ID")
+    parser.add_argument("--status", default="", help="Pickup status (notification type for notifications)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    result = export_dataset(
+        args.db,
+        args.dataset,
+        args.output,
+        fmt=args.format,
+        date_from=args.date_from,
+        date_to=args.date_to,
+        zone_id=args.zone,
+        status=args.status,
+        chunk_size=args.chunk_size,
+    )
+    print(f"Exported {result.rows} rows to {result.path} in {result.seconds:.2f}s ({result.rows_per_second:.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Multi-vehicle capacitated route planning per zone (Clarke-Wright savings + local search)."""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from services.distance_cache_service import DistanceMatrixStore
+from services.route_service import (
+    EPSILON,
+    RouteStop,
+    Vehicle,
+    distance_matrix,
+    improve_tour,
+    neighbour_lists,
+)
+
+logger = logging.getLogger(__name__)
+
+SAVINGS_NEIGHBOURS = 25
+
+
+@dataclass
+class VehicleRoute:
+    vehicle_id: str
+    stops: list[RouteStop] = field(default_factory=list)
+    distance_km: float = 0.0
+    load_kg: float = 0.0
+
+
+def _trip_length(trip: list[int], dist) -> float:
+    if not trip:
+        return 0.0
+    return dist[0][trip[0]] + sum(dist[trip[i - 1]][trip[i]] for i in range(1, len(trip))) + dist[trip[-1]][0]
+
+
+def savings_trips(dist, demands: list[float], capacity: float, neighbours) -> list[list[int]]:
+    """Parallel Clarke-Wright savings; candidate pairs are limited to each stop's near neighbours."""
+    n = len(dist)
+    pairs = {(min(i, j), max(i, j)) for i in range(1, n) for j in neighbours[i] if j != 0}
+    savings = sorted(((dist[0][i] + dist[0][j] - dist[i][j], i, j) for i, j in pairs), reverse=True)
+    trips = {i: [i] for i in range(1, n)}
+    owner = list(range(n))
+    load = {i: demands[i] for i in range(1, n)}
+    for saving, i, j in savings:
+        if saving <= EPSILON:
+            break
+        ri, rj = owner[i], owner[j]
+        if ri == rj or load[ri] + load[rj] > capacity + EPSILON:
+            continue
+        a, b = trips[ri], trips[rj]
+        # i and j must both be route ends; orient so that i ends ``a`` and j starts ``b``.
+        if a[-1] != i:
+            if a[0] != i:
+                continue
+            a.reverse()
+        if b[0] != j:
+            if b[-1] != j:
+                continue
+            b.reverse()
+        a.extend(b)
+        load[ri] += load.pop(rj)
+        for node in b:
+            owner[node] = ri
+        del trips[rj]
+    return list(trips.values())
+
+
+def relocate(trips: list[list[int]], dist, demands: list[float], capacity: float, neighbours, max_passes: int = 5) -> None:
+    """Move single stops to the cheapest position in a nearby trip while capacity allows."""
+    for _ in range(max_passes):
+        where = {node: t for t, trip in enumerate(trips) for node in trip}
+        loads = [sum(demands[node] for node in trip) for trip in trips]
+        moved = False
+        for t, trip in enumerate(trips):
+            k = 0
+            while k < len(trip):
+                u = trip[k]
+                prev = trip[k - 1] if k > 0 else 0
+                nxt = trip[k + 1] if k + 1 < len(trip) else 0
+                gain = dist[prev][u] + dist[u][nxt] - dist[prev][nxt]
+                best = None
+                for c in neighbours[u]:
+                    target = where.get(c)
+                    if target is None or target == t or loads[target] + demands[u] > capacity + EPSILON:
+                        continue
+                    other = trips[target]
+                    ci = other.index(c)
+                    for pos in (ci, ci + 1):
+                        left = other[pos - 1] if pos > 0 else 0
+                        right = other[pos] if pos < len(other) else 0
+                        cost = dist[left][u] + dist[u][right] - dist[left][right]
+                        if cost < gain - EPSILON and (best is None or cost < best[0]):
+                            best = (cost, target, pos)
+                if best is None:
+                    k += 1
+                    continue
+                _cost, target, pos = best
+                trip.pop(k)
+                trips[target].insert(pos, u)
+                where[u] = target
+                loads[t] -= demands[u]
+                loads[target] += demands[u]
+                moved = True
+        trips[:] = [trip for trip in trips if trip]
+        if not moved:
+            return
+
+
+def _polish(trip: list[int], dist) -> list[int]:
+    """Intra-trip 2-opt/Or-opt on the sub-matrix of the depot plus the trip's stops."""
+    if len(trip) < 3:
+        return trip
+    nodes = [0] + trip
+    sub = [[dist[a][b] for b in nodes] for a in nodes]
+    tour = improve_tour(list(range(len(nodes))), sub)
+    anchor = tour.index(0)
+    tour = tour[anchor + 1 :] + tour[:anchor]
+    return [nodes[i] for i in tour]
+
+
+def plan_fleet(stops: list[RouteStop], vehicles: list[Vehicle], distances=None) -> list[VehicleRoute]:
+    """Split one zone's stops across ``vehicles`` and return an ordered route per vehicle.
+
+    All vehicles start from and unload at the first vehicle's depot. A vehicle whose work does
+    not fit in one load makes several trips, separated by ``DEPOT`` stops in its route.
+    """
+    if not vehicles:
+        raise ValueError("At least one vehicle is required.")
+    if any(v.capacity_kg <= 0 for v in vehicles):
+        raise ValueError("Vehicle capacity must be positive.")
+    if not vehicles[0].has_depot:
+        raise ValueError("Fleet planning requires a depot location.")
+    capacity = max(v.capacity_kg for v in vehicles)
+    if any(s.demand_kg > capacity for s in stops):
+        raise ValueError("A stop's demand exceeds every vehicle's capacity.")
+    routes = [VehicleRoute(v.vehicle_id) for v in vehicles]
+    if not stops:
+        return routes
+
+    depot = vehicles[0].depot_stop()
+    nodes = [depot] + list(stops)
+    dist = distances if distances is not None else distance_matrix([(s.latitude, s.longitude) for s in nodes])
+    demands = [s.demand_kg for s in nodes]
+    neighbours = neighbour_lists(dist, SAVINGS_NEIGHBOURS)
+    trips = savings_trips(dist, demands, capacity, neighbours)
+    relocate(trips, dist, demands, capacity, neighbours)
+    trips = [_polish(trip, dist) for trip in trips]
+
+    # Longest trips first, each to the vehicle that can carry it with the least distance so far.
+    planned = sorted(((_trip_length(t, dist), sum(demands[i] for i in t), t) for t in trips), key=lambda x: -x[0])
+    for length, load, trip in planned:
+        fits = [k for k, v in enumerate(vehicles) if v.capacity_kg + EPSILON >= load]
+        route = routes[min(fits, key=lambda k: (routes[k].distance_km, -vehicles[k].capacity_kg))]
+        if route.stops:
+            route.stops.append(depot)
+        route.stops.extend(nodes[i] for i in trip)
+        route.distance_km += length
+        route.load_kg += load
+    return routes
+
+
+def _plan_zone(item):
+    zone_id, stops, vehicles, cache_root = item
+    if cache_root is None or not vehicles or not vehicles[0].has_depot:
+        return zone_id, plan_fleet(stops, vehicles)
+    nodes = [vehicles[0].depot_stop(), *stops]
+    matrix = DistanceMatrixStore(cache_root).ensure(f"zone_{zone_id}", nodes)
+    try:
+        return zone_id, plan_fleet(stops, vehicles, matrix.rows_for([s.stop_id for s in nodes]))
+    finally:
+        matrix.close()
+
+
+def plan_zones(problems: dict, max_workers: int | None = None, cache_root: str | None = None) -> dict:
+    """Solve ``{zone_id: (stops, vehicles)}`` concurrently in a process pool.
+
+    With ``cache_root`` each zone's distances come from its memory-mapped matrix in a
+    :class:`DistanceMatrixStore` there, which only computes the rows of stops it has not seen.
+    """
+    if not problems:
+        return {}
+    items = [(zone_id, stops, vehicles, cache_root) for zone_id, (stops, vehicles) in problems.items()]
+    if max_workers == 1 or len(items) == 1:
+        return dict(map(_plan_zone, items))
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx) as pool:
+        plans = dict(pool.map(_plan_zone, items, chunksize=max(1, len(items) // 32)))
+    logger.info("Planned %s zones", len(plans))
+    return plans
@@ -0,0 +1,189 @@
+"""Per-zone demand forecast (pickups and kg per weekday/slot) maintained incrementally."""
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import date
+
+logger = logging.getLogger(__name__)
+
+WATERMARK = "demand_forecast"
+
+
+def _weeks_between(earlier: str, later: str) -> int:
+    return max(0, (date.fromisoformat(later) - date.fromisoformat(earlier)).days // 7)
+
+
+def _weeks_missed(last: str, today: str) -> int:
+    """Weekly occurrences after ``last`` that are already over by ``today``."""
+    return max(0, ((date.fromisoformat(today) - date.fromisoformat(last)).days - 1) // 7)
+
+
+@dataclass
+class ForecastCell:
+    """EWMA over weekly observations of one (zone, weekday, slot).
+
+    Completed pickups for the most recent observed day accumulate in ``day_*`` and are folded into
+    the average once a later day is seen; weeks with no pickups decay the average as zero samples,
+    including the weeks since the last pickup when the cell is read.
+    """
+
+    ewma_count: float | None = None
+    ewma_kg: float | None = None
+    ewma_date: str | None = None
+    day_count: float = 0.0
+    day_kg: float = 0.0
+    day_date: str | None = None
+
+    def observe(self, day: str, kg: float, alpha: float):
+        if self.day_date is None or day == self.day_date:
+            self.day_date = day
+            self.day_count += 1
+            self.day_kg += kg
+        elif day > self.day_date:
+            self._fold(self.day_date, self.day_count, self.day_kg, alpha)
+            self.day_date, self.day_count, self.day_kg = day, 1.0, kg
+        elif self.ewma_date is not None and day <= self.ewma_date:
+            # A late completion for an already folded day adds its decayed weight.
+            weight = alpha * (1 - alpha) ** _weeks_between(day, self.ewma_date)
+            self.ewma_count += weight
+            self.ewma_kg += weight * kg
+        else:
+            self._fold(day, 1.0, kg, alpha)
+
+    def _fold(self, day: str, count: float, kg: float, alpha: float):
+        if self.ewma_date is None:
+            self.ewma_count, self.ewma_kg = count, kg
+        else:
+            decay = (1 - alpha) ** _weeks_between(self.ewma_date, day)
+            self.ewma_count = decay * self.ewma_count + alpha * count
+            self.ewma_kg = decay * self.ewma_kg + alpha * kg
+        self.ewma_date = day
+
+    def expected(self, alpha: float, today: str | None = None) -> tuple[float, float]:
+        if self.day_date is None:
+            count, kg = self.ewma_count or 0.0, self.ewma_kg or 0.0
+        elif self.ewma_date is None:
+            count, kg = self.day_count, self.day_kg
+        else:
+            decay = (1 - alpha) ** _weeks_between(self.ewma_date, self.day_date)
+            count, kg = decay * self.ewma_count + alpha * self.day_count, decay * self.ewma_kg + alpha * self.day_kg
+        last = self.day_date or self.ewma_date
+        if today is None or last is None:
+            return count, kg
+        idle = (1 - alpha) ** _weeks_missed(last, today)
+        return idle * count, idle * kg
+
+
+class DemandForecaster:
+    """Keeps per-zone/weekday/slot expectations in memory, persisted in ``demand_forecast``.
+
+    ``sync`` only reads COMPLETED status updates newer than the stored watermark, so restarts
+    and lookups never rescan history. It runs whenever a pickup is completed through ``db``;
+    completions committed by other connections are folded in on the next sync, or by ``fold`` from
+    a worker reading its own connection, which the next ``flush`` persists. Lookups decay each
+    cell for the weeks since its last pickup as of ``clock()``.
+    """
+
+    def __init__(self, db, alpha: float = 0.3, clock=date.today):
+        if not 0 < alpha <= 1:
+            raise ValueError("Forecast alpha must be in (0, 1].")
+        self.db = db
+        self.alpha = alpha
+        self.clock = clock
+        self.cells: dict[int, dict[int, dict[str, ForecastCell]]] = {}
+        self.watermark = 0
+        self.dirty: set[tuple[int, int, str]] = set()
+        self._lock = threading.RLock()
+        self._load()
+        db.add_pickup_listener(self._on_pickup)
+
+    def _load(self):
+        conn = self.db.conn
+        row = conn.execute("SELECT last_status_update_id FROM forecast_watermark WHERE name=?", (WATERMARK,)).fetchone()
+        self.watermark = row["last_status_update_id"] if row else 0
+        for r in conn.execute("SELECT * FROM demand_forecast"):
+            self.cells.setdefault(r["zone_id"], {}).setdefault(r["weekday"], {})[r["slot"]] = ForecastCell(
+                r["ewma_count"], r["ewma_kg"], r["ewma_date"], r["day_count"], r["day_kg"], r["day_date"]
+            )
+
+    def _cell(self, zone_id: int, weekday: int, slot: str) -> ForecastCell:
+        return self.cells.setdefault(zone_id, {}).setdefault(weekday, {}).setdefault(slot, ForecastCell())
+
+    @staticmethod
+    def _row(cell: ForecastCell) -> tuple:
+        return cell.ewma_count, cell.ewma_kg, cell.ewma_date, cell.day_count, cell.day_kg, cell.day_date
+
+    def _on_pickup(self, _pickup_id: int, status: str):
+        if status == "COMPLETED":
+            self.sync()
+
+    def pending(self, db=None) -> list:
+        """Completed status updates past the watermark, read through ``db`` (default: the app's own)."""
+        return (db or self.db).conn.execute(
+            """SELECT s.status_update_id,p.zone_id,p.requested_datetime,COALESCE(r.weight_kg,0) kg
+               FROM pickup_status_update s JOIN pickup_request p ON p.pickup_id=s.pickup_id
+               LEFT JOIN recycling_log r ON r.pickup_id=p.pickup_id
+               WHERE s.status_update_id > ? AND s.new_status='COMPLETED'
+               ORDER BY p.requested_datetime""",
+            (self.watermark,),
+        ).fetchall()
+
+    def fold(self, rows) -> int:
+        """Fold ``pending`` rows into memory only; safe off the Tk thread. ``flush`` persists them."""
+        with self._lock:
+            rows = [r for r in rows if r["status_update_id"] > self.watermark]
+            for r in rows:
+                day, slot = r["requested_datetime"][:10], r["requested_datetime"][11:16]
+                key = (r["zone_id"], date.fromisoformat(day).weekday(), slot)
+                self._cell(*key).observe(day, r["kg"], self.alpha)
+                self.dirty.add(key)
+            if rows:
+                self.watermark = max(r["status_update_id"] for r in rows)
+        return len(rows)
+
+    def flush(self):
+        """Persist the cells folded since the last flush together with the watermark."""
+        with self._lock:
+            if not self.dirty:
+                return
+            data = [(*key, *self._row(self.cells[key[0]][key[1]][key[2]])) for key in self.dirty]
+            watermark, self.dirty = self.watermark, set()
+        with self.db.transaction():
+            self.db.conn.executemany(
+                """INSERT OR REPLACE INTO demand_forecast(zone_id,weekday,slot,ewma_count,ewma_kg,ewma_date,day_count,day_kg,day_date)
+                   VALUES(?,?,?,?,?,?,?,?,?)""",
+                data,
+            )
+            self.db.conn.execute(
+                "INSERT OR REPLACE INTO forecast_watermark(name,last_status_update_id) VALUES(?,?)",
+                (WATERMARK, watermark),
+            )
+
+    def sync(self) -> int:
+        """Fold in pickups completed since the last sync and persist the touched cells."""
+        count = self.fold(self.pending())
+        self.flush()
+        if count:
+            logger.info("Demand forecast folded %s completed pickups", count)
+        return count
+
+    def expected(self, zone_id: int, day: date, slot: str) -> tuple[float, float]:
+        with self._lock:
+            cell = self.cells.get(zone_id, {}).get(day.weekday(), {}).get(slot)
+            return cell.expected(self.alpha, self.clock().isoformat()) if cell else (0.0, 0.0)
+
+    def expected_day(self, zone_id: int, day: date) -> dict[str, tuple[float, float]]:
+        today = self.clock().isoformat()
+        with self._lock:
+            slots = self.cells.get(zone_id, {}).get(day.weekday(), {})
+            return {slot: cell.expected(self.alpha, today) for slot, cell in sorted(slots.items())}
+
+    def expected_totals(self, day: date) -> dict[int, tuple[float, float]]:
+        totals = {}
+        with self._lock:
+            for zone_id in self.cells:
+                slots = self.expected_day(zone_id, day).values()
+                totals[zone_id] = (sum(c for c, _ in slots), sum(kg for _, kg in slots))
+        return totals
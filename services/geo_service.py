@@ -0,0 +1,163 @@
+"""Offline geocode import and an in-memory spatial index over open pickups."""
+from __future__ import annotations
+
+import argparse
+import csv
+import heapq
+import math
+
+from database.sqlite_service import SQLiteService
+from services.route_service import haversine_km
+
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LON = 111.320
+
+
+def import_geocode_csv(db, path: str) -> int:
+    """Import an ``address,latitude,longitude`` CSV and geocode residents from it."""
+    with open(path, newline="", encoding="utf-8") as fh:
+        count = db.import_geocodes((r["address"], r["latitude"], r["longitude"]) for r in csv.DictReader(fh))
+    db.geocode_residents()
+    return count
+
+
+class GridIndex:
+    """Uniform grid of ``cell_km`` squares on a local equirectangular projection."""
+
+    def __init__(self, cell_km: float = 0.5, ref_latitude: float = 3.14):
+        if cell_km <= 0:
+            raise ValueError("Grid cell size must be positive.")
+        self.cell_km = cell_km
+        self.lon_km = KM_PER_DEGREE_LON * math.cos(math.radians(ref_latitude))
+        self.cells: dict[tuple[int, int], dict] = {}
+        self.points: dict = {}
+
+    def __len__(self):
+        return len(self.points)
+
+    def __contains__(self, key):
+        return key in self.points
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lon * self.lon_km / self.cell_km), math.floor(lat * KM_PER_DEGREE_LAT / self.cell_km)
+
+    def insert(self, key, lat: float, lon: float):
+        self.remove(key)
+        cell = self._cell(lat, lon)
+        self.cells.setdefault(cell, {})[key] = (lat, lon)
+        self.points[key] = cell
+
+    def remove(self, key):
+        cell = self.points.pop(key, None)
+        if cell is None:
+            return
+        bucket = self.cells[cell]
+        del bucket[key]
+        if not bucket:
+            del self.cells[cell]
+
+    def location(self, key) -> tuple[float, float] | None:
+        cell = self.points.get(key)
+        return None if cell is None else self.cells[cell][key]
+
+    def _ring(self, center: tuple[int, int], r: int):
+        cx, cy = center
+        if r == 0:
+            yield center
+            return
+        for dx in range(-r, r + 1):
+            yield cx + dx, cy - r
+            yield cx + dx, cy + r
+        for dy in range(-r + 1, r):
+            yield cx - r, cy + dy
+            yield cx + r, cy + dy
+
+    def radius(self, lat: float, lon: float, km: float) -> list[tuple[float, object]]:
+        """``(distance_km, key)`` pairs within ``km``, nearest first."""
+        cx, cy = self._cell(lat, lon)
+        reach = math.ceil(km / self.cell_km)
+        found = []
+        for x in range(cx - reach, cx + reach + 1):
+            for y in range(cy - reach, cy + reach + 1):
+                for key, (plat, plon) in self.cells.get((x, y), {}).items():
+                    d = haversine_km(lat, lon, plat, plon)
+                    if d <= km:
+                        found.append((d, key))
+        found.sort(key=lambda item: item[0])
+        return found
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> list[tuple[float, object]]:
+        """The ``k`` closest ``(distance_km, key)`` pairs, searching outward ring by ring."""
+        if k <= 0 or not self.cells:
+            return []
+        center = self._cell(lat, lon)
+        max_ring = max(max(abs(x - center[0]), abs(y - center[1])) for x, y in self.cells)
+        best: list[tuple[float, int, object]] = []
+        seen = 0
+        for r in range(max_ring + 1):
+            for cell in self._ring(center, r):
+                for key, (plat, plon) in self.cells.get(cell, {}).items():
+                    seen += 1
+                    entry = (-haversine_km(lat, lon, plat, plon), seen, key)
+                    if len(best) < k:
+                        heapq.heappush(best, entry)
+                    elif entry > best[0]:
+                        heapq.heapreplace(best, entry)
+            # Anything in ring r+1 is at least r cells away from the query point.
+            if len(best) == k and -best[0][0] <= r * self.cell_km:
+                break
+        return sorted((-d, key) for d, _tie, key in best)
+
+    def nearest_among(self, lat: float, lon: float, keys) -> tuple[float, object] | None:
+        """The closest ``(distance_km, key)`` whose key is in ``keys``, widening ``k`` until one turns up."""
+        k = 8
+        while True:
+            for d, key in self.nearest(lat, lon, k):
+                if key in keys:
+                    return d, key
+            if k >= len(self):
+                return None
+            k *= 2
+
+
+class OpenPickupIndex(GridIndex):
+    """Open pickups located at their resident's coordinates, kept current via pickup listeners."""
+
+    def __init__(self, db, cell_km: float = 0.5, ref_latitude: float = 3.14):
+        super().__init__(cell_km, ref_latitude)
+        self.db = db
+        placeholders = ",".join("?" * len(db.OPEN_STATUSES))
+        for row in db.conn.execute(
+            f"""SELECT p.pickup_id,u.latitude,u.longitude FROM pickup_request p JOIN users u ON u.user_login_id=p.resident_id
+                WHERE p.current_status IN ({placeholders}) AND u.latitude IS NOT NULL""",
+            db.OPEN_STATUSES,
+        ):
+            self.insert(row["pickup_id"], row["latitude"], row["longitude"])
+        db.add_pickup_listener(self._on_pickup)
+
+    def _on_pickup(self, pickup_id: int, status: str):
+        if status not in self.db.OPEN_STATUSES:
+            self.remove(pickup_id)
+            return
+        row = self.db.conn.execute(
+            "SELECT u.latitude,u.longitude FROM pickup_request p JOIN users u ON u.user_login_id=p.resident_id WHERE p.pickup_id=?",
+            (pickup_id,),
+        ).fetchone()
+        if row and row["latitude"] is not None:
+            self.insert(pickup_id, row["latitude"], row["longitude"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import offline geocodes (address,latitude,longitude CSV).")
+    parser.add_argument("csv_path")
+    parser.add_argument("--db", default="db/prototype.db")
+    args = parser.parse_args(argv)
+    db = SQLiteService(args.db)
+    try:
+        print(f"Imported {import_geocode_csv(db, args.csv_path)} geocodes")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
-"""Dictionary-based runtime translations for UI labels."""
+"""Dictionary-based runtime translations for UI labels and stored notification templates."""
+import json
+from functools import lru_cache
+from string import Formatter
+
+from database.sqlite_service import register_sql_function
 
 TEXTS = {
     "en": {
@@ -62,6 +67,14 @@ TEXTS = {
         "error_password_match": "Confirm Password must match Password.",
         "error_required": "{field} is required.",
         "error_duplicate_user": "User ID or email already exists.",
+        "note_pickup_submitted_title": "Pickup submitted",
+        "note_pickup_submitted": "Pickup request #{pickup_id} submitted.",
+        "note_pickup_status_title": "Pickup status updated",
+        "note_pickup_status": "Pickup #{pickup_id} status updated to {status}.{trail}",
+        "note_collector_update_title": "Collector update",
+        "note_collector_update": "Pickup #{pickup_id} status updated to {status}.{trail}",
+        "note_pickup_reminder_title": "Pickup reminder",
+        "note_pickup_reminder": "Pickup #{pickup_id} is scheduled for {requested}.",
     },
     "ms": {
         "app_name": "Sistem Kutipan & Kitar Semula Sisa Pintar",
@@ -124,9 +137,52 @@ TEXTS = {
         "error_password_match": "Sahkan Kata Laluan mesti sama.",
         "error_required": "{field} diperlukan.",
         "error_duplicate_user": "ID Pengguna atau e-mel sudah wujud.",
+        "note_pickup_submitted_title": "Kutipan dihantar",
+        "note_pickup_submitted": "Permintaan kutipan #{pickup_id} telah dihantar.",
+        "note_pickup_status_title": "Status kutipan dikemas kini",
+        "note_pickup_status": "Status kutipan #{pickup_id} dikemas kini kepada {status}.{trail}",
+        "note_collector_update_title": "Kemas kini pengutip",
+        "note_collector_update": "Status kutipan #{pickup_id} dikemas kini kepada {status}.{trail}",
+        "note_pickup_reminder_title": "Peringatan kutipan",
+        "note_pickup_reminder": "Kutipan #{pickup_id} dijadualkan pada {requested}.",
     },
 }
 
 
 def t(language: str, key: str) -> str:
     return TEXTS.get(language, TEXTS["en"]).get(key, key)
+
+
+@lru_cache(maxsize=None)
+def compile_template(language: str, key: str) -> tuple:
+    """``(literal, field, format_spec)`` parts of a catalog template, parsed once per language."""
+    return tuple(Formatter().parse(t(language, key)))
+
+
+def render(language: str, key: str, params: dict) -> str:
+    """Fill a catalog template; a field missing from ``params`` renders as empty text."""
+    out = []
+    for literal, field, spec, _conversion in compile_template(language, key):
+        out.append(literal)
+        if field is not None and params.get(field) is not None:
+            out.append(format(params[field], spec or ""))
+    return "".join(out)
+
+
+def notification_text(language: str, part: str, template_key: str | None, params: str | None, status_trail: str | None, stored: str) -> str:
+    """Title or message (``part``) of a notification row; rows without a template keep their stored text."""
+    if not template_key:
+        return stored
+    values = json.loads(params) if params else {}
+    trail = status_trail.split(",") if status_trail else []
+    values["trail"] = f" ({' -> '.join(trail)})" if len(trail) > 1 else ""
+    return render(language, f"note_{template_key}_title" if part == "title" else f"note_{template_key}", values)
+
+
+def register_notification_text(conn):
+    """Expose ``note_text(language, part, template_key, params, status_trail, stored)`` to SQL on ``conn``."""
+    conn.create_function("note_text", 6, notification_text, deterministic=True)
+
+
+# Replace SQLiteService's stored-text fallback, so the data layer never imports this module.
+register_sql_function("note_text", 6, notification_text)
@@ -0,0 +1,209 @@
+"""Background delivery of queued notification emails from ``notification_outbox``."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import smtplib
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from email.message import EmailMessage
+
+from database.sqlite_service import touch_tables
+from services.i18n_service import register_notification_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SENDER = "no-reply@smartwaste.local"
+
+
+@dataclass
+class OutboxMessage:
+    outbox_id: int
+    recipient: str
+    subject: str
+    body: str
+
+
+class SmtpChannel:
+    """Sends a batch over one SMTP connection.
+
+    A message the server rejects fails on its own. If the connection itself breaks, the message
+    being sent and the rest of the batch fail, while those already accepted stay delivered.
+    """
+
+    # Rejections of one message; the connection is still usable after them.
+    MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+    def __init__(self, host: str, port: int = 25, sender: str = DEFAULT_SENDER, username: str = "", password: str = "", starttls: bool = False, timeout: float = 30):
+        self.host, self.port, self.sender = host, port, sender
+        self.username, self.password, self.starttls, self.timeout = username, password, starttls, timeout
+
+    def send(self, messages: list[OutboxMessage]) -> dict[int, str]:
+        failures = {}
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            for pos, msg in enumerate(messages):
+                email = EmailMessage()
+                email["From"], email["To"], email["Subject"] = self.sender, msg.recipient, msg.subject
+                email.set_content(msg.body)
+                try:
+                    smtp.send_message(email)
+                except self.MESSAGE_ERRORS as exc:
+                    failures[msg.outbox_id] = str(exc)
+                except (smtplib.SMTPException, OSError) as exc:
+                    logger.warning("SMTP connection lost after %s of %s messages: %s", pos, len(messages), exc)
+                    failures.update((m.outbox_id, str(exc)) for m in messages[pos:])
+                    break
+        finally:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                smtp.close()
+        return failures
+
+
+class FileChannel:
+    """Local stand-in for SMTP: appends each message as a JSON line to ``path``."""
+
+    def __init__(self, path: str = "logs/outbox_mail.jsonl"):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def send(self, messages: list[OutboxMessage]) -> dict[int, str]:
+        with open(self.path, "a", encoding="utf-8") as fh:
+            for msg in messages:
+                fh.write(json.dumps({"to": msg.recipient, "subject": msg.subject, "body": msg.body, "at": datetime.now().isoformat(timespec="seconds")}) + "\n")
+        return {}
+
+
+class OutboxDispatcher:
+    """Drains due outbox rows in batches on a daemon thread with its own connection.
+
+    ``channels`` maps an outbox ``channel`` name to an object with ``send(messages)`` returning
+    ``{outbox_id: error}`` for messages that failed. A failed row is retried after
+    ``base_delay_s * 2 ** (attempts - 1)`` seconds and marked FAILED after ``max_attempts``.
+    """
+
+    def __init__(self, db_path: str, channels: dict, batch_size: int = 50, poll_interval_s: float = 5.0, max_attempts: int = 5, base_delay_s: float = 30.0):
+        self.db_path = db_path
+        self.channels = channels
+        self.batch_size = batch_size
+        self.poll_interval_s = poll_interval_s
+        self.max_attempts = max_attempts
+        self.base_delay_s = base_delay_s
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        register_notification_text(conn)
+        return conn
+
+    def drain_once(self, conn: sqlite3.Connection | None = None) -> tuple[int, int]:
+        """Deliver one batch per channel; returns ``(sent, failed)``."""
+        own = conn is None
+        conn = conn or self._connect()
+        sent = failed = 0
+        try:
+            for name, channel in self.channels.items():
+                rows = conn.execute(
+                    """SELECT o.outbox_id,o.recipient,o.attempts,
+                              note_text(COALESCE(u.language,'en'),'title',n.template_key,n.params,n.status_trail,n.title) AS title,
+                              note_text(COALESCE(u.language,'en'),'message',n.template_key,n.params,n.status_trail,n.message) AS message
+                       FROM notification_outbox o
+                       JOIN notification n ON n.notification_id=o.notification_id
+                       LEFT JOIN users u ON u.user_login_id=n.user_id
+                       WHERE o.status='PENDING' AND o.next_attempt_at<=CURRENT_TIMESTAMP AND o.channel=?
+                       ORDER BY o.next_attempt_at,o.outbox_id LIMIT ?""",
+                    (name, self.batch_size),
+                ).fetchall()
+                if not rows:
+                    continue
+                messages = [OutboxMessage(r["outbox_id"], r["recipient"], r["title"], r["message"]) for r in rows]
+                try:
+                    failures = channel.send(messages)
+                except Exception as exc:
+                    logger.warning("Outbox channel %s failed for %s messages: %s", name, len(messages), exc)
+                    failures = {m.outbox_id: str(exc) for m in messages}
+                self._record(conn, rows, failures)
+                sent += len(rows) - len(failures)
+                failed += len(failures)
+        finally:
+            if own:
+                conn.close()
+        return sent, failed
+
+    def _record(self, conn: sqlite3.Connection, rows, failures: dict[int, str]):
+        delivered = [(r["outbox_id"],) for r in rows if r["outbox_id"] not in failures]
+        retries = []
+        for r in rows:
+            if r["outbox_id"] in failures:
+                attempts = r["attempts"] + 1
+                status = "FAILED" if attempts >= self.max_attempts else "PENDING"
+                delay = f"+{int(self.base_delay_s * 2 ** (attempts - 1))} seconds"
+                retries.append((status, attempts, delay, failures[r["outbox_id"]][:500], r["outbox_id"]))
+        with conn:
+            conn.executemany("UPDATE notification_outbox SET status='SENT',attempts=attempts+1,sent_at=CURRENT_TIMESTAMP WHERE outbox_id=?", delivered)
+            conn.executemany(
+                "UPDATE notification_outbox SET status=?,attempts=?,next_attempt_at=datetime('now',?),last_error=? WHERE outbox_id=?",
+                retries,
+            )
+            touch_tables(conn, "notification_outbox")
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while not self._stop.is_set():
+                try:
+                    sent, failed = self.drain_once(conn)
+                except sqlite3.Error:
+                    logger.exception("Outbox dispatch failed")
+                    sent = failed = 0
+                # A full batch means more may be waiting; otherwise sleep until woken or the next poll.
+                if sent + failed < self.batch_size:
+                    self._wake.wait(self.poll_interval_s)
+                    self._wake.clear()
+        finally:
+            conn.close()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """Deliver now instead of waiting for the next poll, e.g. after a notification is written."""
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def channels_from_env() -> dict:
+    """SMTP when ``SMTP_HOST`` is set, otherwise the local file stand-in."""
+    host = os.environ.get("SMTP_HOST")
+    if not host:
+        return {"email": FileChannel()}
+    return {
+        "email": SmtpChannel(
+            host,
+            int(os.environ.get("SMTP_PORT", "25")),
+            os.environ.get("SMTP_SENDER", DEFAULT_SENDER),
+            os.environ.get("SMTP_USERNAME", ""),
+            os.environ.get("SMTP_PASSWORD", ""),
+            os.environ.get("SMTP_STARTTLS", "") == "1",
+        )
+    }
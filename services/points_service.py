@@ -0,0 +1,86 @@
+"""Set-based recomputation of reward points after multiplier changes."""
+from __future__ import annotations
+
+import logging
+
+from database.sqlite_service import POINTS_SQL
+
+logger = logging.getLogger(__name__)
+
+RANGE_SQL = "p.requested_datetime >= ? AND p.requested_datetime < date(?, '+1 day')"
+
+
+def _resident_chunks(conn, date_from: str, date_to: str, chunk_size: int):
+    """Yield ``(first, last)`` resident id bounds covering the range in keyset-paginated chunks."""
+    last = ""
+    while True:
+        ids = [
+            r[0]
+            for r in conn.execute(
+                f"SELECT DISTINCT p.resident_id FROM pickup_request p WHERE {RANGE_SQL} AND p.resident_id > ? ORDER BY p.resident_id LIMIT ?",
+                (date_from, date_to, last, chunk_size),
+            )
+        ]
+        if not ids:
+            return
+        yield ids[0], ids[-1]
+        last = ids[-1]
+
+
+def recompute_points(db, date_from: str, date_to: str, dry_run: bool = True, chunk_size: int = 500) -> dict:
+    """Re-derive points for pickups requested between ``date_from`` and ``date_to`` (inclusive).
+
+    ``pickup_request.points_awarded``, ``recycling_log.points_added`` and ``users.total_points``
+    are rewritten with a handful of statements per chunk of residents, each chunk in its own
+    short transaction. With ``dry_run`` nothing is written and only the per-user deltas are returned.
+    """
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be positive.")
+    conn = db.conn
+    conn.execute(
+        """CREATE TEMP TABLE IF NOT EXISTS points_recalc (
+               pickup_id INTEGER PRIMARY KEY,
+               resident_id TEXT NOT NULL,
+               old_points INTEGER NOT NULL,
+               new_points INTEGER NOT NULL
+           )"""
+    )
+    deltas, changed = {}, 0
+    touched = () if dry_run else ("users", "pickup_request", "recycling_log")
+    for first, last in _resident_chunks(conn, date_from, date_to, chunk_size):
+        with db.transaction(*touched):
+            conn.execute("DELETE FROM points_recalc")
+            conn.execute(
+                f"""INSERT INTO points_recalc(pickup_id,resident_id,old_points,new_points)
+                    SELECT pickup_id,resident_id,old_points,new_points FROM (
+                        SELECT p.pickup_id,p.resident_id,p.points_awarded old_points,r.points_added log_points,
+                               CASE WHEN p.current_status='COMPLETED' THEN COALESCE({POINTS_SQL},0) ELSE 0 END new_points
+                        FROM pickup_request p LEFT JOIN recycling_log r ON r.pickup_id=p.pickup_id
+                        WHERE {RANGE_SQL} AND p.resident_id BETWEEN ? AND ?
+                    ) WHERE new_points != old_points OR COALESCE(log_points,new_points) != new_points""",
+                (date_from, date_to, first, last),
+            )
+            changed += conn.execute("SELECT COUNT(*) FROM points_recalc").fetchone()[0]
+            for row in conn.execute(
+                "SELECT resident_id,SUM(new_points-old_points) delta FROM points_recalc GROUP BY resident_id HAVING delta != 0"
+            ):
+                deltas[row["resident_id"]] = row["delta"]
+            if dry_run:
+                continue
+            conn.execute(
+                """UPDATE users SET total_points=total_points+(
+                       SELECT SUM(t.new_points-t.old_points) FROM points_recalc t WHERE t.resident_id=users.user_login_id)
+                   WHERE user_login_id IN (SELECT resident_id FROM points_recalc)"""
+            )
+            conn.execute(
+                """UPDATE pickup_request SET points_awarded=(
+                       SELECT t.new_points FROM points_recalc t WHERE t.pickup_id=pickup_request.pickup_id)
+                   WHERE pickup_id IN (SELECT pickup_id FROM points_recalc)"""
+            )
+            conn.execute(
+                """UPDATE recycling_log SET points_added=(
+                       SELECT t.new_points FROM points_recalc t WHERE t.pickup_id=recycling_log.pickup_id)
+                   WHERE pickup_id IN (SELECT pickup_id FROM points_recalc)"""
+            )
+    logger.info("Points recompute %s..%s: %s pickups changed, %s users affected, dry_run=%s", date_from, date_to, changed, len(deltas), dry_run)
+    return {"pickups": changed, "deltas": deltas, "applied": not dry_run}
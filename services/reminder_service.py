@@ -0,0 +1,98 @@
+"""Pickup reminders from an in-memory heap of upcoming pickups instead of periodic full scans."""
+from __future__ import annotations
+
+import heapq
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M"
+
+
+class ReminderScheduler:
+    """Sends a ``PICKUP_REMINDER`` ``lead_minutes`` before each open pickup's requested time.
+
+    Only pickups whose reminder falls within the next ``window_hours`` are loaded, through the
+    ``idx_pickup_reminder_due`` index, into a heap of ``(remind_at, pickup_id)``; the next window is
+    loaded when the current one runs low. Pickup listener events keep the heap current: a cancelled
+    or finished pickup's entry is dropped lazily and a rescheduled one is pushed again. Sent
+    reminders are recorded in ``pickup_request.reminder_sent_at``, so a restart never repeats them.
+    Call :meth:`tick` periodically (``seconds_until_next`` says when); due reminders go out in
+    batches of at most ``batch_size``.
+    """
+
+    def __init__(self, db, lead_minutes: float = 120, window_hours: float = 6, batch_size: int = 500, clock=datetime.now):
+        self.db = db
+        self.lead = timedelta(minutes=lead_minutes)
+        self.window = timedelta(hours=window_hours)
+        self.batch_size = batch_size
+        self.clock = clock
+        self.heap: list[tuple[datetime, int]] = []
+        self.due: dict[int, datetime] = {}
+        self.horizon: datetime | None = None
+        db.add_pickup_listener(self._on_pickup)
+        self._load(self.clock() + self.window)
+
+    def _push(self, pickup_id: int, requested: str):
+        try:
+            remind_at = datetime.strptime(requested, DATETIME_FORMAT) - self.lead
+        except ValueError:
+            logger.warning("Pickup %s has an unreadable requested time %r", pickup_id, requested)
+            return
+        if self.due.get(pickup_id) != remind_at:
+            self.due[pickup_id] = remind_at
+            heapq.heappush(self.heap, (remind_at, pickup_id))
+
+    def _load(self, until: datetime):
+        # Past pickups get no reminder; pickups up to the old horizon are already in the heap.
+        now = self.clock()
+        start = now if self.horizon is None else max(now, self.horizon + self.lead)
+        rows = self.db.list_reminder_candidates(start.strftime(DATETIME_FORMAT), (until + self.lead).strftime(DATETIME_FORMAT))
+        for row in rows:
+            self._push(row["pickup_id"], row["requested_datetime"])
+        self.horizon = until
+        logger.debug("Loaded %s upcoming reminders up to %s", len(rows), until)
+
+    def _on_pickup(self, pickup_id: int, status: str):
+        if status not in ("PENDING", "ACCEPTED"):
+            self.due.pop(pickup_id, None)
+            return
+        # A new or rescheduled pickup: re-read its requested time; stale heap entries are skipped on pop.
+        self.due.pop(pickup_id, None)
+        rows = self.db.list_reminder_candidates(
+            self.clock().strftime(DATETIME_FORMAT), (self.horizon + self.lead).strftime(DATETIME_FORMAT), pickup_id
+        )
+        for row in rows:
+            self._push(row["pickup_id"], row["requested_datetime"])
+
+    def tick(self) -> int:
+        """Send every reminder that is due now; returns how many were sent."""
+        now = self.clock()
+        if now + self.window / 2 >= self.horizon:
+            self._load(now + self.window)
+        sent = 0
+        batch = []
+        while self.heap and self.heap[0][0] <= now:
+            remind_at, pickup_id = heapq.heappop(self.heap)
+            if self.due.get(pickup_id) != remind_at:
+                continue
+            del self.due[pickup_id]
+            batch.append(pickup_id)
+            if len(batch) >= self.batch_size:
+                sent += self.db.send_pickup_reminders(batch)
+                batch = []
+        sent += self.db.send_pickup_reminders(batch)
+        if sent:
+            logger.info("Sent %s pickup reminders", sent)
+        return sent
+
+    def seconds_until_next(self) -> float:
+        """Seconds until the next reminder or window load, whichever comes first."""
+        now = self.clock()
+        while self.heap and self.due.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        next_at = self.horizon - self.window / 2
+        if self.heap:
+            next_at = min(next_at, self.heap[0][0])
+        return max(0.0, (next_at - now).total_seconds())
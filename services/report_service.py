@@ -0,0 +1,171 @@
+"""Monthly per-zone reports generated in parallel worker processes."""
+from __future__ import annotations
+
+import csv
+import html
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from pathlib import Path
+
+from services.export_service import connect_read_only
+
+logger = logging.getLogger(__name__)
+
+TOP_RESIDENTS = 10
+
+
+def month_bounds(month: str) -> tuple[str, str]:
+    """Return ``[start, end)`` date strings for a ``YYYY-MM`` month."""
+    try:
+        year, mon = (int(part) for part in month.split("-"))
+        start = date(year, mon, 1)
+    except ValueError as exc:
+        raise ValueError("Month must use YYYY-MM format.") from exc
+    end = date(year + 1, 1, 1) if mon == 12 else date(year, mon + 1, 1)
+    return start.isoformat(), end.isoformat()
+
+
+def report_paths(out_dir: str, month: str, zone_id: int) -> tuple[Path, Path]:
+    base = Path(out_dir) / month
+    return base / f"zone_{zone_id}.html", base / f"zone_{zone_id}.csv"
+
+
+def collect_zone_report(conn, zone_id: int, month: str) -> dict:
+    start, end = month_bounds(month)
+    params = (zone_id, start, end)
+    in_month = "p.zone_id=? AND p.requested_datetime >= ? AND p.requested_datetime < ?"
+    zone = conn.execute("SELECT name FROM zone WHERE zone_id=?", (zone_id,)).fetchone()
+    return {
+        "zone_id": zone_id,
+        "zone": zone["name"] if zone else f"Zone {zone_id}",
+        "month": month,
+        "by_status": [
+            (r["current_status"], r["c"])
+            for r in conn.execute(
+                f"SELECT p.current_status,COUNT(*) c FROM pickup_request p WHERE {in_month} GROUP BY p.current_status ORDER BY c DESC",
+                params,
+            )
+        ],
+        "failure_reasons": [
+            (r["reason"], r["c"])
+            for r in conn.execute(
+                f"""SELECT COALESCE(NULLIF(TRIM(s.comment),''),'(no reason)') reason,COUNT(*) c
+                    FROM pickup_status_update s JOIN pickup_request p ON p.pickup_id=s.pickup_id
+                    WHERE s.new_status='FAILED' AND {in_month} GROUP BY reason ORDER BY c DESC""",
+                params,
+            )
+        ],
+        "kg_by_category": [
+            (r["category"], round(r["kg"], 2))
+            for r in conn.execute(
+                f"""SELECT r.category,SUM(r.weight_kg) kg FROM recycling_log r JOIN pickup_request p ON p.pickup_id=r.pickup_id
+                    WHERE p.current_status='COMPLETED' AND {in_month} GROUP BY r.category ORDER BY kg DESC""",
+                params,
+            )
+        ],
+        "top_residents": [
+            (r["resident_id"], r["points"])
+            for r in conn.execute(
+                f"""SELECT p.resident_id,SUM(p.points_awarded) points FROM pickup_request p
+                    WHERE {in_month} GROUP BY p.resident_id HAVING points > 0 ORDER BY points DESC,p.resident_id LIMIT {TOP_RESIDENTS}""",
+                params,
+            )
+        ],
+    }
+
+
+SECTIONS = (
+    ("by_status", "Pickups by status", ("Status", "Pickups")),
+    ("failure_reasons", "Failure reasons", ("Reason", "Count")),
+    ("kg_by_category", "Recycled weight by category", ("Category", "Kg")),
+    ("top_residents", "Top residents by points", ("Resident", "Points")),
+)
+
+
+def render_html(report: dict) -> str:
+    title = html.escape(f"{report['zone']} - {report['month']}")
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>",
+        f"<title>{title}</title>",
+        "<style>body{font-family:Segoe UI,Arial,sans-serif;margin:24px}table{border-collapse:collapse;margin-bottom:18px}"
+        "th,td{border:1px solid #D7D7D7;padding:4px 10px;text-align:left}th{background:#F6F7FB}</style>",
+        f"</head><body><h1>{title}</h1>",
+    ]
+    for key, heading, (left, right) in SECTIONS:
+        parts.append(f"<h2>{heading}</h2><table><tr><th>{left}</th><th>{right}</th></tr>")
+        rows = report[key] or [("-", 0)]
+        parts.extend(f"<tr><td>{html.escape(str(a))}</td><td>{b}</td></tr>" for a, b in rows)
+        parts.append("</table>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def _write_atomic(path: Path, writer) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8", newline="") as fh:
+        writer(fh)
+    os.replace(tmp, path)
+
+
+def write_zone_report(db_path: str, zone_id: int, month: str, out_dir: str) -> int:
+    """Worker entrypoint: build one zone's report on its own read-only connection."""
+    conn = connect_read_only(db_path)
+    try:
+        report = collect_zone_report(conn, zone_id, month)
+    finally:
+        conn.close()
+    html_path, csv_path = report_paths(out_dir, month, zone_id)
+    html_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _csv(fh):
+        out = csv.writer(fh)
+        out.writerow(["section", "key", "value"])
+        for key, _heading, _cols in SECTIONS:
+            out.writerows((key, a, b) for a, b in report[key])
+
+    _write_atomic(csv_path, _csv)
+    # The HTML file is written last so its presence marks the zone as finished for resume.
+    _write_atomic(html_path, lambda fh: fh.write(render_html(report)))
+    return zone_id
+
+
+def generate_monthly_reports(db_path: str, month: str, out_dir: str = "reports", zone_ids=None, max_workers=None, progress=None) -> dict:
+    """Fan out one report job per zone to a process pool.
+
+    Zones whose report files already exist are skipped, so an interrupted run resumes where it
+    stopped. ``progress`` is called with ``(done, total)`` as zones finish.
+    """
+    month_bounds(month)
+    if zone_ids is None:
+        conn = connect_read_only(db_path)
+        try:
+            zone_ids = [r["zone_id"] for r in conn.execute("SELECT zone_id FROM zone WHERE is_active=1 ORDER BY zone_id")]
+        finally:
+            conn.close()
+    pending, skipped = [], []
+    for zone_id in zone_ids:
+        html_path, csv_path = report_paths(out_dir, month, zone_id)
+        (skipped if html_path.exists() and csv_path.exists() else pending).append(zone_id)
+
+    total = len(zone_ids)
+    done, failed = len(skipped), []
+    if progress:
+        progress(done, total)
+    if pending:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx) as pool:
+            futures = {pool.submit(write_zone_report, db_path, zone_id, month, out_dir): zone_id for zone_id in pending}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception:
+                    logger.exception("Report for zone %s failed", futures[future])
+                    failed.append(futures[future])
+                done += 1
+                if progress:
+                    progress(done, total)
+    logger.info("Monthly reports %s: %s generated, %s resumed, %s failed", month, len(pending) - len(failed), len(skipped), len(failed))
+    return {"generated": [z for z in pending if z not in failed], "skipped": skipped, "failed": failed}
@@ -0,0 +1,208 @@
+"""Incremental route repair: cheapest insertion / splice-out instead of re-solving on every change."""
+from __future__ import annotations
+
+import logging
+import math
+import threading
+
+from services.route_service import DEPOT_ID, RouteStop, Vehicle, compute_optimal_path, haversine_km, slot_window
+
+logger = logging.getLogger(__name__)
+
+
+def _km(a: RouteStop, b: RouteStop) -> float:
+    return haversine_km(a.latitude, a.longitude, b.latitude, b.longitude)
+
+
+class IncrementalRoute:
+    """A planned visiting order kept in memory and repaired in O(n) per change.
+
+    ``drift`` is the share of stops added or removed since the last full optimization; when it
+    exceeds ``drift_threshold`` the route is re-optimized (on a background thread unless
+    ``background`` is False) and changes made meanwhile are replayed onto the new order.
+    ``on_change(route)`` receives the updated route, with depot returns, after every change; after
+    a background re-optimization it is called from that worker thread. With ``optimized`` the
+    stops are taken as an already planned order instead of being optimized first.
+    """
+
+    def __init__(
+        self, stops: list[RouteStop], vehicle: Vehicle, drift_threshold: float = 0.2, on_change=None, background: bool = True, optimized: bool = False
+    ):
+        self.vehicle = vehicle
+        self.drift_threshold = drift_threshold
+        self.on_change = on_change
+        self.background = background
+        self.order: list[RouteStop] = []
+        self.changes = 0
+        self._log: list[tuple[str, RouteStop | str]] = []
+        self._optimizing = False
+        self._lock = threading.RLock()
+        stops = [stop for stop in stops if stop.stop_id != DEPOT_ID]
+        self.order = stops if optimized else self._optimized(stops)
+
+    def _optimized(self, stops: list[RouteStop]) -> list[RouteStop]:
+        unbounded = Vehicle(self.vehicle.vehicle_id, math.inf, self.vehicle.depot_latitude, self.vehicle.depot_longitude)
+        return compute_optimal_path(stops, unbounded)
+
+    @property
+    def drift(self) -> float:
+        return self.changes / max(1, len(self.order))
+
+    def _ends(self):
+        return self.vehicle.depot_stop() if self.vehicle.has_depot else None
+
+    def _insert(self, stop: RouteStop):
+        depot = self._ends()
+        order = self.order
+        best_cost, best_pos = math.inf, len(order)
+        for pos in range(len(order) + 1):
+            left = order[pos - 1] if pos > 0 else depot
+            right = order[pos] if pos < len(order) else depot
+            if left is None and right is None:
+                cost = 0.0
+            elif left is None:
+                cost = _km(stop, right)
+            elif right is None:
+                cost = _km(left, stop)
+            else:
+                cost = _km(left, stop) + _km(stop, right) - _km(left, right)
+            if cost < best_cost:
+                best_cost, best_pos = cost, pos
+        order.insert(best_pos, stop)
+
+    def _remove(self, stop_id: str) -> bool:
+        for pos, stop in enumerate(self.order):
+            if stop.stop_id == stop_id:
+                del self.order[pos]
+                return True
+        return False
+
+    def __contains__(self, stop_id: str) -> bool:
+        return any(stop.stop_id == stop_id for stop in self.order)
+
+    def add(self, stop: RouteStop):
+        with self._lock:
+            if stop.stop_id in self:
+                return
+            self._insert(stop)
+            self._changed(("add", stop))
+
+    def remove(self, stop_id: str):
+        with self._lock:
+            if self._remove(stop_id):
+                self._changed(("remove", stop_id))
+
+    def _changed(self, change):
+        self.changes += 1
+        if self._optimizing:
+            self._log.append(change)
+        self._publish()
+        if self.drift > self.drift_threshold and not self._optimizing:
+            self.reoptimize()
+
+    def reoptimize(self):
+        with self._lock:
+            self._optimizing = True
+            self._log = []
+            snapshot = list(self.order)
+        if self.background:
+            threading.Thread(target=self._reoptimize, args=(snapshot,), daemon=True).start()
+        else:
+            self._reoptimize(snapshot)
+
+    def _reoptimize(self, snapshot: list[RouteStop]):
+        try:
+            order = self._optimized(snapshot)
+        except Exception:
+            logger.exception("Background route re-optimization failed")
+            with self._lock:
+                self._optimizing = False
+            return
+        with self._lock:
+            self.order = order
+            for kind, item in self._log:
+                if kind == "add":
+                    self._remove(item.stop_id)
+                    self._insert(item)
+                else:
+                    self._remove(item)
+            self.changes = len(self._log)
+            self._log = []
+            self._optimizing = False
+            self._publish()
+
+    def route(self) -> list[RouteStop]:
+        """Current order with a depot return wherever the next stop would exceed capacity."""
+        with self._lock:
+            order = list(self.order)
+        if not self.vehicle.has_depot:
+            return order
+        route, load = [], 0.0
+        for stop in order:
+            if route and load + stop.demand_kg > self.vehicle.capacity_kg:
+                route.append(self.vehicle.depot_stop())
+                load = 0.0
+            route.append(stop)
+            load += stop.demand_kg
+        return route
+
+    def _publish(self):
+        if self.on_change:
+            try:
+                self.on_change(self.route())
+            except Exception:
+                logger.exception("Route change callback failed")
+
+
+class RouteRepairService:
+    """Keeps one :class:`IncrementalRoute` per planned zone, or per collector within it, in step with pickup changes."""
+
+    def __init__(self, db, drift_threshold: float = 0.2, background: bool = True):
+        self.db = db
+        self.drift_threshold = drift_threshold
+        self.background = background
+        self.routes: dict[tuple[int, str | None], IncrementalRoute] = {}
+        db.add_pickup_listener(self._on_pickup)
+
+    def _stop_rows(self, where: str, params) -> list:
+        return self.db.conn.execute(
+            f"""SELECT p.pickup_id,p.zone_id,p.assigned_collector,p.requested_datetime,u.latitude,u.longitude,COALESCE(r.weight_kg,0) kg
+                FROM pickup_request p JOIN users u ON u.user_login_id=p.resident_id
+                LEFT JOIN recycling_log r ON r.pickup_id=p.pickup_id
+                WHERE u.latitude IS NOT NULL AND {where}""",
+            params,
+        ).fetchall()
+
+    @staticmethod
+    def _stop(row) -> RouteStop:
+        return RouteStop(str(row["pickup_id"]), row["latitude"], row["longitude"], row["kg"], *slot_window(row["requested_datetime"]))
+
+    def plan_zone(self, zone_id: int, vehicle: Vehicle, on_change=None, collector_id: str | None = None, route=None) -> IncrementalRoute:
+        """Track the open pickups of ``zone_id`` (only ``collector_id``'s if given), replacing any earlier plan.
+
+        ``route`` adopts an order already planned for those pickups instead of optimizing them here.
+        """
+        optimized = route is not None
+        if not optimized:
+            placeholders = ",".join("?" * len(self.db.OPEN_STATUSES))
+            mine = " AND p.assigned_collector=?" if collector_id else ""
+            rows = self._stop_rows(
+                f"p.zone_id=? AND p.current_status IN ({placeholders}){mine}", (zone_id, *self.db.OPEN_STATUSES, *([collector_id] if collector_id else []))
+            )
+            route = [self._stop(r) for r in rows]
+        plan = IncrementalRoute(route, vehicle, self.drift_threshold, on_change, self.background, optimized=optimized)
+        self.routes[(zone_id, collector_id)] = plan
+        return plan
+
+    def drop(self, zone_id: int, collector_id: str | None = None):
+        """Stop tracking a plan, e.g. when the view showing it closes."""
+        self.routes.pop((zone_id, collector_id), None)
+
+    def _on_pickup(self, pickup_id: int, status: str):
+        rows = self._stop_rows("p.pickup_id=?", (pickup_id,)) if status in self.db.OPEN_STATUSES else []
+        owners = {(rows[0]["zone_id"], None), (rows[0]["zone_id"], rows[0]["assigned_collector"])} if rows else set()
+        for key, plan in list(self.routes.items()):
+            if key in owners:
+                plan.add(self._stop(rows[0]))
+            else:
+                plan.remove(str(pickup_id))
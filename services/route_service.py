@@ -1,5 +1,31 @@
-"""Route optimization data structures and stubs for future API integration."""
+"""Offline route optimization for collector pickups (no external map API)."""
+from __future__ import annotations
+
+import bisect
+import heapq
+import math
+import multiprocessing
+import queue
+import random
+import time
 from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python matrix is used without it.
+    np = None
+
+EARTH_RADIUS_KM = 6371.0088
+DEPOT_ID = "DEPOT"
+NEIGHBOURS = 10
+WINDOW_PEERS = 8  # stops of the nearest closing windows tried as places for a moved stop
+EPSILON = 1e-9
+SLOT_MINUTES = 30
+DEFAULT_SPEED_KMH = 25.0
+DEFAULT_SERVICE_MINUTES = 5.0
+LATENESS_WEIGHT = 10.0  # km of extra driving worth one minute less lateness
+TIME_WINDOW_BUDGET_S = 5.0
 
 
 @dataclass
@@ -8,19 +34,658 @@ class RouteStop:
     latitude: float
     longitude: float
     demand_kg: float
+    window_start: datetime | None = None
+    window_end: datetime | None = None
+
+
+def slot_window(requested_datetime: str) -> tuple[datetime, datetime]:
+    """The 30-minute window of a pickup's ``requested_datetime`` slot."""
+    start = datetime.strptime(requested_datetime, "%Y-%m-%d %H:%M")
+    return start, start + timedelta(minutes=SLOT_MINUTES)
 
 
 @dataclass
 class Vehicle:
     vehicle_id: str
     capacity_kg: float
+    depot_latitude: float | None = None
+    depot_longitude: float | None = None
+
+    @property
+    def has_depot(self) -> bool:
+        return self.depot_latitude is not None and self.depot_longitude is not None
+
+    def depot_stop(self) -> RouteStop:
+        return RouteStop(DEPOT_ID, self.depot_latitude, self.depot_longitude, 0.0)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+def distance_matrix(points: list[tuple[float, float]]) -> list[list[float]]:
+    """Pairwise haversine distances in km for ``(lat, lon)`` points, as nested lists."""
+    if np is not None:
+        return distance_block(points, points).tolist()
+    n = len(points)
+    lats = [math.radians(p[0]) for p in points]
+    lons = [math.radians(p[1]) for p in points]
+    coss = [math.cos(x) for x in lats]
+    rows = [[0.0] * n for _ in range(n)]
+    sin, asin, sqrt = math.sin, math.asin, math.sqrt
+    for i in range(n):
+        lat_i, lon_i, cos_i, row_i = lats[i], lons[i], coss[i], rows[i]
+        for j in range(i + 1, n):
+            a = sin((lats[j] - lat_i) / 2) ** 2 + cos_i * coss[j] * sin((lons[j] - lon_i) / 2) ** 2
+            row_i[j] = rows[j][i] = 2 * EARTH_RADIUS_KM * asin(sqrt(a if a < 1.0 else 1.0))
+    return rows
+
+
+def distance_block(points: list[tuple[float, float]], others: list[tuple[float, float]]):
+    """Haversine distances in km from each of ``points`` to each of ``others`` as a NumPy array.
+
+    Only available with NumPy; row ``i`` matches ``distance_matrix`` entries for ``points[i]``.
+    """
+    a_rad = np.radians(np.asarray(points, dtype=float).reshape(-1, 2))
+    b_rad = np.radians(np.asarray(others, dtype=float).reshape(-1, 2))
+    lat, lon = a_rad[:, 0:1], a_rad[:, 1:2]
+    lat_b, lon_b = b_rad[:, 0], b_rad[:, 1]
+    a = np.sin((lat_b - lat) / 2) ** 2 + np.cos(lat) * np.cos(lat_b) * np.sin((lon_b - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def tour_length(tour: list[int], dist) -> float:
+    return sum(dist[tour[i - 1]][tour[i]] for i in range(len(tour)))
+
+
+def nearest_neighbour_tour(dist, start: int = 0) -> list[int]:
+    unvisited = set(range(len(dist)))
+    unvisited.discard(start)
+    tour = [start]
+    while unvisited:
+        nxt = min(unvisited, key=dist[tour[-1]].__getitem__)
+        unvisited.remove(nxt)
+        tour.append(nxt)
+    return tour
+
+
+def neighbour_lists(dist, k: int = NEIGHBOURS) -> list[list[int]]:
+    n = len(dist)
+    return [[j for j in heapq.nsmallest(k + 1, range(n), key=dist[i].__getitem__) if j != i][:k] for i in range(n)]
+
+
+def _reverse(tour: list[int], pos: list[int], i: int, j: int):
+    """Reverse the circular segment ``tour[i..j]``, or its complement when that is shorter."""
+    n = len(tour)
+    length = (j - i) % n + 1
+    if 2 * length > n:
+        i, j = (j + 1) % n, (i - 1) % n
+        length = n - length
+    for _ in range(length // 2):
+        a, b = tour[i], tour[j]
+        tour[i], tour[j] = b, a
+        pos[b], pos[a] = i, j
+        i = (i + 1) % n
+        j = (j - 1) % n
+
 
+def two_opt(tour: list[int], dist, neighbours) -> bool:
+    """Neighbour-list 2-opt with don't-look bits on a closed tour; improves ``tour`` in place."""
+    n = len(tour)
+    if n < 4:
+        return False
+    pos = [0] * n
+    for idx, node in enumerate(tour):
+        pos[node] = idx
+    active = list(tour)
+    queued = [True] * n
+    improved = False
+    while active:
+        a = active.pop()
+        queued[a] = False
+        for forward in (True, False):
+            pa = pos[a]
+            a2 = tour[(pa + 1) % n] if forward else tour[pa - 1]
+            d_a = dist[a][a2]
+            for c in neighbours[a]:
+                g1 = d_a - dist[a][c]
+                if g1 <= EPSILON:
+                    break
+                pc = pos[c]
+                c2 = tour[(pc + 1) % n] if forward else tour[pc - 1]
+                if c2 == a or c == a2:
+                    continue
+                if g1 + dist[c][c2] - dist[a2][c2] > EPSILON:
+                    if forward:
+                        _reverse(tour, pos, (pa + 1) % n, pc)
+                    else:
+                        _reverse(tour, pos, pc, (pa - 1) % n)
+                    for node in (a, a2, c, c2):
+                        if not queued[node]:
+                            queued[node] = True
+                            active.append(node)
+                    improved = True
+                    break
+            else:
+                continue
+            break
+    return improved
 
-def compute_optimal_path(stops: list[RouteStop], vehicle: Vehicle) -> list[RouteStop]:
-    """Stub for future integration with Google Maps API / OR-tools.
 
-    Current behavior returns the input order.
+def or_opt(tour: list[int], dist, neighbours, max_segment: int = 3) -> bool:
+    """Move segments of 1..``max_segment`` nodes next to a near neighbour when that is shorter."""
+    n = len(tour)
+    pos = [0] * n
+    for idx, node in enumerate(tour):
+        pos[node] = idx
+    improved = False
+    for seg_len in range(1, max_segment + 1):
+        if n < seg_len + 3:
+            break
+        for i in range(n):
+            seg = [tour[(i + k) % n] for k in range(seg_len)]
+            first, last = seg[0], seg[-1]
+            prev, nxt = tour[i - 1], tour[(i + seg_len) % n]
+            gain = dist[prev][first] + dist[last][nxt] - dist[prev][nxt]
+            if gain <= EPSILON:
+                continue
+            in_seg = set(seg)
+            best = None
+            for anchor in (first, last):
+                for c in neighbours[anchor]:
+                    if c in in_seg:
+                        continue
+                    pc = pos[c]
+                    for left, right in ((c, tour[(pc + 1) % n]), (tour[pc - 1], c)):
+                        if left in in_seg or right in in_seg:
+                            continue
+                        base = dist[left][right]
+                        forward = dist[left][first] + dist[last][right] - base
+                        backward = dist[left][last] + dist[first][right] - base
+                        delta = min(forward, backward)
+                        if delta < gain - EPSILON and (best is None or delta < best[0]):
+                            best = (delta, left, forward <= backward)
+            if best is None:
+                continue
+            _delta, left, keep = best
+            rest = [node for node in tour if node not in in_seg]
+            li = rest.index(left)
+            tour[:] = rest[: li + 1] + (seg if keep else seg[::-1]) + rest[li + 1 :]
+            for idx, node in enumerate(tour):
+                pos[node] = idx
+            improved = True
+    return improved
+
+
+def improve_tour(tour: list[int], dist, neighbours=None, rounds: int = 8) -> list[int]:
+    neighbours = neighbours or neighbour_lists(dist)
+    for _ in range(rounds):
+        changed = two_opt(tour, dist, neighbours)
+        changed = or_opt(tour, dist, neighbours) or changed
+        if not changed:
+            break
+    return tour
+
+
+def split_by_capacity(order: list[int], dist, demands: list[float], capacity: float, depot: int = 0) -> list[list[int]]:
+    """Optimally cut a giant tour into depot-to-depot trips that respect ``capacity`` (Prins split)."""
+    n = len(order)
+    best = [0.0] + [math.inf] * n
+    cut = [0] * (n + 1)
+    for i in range(n):
+        load, cost = 0.0, 0.0
+        for j in range(i, n):
+            node = order[j]
+            load += demands[node]
+            if load > capacity + EPSILON:
+                break
+            if j == i:
+                cost = dist[depot][node] + dist[node][depot]
+            else:
+                prev = order[j - 1]
+                cost += dist[prev][node] + dist[node][depot] - dist[prev][depot]
+            if best[i] + cost < best[j + 1]:
+                best[j + 1] = best[i] + cost
+                cut[j + 1] = i
+    trips, j = [], n
+    while j > 0:
+        trips.append(order[cut[j]:j])
+        j = cut[j]
+    return trips[::-1]
+
+
+class _OpenRow:
+    """``row`` followed by a zero-cost dummy node at index ``n``, without copying the row."""
+
+    __slots__ = ("row", "n")
+
+    def __init__(self, row, n: int):
+        self.row, self.n = row, n
+
+    def __getitem__(self, j):
+        return 0.0 if j == self.n else self.row[j]
+
+    def __len__(self):
+        return self.n + 1
+
+
+def solve_tour(dist, has_depot: bool) -> list[int]:
+    """Return a short visiting order of all nodes.
+
+    With a depot (node 0) the tour is closed and starts at the depot; without one the route is an
+    open path, solved as a closed tour through a zero-cost dummy node that is then cut out.
     """
+    n = len(dist)
+    if n <= 2:
+        return list(range(n))
+    if not has_depot:
+        # Lists are cheaper to extend than to wrap; mapped rows are wrapped so they stay zero-copy.
+        dist = [row + [0.0] if isinstance(row, list) else _OpenRow(row, n) for row in dist] + [[0.0] * (n + 1)]
+    tour = improve_tour(nearest_neighbour_tour(dist, start=len(dist) - 1 if not has_depot else 0), dist)
+    anchor = tour.index(0 if has_depot else n)
+    tour = tour[anchor:] + tour[:anchor]
+    return tour if has_depot else tour[1:]
+
+
+def route_length_km(route: list[RouteStop], vehicle: Vehicle | None = None) -> float:
+    """Driving distance of ``route``, including depot departure/return when the vehicle has a depot."""
+    points = [(s.latitude, s.longitude) for s in route]
+    if vehicle is not None and vehicle.has_depot and route:
+        depot = (vehicle.depot_latitude, vehicle.depot_longitude)
+        points = [depot] + points + [depot]
+    return sum(haversine_km(*points[i - 1], *points[i]) for i in range(1, len(points)))
+
+
+def _prepare(stops: list[RouteStop], vehicle: Vehicle, distances=None):
+    """Validate a single-vehicle problem; return ``(nodes, dist, over_capacity)``."""
     if vehicle.capacity_kg <= 0:
         raise ValueError("Vehicle capacity must be positive.")
-    return stops
+    if any(s.demand_kg > vehicle.capacity_kg for s in stops):
+        raise ValueError("A stop's demand exceeds the vehicle capacity.")
+    over_capacity = sum(s.demand_kg for s in stops) > vehicle.capacity_kg
+    if over_capacity and not vehicle.has_depot:
+        raise ValueError("Vehicle depot location is required when demand exceeds capacity.")
+    nodes = ([vehicle.depot_stop()] if vehicle.has_depot else []) + list(stops)
+    dist = distances if distances is not None else distance_matrix([(s.latitude, s.longitude) for s in nodes])
+    return nodes, dist, over_capacity
+
+
+def _trips(order: list[int], nodes, dist, vehicle: Vehicle, over_capacity: bool) -> list[list[int]]:
+    visits = order[1:] if vehicle.has_depot else order
+    if not over_capacity:
+        return [visits]
+    return split_by_capacity(visits, dist, [s.demand_kg for s in nodes], vehicle.capacity_kg)
+
+
+def _build_route(trips: list[list[int]], nodes) -> list[RouteStop]:
+    route = []
+    for trip in trips:
+        if route:
+            route.append(nodes[0])
+        route.extend(nodes[i] for i in trip)
+    return route
+
+
+def compute_optimal_path(stops: list[RouteStop], vehicle: Vehicle, distances=None) -> list[RouteStop]:
+    """Order ``stops`` for one vehicle: nearest-neighbour construction, then 2-opt/Or-opt.
+
+    When the total demand exceeds ``vehicle.capacity_kg`` the tour is split into trips and a
+    ``DEPOT`` stop is inserted wherever the vehicle must unload. ``distances`` may supply a
+    precomputed matrix aligned with the depot (if any) followed by ``stops``.
+    """
+    nodes, dist, over_capacity = _prepare(stops, vehicle, distances)
+    order = solve_tour(dist, vehicle.has_depot)
+    return _build_route(_trips(order, nodes, dist, vehicle, over_capacity), nodes)
+
+
+def _double_bridge(tour: list[int], rnd: random.Random) -> list[int]:
+    """Random double-bridge kick on a closed tour, keeping ``tour[0]`` in place."""
+    n = len(tour)
+    a, b, c = sorted(rnd.sample(range(2, n), 3))
+    return tour[:a] + tour[b:c] + tour[a:b] + tour[c:]
+
+
+def solve_anytime(
+    stops: list[RouteStop],
+    vehicle: Vehicle,
+    budget_s: float,
+    on_improve=None,
+    cancel=None,
+    seed: int = 0,
+    distances=None,
+) -> list[RouteStop]:
+    """Iterated local search that keeps improving a route until ``budget_s`` seconds have passed.
+
+    The first solution is the :func:`compute_optimal_path` route; then double-bridge kicks are
+    followed by 2-opt/Or-opt and kept when they shorten the route. ``on_improve(route,
+    distance_km, elapsed_s)`` is called with every new best, and the search stops early once
+    ``cancel.is_set()`` (a ``threading`` or ``multiprocessing`` event) is true.
+    """
+    started = time.perf_counter()
+    if len(stops) < 5:
+        route = compute_optimal_path(stops, vehicle, distances)
+        if on_improve:
+            on_improve(route, route_length_km(route, vehicle), time.perf_counter() - started)
+        return route
+    nodes, dist, over_capacity = _prepare(stops, vehicle, distances)
+    n = len(dist)
+    # As in solve_tour, an open path is searched as a closed tour through a free dummy node.
+    search = dist if vehicle.has_depot else [list(row) + [0.0] for row in dist] + [[0.0] * (n + 1)]
+    anchor = 0 if vehicle.has_depot else n
+    neighbours = neighbour_lists(search)
+
+    def _evaluate(tour):
+        at = tour.index(anchor)
+        tour = tour[at:] + tour[:at]
+        trips = _trips(tour if vehicle.has_depot else tour[1:], nodes, dist, vehicle, over_capacity)
+        length = sum(
+            (dist[0][t[0]] + dist[t[-1]][0] if vehicle.has_depot else 0.0)
+            + sum(dist[t[k - 1]][t[k]] for k in range(1, len(t)))
+            for t in trips
+        )
+        return length, trips
+
+    current = solve_tour(dist, vehicle.has_depot)
+    current = current if vehicle.has_depot else [anchor] + current
+    best_length, best_trips = _evaluate(current)
+    current_length = best_length
+    if on_improve:
+        on_improve(_build_route(best_trips, nodes), best_length, time.perf_counter() - started)
+    rnd = random.Random(seed)
+    while time.perf_counter() - started < budget_s and not (cancel is not None and cancel.is_set()):
+        candidate = improve_tour(_double_bridge(current, rnd), search, neighbours)
+        length, trips = _evaluate(candidate)
+        if length < current_length - EPSILON:
+            current, current_length = candidate, length
+            if length < best_length - EPSILON:
+                best_length, best_trips = length, trips
+                if on_improve:
+                    on_improve(_build_route(best_trips, nodes), best_length, time.perf_counter() - started)
+    return _build_route(best_trips, nodes)
+
+
+def _anytime_worker(stops, vehicle, budget_s, events, cancel, seed):
+    index = {id(s): i for i, s in enumerate(stops)}
+
+    def _report(route, distance_km, elapsed):
+        events.put(("improved", [index.get(id(s)) for s in route], distance_km, elapsed))
+
+    try:
+        route = solve_anytime(stops, vehicle, budget_s, _report, cancel, seed)
+        events.put(("done", [index.get(id(s)) for s in route], route_length_km(route, vehicle), None))
+    except Exception as exc:
+        events.put(("error", None, None, str(exc)))
+
+
+class AnytimeSolver:
+    """Runs :func:`solve_anytime` in a worker process and relays its progress.
+
+    Call :meth:`poll` (for example from a Tk ``after`` callback) to drain the event queue; it
+    returns ``(kind, route, distance_km, elapsed_s)`` tuples with ``kind`` one of ``improved``,
+    ``done`` or ``error`` (the message is then in the last field). :attr:`best` always holds
+    the best route received so far.
+    """
+
+    def __init__(self, stops: list[RouteStop], vehicle: Vehicle, budget_s: float, seed: int = 0):
+        ctx = multiprocessing.get_context("spawn")
+        self.stops, self.vehicle = list(stops), vehicle
+        self.best: list[RouteStop] | None = None
+        self.best_distance_km: float | None = None
+        self.finished = False
+        self._events = ctx.Queue()
+        self._cancel = ctx.Event()
+        self._process = ctx.Process(
+            target=_anytime_worker, args=(self.stops, vehicle, budget_s, self._events, self._cancel, seed), daemon=True
+        )
+        self._process.start()
+
+    def _stops_for(self, indices: list[int | None]) -> list[RouteStop]:
+        return [self.vehicle.depot_stop() if i is None else self.stops[i] for i in indices]
+
+    def poll(self) -> list[tuple]:
+        events = []
+        while True:
+            try:
+                kind, indices, distance_km, extra = self._events.get_nowait()
+            except queue.Empty:
+                break
+            route = self._stops_for(indices) if indices is not None else None
+            if route is not None:
+                self.best, self.best_distance_km = route, distance_km
+            if kind != "improved":
+                self.finished = True
+                self._process.join(timeout=1)
+            events.append((kind, route, distance_km, extra))
+        if not self.finished and not self._process.is_alive():
+            self.finished = True
+            events.append(("error", None, None, "Route solver process exited unexpectedly."))
+        return events
+
+    def cancel(self):
+        """Ask the worker to stop; it still reports ``done`` with the best route so far."""
+        self._cancel.set()
+
+    def result(self, timeout: float | None = None) -> list[RouteStop] | None:
+        """Block until the worker finishes (or ``timeout`` passes) and return the best route."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.finished and (deadline is None or time.monotonic() < deadline):
+            self.poll()
+            time.sleep(0.02)
+        return self.best
+
+
+@dataclass
+class TimedStop:
+    stop: RouteStop
+    arrival: datetime
+    service_start: datetime
+    departure: datetime
+    lateness_minutes: float = 0.0
+
+
+@dataclass
+class TimedRoute:
+    stops: list[TimedStop]
+    distance_km: float
+    lateness_minutes: float
+
+    @property
+    def feasible(self) -> bool:
+        return self.lateness_minutes <= EPSILON
+
+    @property
+    def route(self) -> list[RouteStop]:
+        return [t.stop for t in self.stops]
+
+
+class _TimeWindowProblem:
+    """Schedule evaluation over node indices; node 0 is the depot when there is one."""
+
+    def __init__(self, nodes, dist, depot, start, capacity, minutes_per_km, service_minutes, lateness_weight):
+        self.dist, self.depot, self.capacity = dist, depot, capacity
+        self.minutes_per_km, self.service = minutes_per_km, service_minutes
+        self.lateness_weight = lateness_weight
+        self.demands = [s.demand_kg for s in nodes]
+        self.opens, self.closes = [], []
+        for stop in nodes:
+            begin, end = stop.window_start, stop.window_end
+            if begin is not None and end is None:
+                end = begin + timedelta(minutes=SLOT_MINUTES)
+            self.opens.append((begin - start).total_seconds() / 60 if begin is not None else -math.inf)
+            self.closes.append((end - start).total_seconds() / 60 if end is not None else math.inf)
+
+    def walk(self, order: list[int]):
+        """Yield ``(node, arrival, service_start, lateness)`` in minutes, including depot returns."""
+        dist, depot, mpk = self.dist, self.depot, self.minutes_per_km
+        t, load, prev = 0.0, 0.0, depot
+        for node in order:
+            if depot is not None and load + self.demands[node] > self.capacity + EPSILON:
+                t += dist[prev][depot] * mpk
+                yield depot, t, t, 0.0
+                prev, load = depot, 0.0
+            if prev is not None:
+                t += dist[prev][node] * mpk
+            arrival = t
+            t = max(t, self.opens[node])
+            yield node, arrival, t, max(0.0, t - self.closes[node])
+            t += self.service
+            load += self.demands[node]
+            prev = node
+
+    def cost(
+        self, order: list[int], begin: int = 0, state=None, bound: float = math.inf, states=None, rejoin=None
+    ) -> tuple[float, float, float]:
+        """``(objective, distance_km, lateness_minutes)`` of visiting ``order``.
+
+        The walk can resume at ``order[begin]`` from a ``state`` recorded into ``states`` by an
+        earlier call on an order with the same prefix; it gives up with an infinite objective as
+        soon as the partial cost reaches ``bound``. ``rejoin=(index, states, (distance, lateness))``
+        says ``order`` ends like that recorded order from ``index`` on: once the walk is back at
+        its time and load there, the rest of the cost is known, and once it is no earlier the
+        recorded rest bounds it from below.
+        """
+        dist, depot, demands, opens, closes = self.dist, self.depot, self.demands, self.opens, self.closes
+        mpk, service, weight, capacity = self.minutes_per_km, self.service, self.lateness_weight, self.capacity + EPSILON
+        t, load, prev, distance, lateness = state or (0.0, 0.0, depot, 0.0, 0.0)
+        same_from, recorded, (final_distance, final_lateness) = rejoin or (len(order), None, (0.0, 0.0))
+        for idx in range(begin, len(order)):
+            if states is not None:
+                states.append((t, load, prev, distance, lateness))
+            if idx >= same_from:
+                then, then_load, then_prev, then_distance, then_lateness = recorded[idx]
+                if prev == then_prev and abs(load - then_load) <= EPSILON and t >= then - EPSILON:
+                    rest_distance, rest_lateness = final_distance - then_distance, final_lateness - then_lateness
+                    objective = distance + rest_distance + weight * (lateness + rest_lateness)
+                    if t <= then + EPSILON:
+                        return objective, distance + rest_distance, lateness + rest_lateness
+                    if objective >= bound:
+                        return math.inf, distance, lateness
+            node = order[idx]
+            if depot is not None and load + demands[node] > capacity:
+                d = dist[prev][depot]
+                distance, t, prev, load = distance + d, t + d * mpk, depot, 0.0
+            if prev is not None:
+                d = dist[prev][node]
+                distance, t = distance + d, t + d * mpk
+            if t < opens[node]:
+                t = opens[node]
+            elif t > closes[node]:
+                lateness += t - closes[node]
+            if distance + weight * lateness >= bound:
+                return math.inf, distance, lateness
+            t += service
+            load += demands[node]
+            prev = node
+        if depot is not None and prev is not None:
+            distance += dist[prev][depot]
+        return distance + weight * lateness, distance, lateness
+
+    def improve(self, order: list[int], neighbours, deadline: float | None = None, peers: int = WINDOW_PEERS) -> list[int]:
+        """Relocate single stops next to a near neighbour, among stops of a similar window, or one place along.
+
+        Window peers are the ``peers`` stops whose windows close nearest to the moved stop's, so
+        each move tries a bounded number of places; passes stop at ``time.monotonic()`` ``deadline``.
+        """
+        by_close = sorted((self.closes[v], v) for v in order)
+        order = list(order)
+        pos = [0] * len(self.closes)
+        for k, v in enumerate(order):
+            pos[v] = k
+        states = []
+        best, *final = self.cost(order, states=states)
+        improved = True
+        while improved and (deadline is None or time.monotonic() < deadline):
+            improved = False
+            for node in list(order):
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                i = pos[node]
+                targets = {i - 1, i + 1}
+                for c in neighbours[node]:
+                    if c != node:
+                        k = pos[c] - (pos[c] > i)  # position of c once node is taken out
+                        targets.update((k, k + 1))
+                close = self.closes[node]
+                r = bisect.bisect_left(by_close, (close, node))
+                nearby = by_close[max(0, r - peers) : r + peers + 1]
+                for _close, other in heapq.nsmallest(peers + 1, nearby, key=lambda e: abs(e[0] - close)):
+                    if other != node:
+                        k = pos[other] - (pos[other] > i)
+                        targets.update((k, k + 1))
+                rest = order[:i] + order[i + 1 :]
+                choice = None
+                for k in targets:
+                    if 0 <= k <= len(rest) and k != i:
+                        candidate = rest[:k] + [node] + rest[k:]
+                        begin = min(i, k)
+                        rejoin = (max(i, k) + 1, states, final)
+                        value, *totals = self.cost(candidate, begin, states[begin], bound=best - EPSILON, rejoin=rejoin)
+                        if value < best - EPSILON:
+                            best, choice = value, (candidate, k, totals)
+                if choice is not None:
+                    order, k, final = choice
+                    for idx in range(min(i, k), max(i, k) + 1):
+                        pos[order[idx]] = idx
+                    # The prefix before the move keeps its recorded states; re-record the rest.
+                    begin = min(i, k)
+                    state = states[begin]
+                    del states[begin:]
+                    self.cost(order, begin, state, states=states)
+                    improved = True
+        return order
+
+
+def compute_time_window_path(
+    stops: list[RouteStop],
+    vehicle: Vehicle,
+    start: datetime,
+    speed_kmh: float = DEFAULT_SPEED_KMH,
+    service_minutes: float = DEFAULT_SERVICE_MINUTES,
+    lateness_weight: float = LATENESS_WEIGHT,
+    distances=None,
+    budget_s: float = TIME_WINDOW_BUDGET_S,
+) -> TimedRoute:
+    """Order ``stops`` so each is served inside its window, trading lateness against distance.
+
+    The vehicle leaves the depot (or reaches the first stop) at ``start`` and drives at
+    ``speed_kmh``; arriving early means waiting for ``window_start``, serving after
+    ``window_end`` counts as lateness. Stops without a window can be served any time, and a
+    ``window_start`` alone means its 30-minute slot. Capacity works as in
+    :func:`compute_optimal_path`, with ``DEPOT`` stops where the vehicle unloads. Local search
+    stops after ``budget_s`` seconds, shared between the two starting orders.
+    """
+    if vehicle.capacity_kg <= 0:
+        raise ValueError("Vehicle capacity must be positive.")
+    if speed_kmh <= 0:
+        raise ValueError("Travel speed must be positive.")
+    if any(s.demand_kg > vehicle.capacity_kg for s in stops):
+        raise ValueError("A stop's demand exceeds the vehicle capacity.")
+    if sum(s.demand_kg for s in stops) > vehicle.capacity_kg and not vehicle.has_depot:
+        raise ValueError("Vehicle depot location is required when demand exceeds capacity.")
+
+    nodes = ([vehicle.depot_stop()] if vehicle.has_depot else []) + list(stops)
+    dist = distances if distances is not None else distance_matrix([(s.latitude, s.longitude) for s in nodes])
+    offset = 1 if vehicle.has_depot else 0
+    problem = _TimeWindowProblem(
+        nodes, dist, 0 if vehicle.has_depot else None, start, vehicle.capacity_kg, 60.0 / speed_kmh, service_minutes, lateness_weight
+    )
+    neighbours = [[j for j in row if j >= offset] for row in neighbour_lists(dist)]
+
+    # Start from both the shortest tour and the earliest-deadline order; keep the better result.
+    by_distance = solve_tour(dist, vehicle.has_depot)[offset:]
+    by_deadline = sorted(range(offset, len(nodes)), key=lambda i: (problem.closes[i], problem.opens[i]))
+    deadline, improved = time.monotonic() + budget_s, []
+    for left, initial in ((2, by_deadline), (1, by_distance)):
+        now = time.monotonic()
+        improved.append(problem.improve(initial, neighbours, now + (deadline - now) / left))
+    order = min(improved, key=lambda o: problem.cost(o)[0])
+
+    _objective, distance, lateness = problem.cost(order)
+    timed = []
+    for node, arrival, service_start, late in problem.walk(order):
+        at = start + timedelta(minutes=service_start)
+        leave = at + timedelta(minutes=service_minutes if node != problem.depot else 0)
+        timed.append(TimedStop(nodes[node], start + timedelta(minutes=arrival), at, leave, late))
+    return TimedRoute(timed, distance, lateness)
@@ -1,10 +1,34 @@
+import csv
+import gzip
+import json
 import os
+import random
+import smtplib
 import tempfile
+import threading
+import time
 import unittest
 from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-from database.sqlite_service import SQLiteService
+from database.sqlite_service import SQL_FUNCTIONS, SQLiteService, stored_note_text
+from services.eta_service import EtaService
+from services.export_service import export_dataset
+from services.forecast_service import DemandForecaster
+from services.geo_service import GridIndex, OpenPickupIndex
+from services.i18n_service import compile_template
+from services.outbox_service import FileChannel, OutboxDispatcher, OutboxMessage, SmtpChannel
+from services.points_service import recompute_points
+from services.reminder_service import ReminderScheduler
+from services.report_service import generate_monthly_reports
+from services.route_repair_service import RouteRepairService
+from services.route_service import RouteStop, Vehicle, haversine_km
 from services.validation_service import validate_password, validate_pickup_datetime, validate_user_id
+from ui.change_watcher import ChangeWatcher
+from ui.common_widgets import PagedRows, RowSource, TreeBinding
+from ui.dashboard_screen import DashboardScreen
+from ui.task_runner import TaskRunner
 
 
 class AppFeatureTests(unittest.TestCase):
@@ -63,6 +87,703 @@ class AppFeatureTests(unittest.TestCase):
         self.assertEqual(row["current_status"], "COMPLETED")
         self.assertEqual(row["points_awarded"], 30)
 
+    def _collector_of(self, pickup_id):
+        return self.db.conn.execute("SELECT assigned_collector FROM pickup_request WHERE pickup_id=?", (pickup_id,)).fetchone()[0]
+
+    def _make_resident(self, user_id="resident01", zone="Zone A"):
+        self.db.create_basic_user(user_id, "Resident@123")
+        self.db.complete_profile(
+            {
+                "user_id": user_id,
+                "full_name": user_id.title(),
+                "id_no": f"ID-{user_id}",
+                "telephone": "+60111111111",
+                "email": f"{user_id}@example.com",
+                "zone": zone,
+                "address": "Addr",
+            }
+        )
+        return user_id
+
+    def test_export_streams_filtered_csv_and_gzip_jsonl(self):
+        rid = self._make_resident()
+        dt = (datetime.now() + timedelta(hours=2)).strftime("%Y-%m-%d %H:%M")
+        done = self.db.create_pickup_with_recycling(rid, dt, "Paper", 3, "")
+        self.db.create_pickup_with_recycling(rid, dt, "Glass", 2, "")
+        self.db.collector_update_pickup("collector01", done, "COMPLETED", "done")
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            csv_path = os.path.join(out_dir, "pickups.csv")
+            result = export_dataset(self.tmp.name, "pickups", csv_path, status="COMPLETED", chunk_size=1)
+            self.assertEqual(result.rows, 1)
+            with open(csv_path, newline="") as fh:
+                rows = list(csv.DictReader(fh))
+            self.assertEqual(rows[0]["pickup_id"], str(done))
+
+            gz_path = os.path.join(out_dir, "notes.jsonl.gz")
+            progress = []
+            result = export_dataset(self.tmp.name, "notifications", gz_path, fmt="jsonl", chunk_size=2, progress=progress.append)
+            with gzip.open(gz_path, "rt") as fh:
+                notes = [json.loads(line) for line in fh]
+            self.assertEqual(result.rows, len(notes))
+            self.assertEqual(progress[-1], len(notes))
+
+    def test_monthly_zone_reports_run_in_pool_and_resume(self):
+        rid = self._make_resident()
+        when = datetime.now() + timedelta(hours=2)
+        failed = self.db.create_pickup_with_recycling(rid, when.strftime("%Y-%m-%d %H:%M"), "Paper", 3, "")
+        self.db.collector_update_pickup("collector01", failed, "FAILED", "Bin not outside")
+        month = when.strftime("%Y-%m")
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            seen = []
+            result = generate_monthly_reports(self.tmp.name, month, out_dir, max_workers=2, progress=lambda d, t: seen.append((d, t)))
+            self.assertEqual(sorted(result["generated"]), [1, 2])
+            self.assertEqual(seen[-1], (2, 2))
+            with open(os.path.join(out_dir, month, "zone_1.html")) as fh:
+                self.assertIn("Bin not outside", fh.read())
+
+            os.remove(os.path.join(out_dir, month, "zone_2.html"))
+            result = generate_monthly_reports(self.tmp.name, month, out_dir, max_workers=2)
+            self.assertEqual(result["skipped"], [1])
+            self.assertEqual(result["generated"], [2])
+
+    def test_points_recompute_dry_run_then_apply(self):
+        rid = self._make_resident()
+        other = self._make_resident("resident02")
+        when = datetime.now() + timedelta(hours=2)
+        dt = when.strftime("%Y-%m-%d %H:%M")
+        pid = self.db.create_pickup_with_recycling(rid, dt, "Metal", 10, "")
+        paper = self.db.create_pickup_with_recycling(other, dt, "Paper", 4, "")
+        for pickup in (pid, paper):
+            self.db.collector_update_pickup(self._collector_of(pickup), pickup, "COMPLETED", "done")
+
+        self.db.add_multiplier_version({"Metal": 5}, "2000-01-01")
+        self.assertEqual(self.db.get_category_multipliers()["Paper"], 1)
+        day = when.strftime("%Y-%m-%d")
+        preview = recompute_points(self.db, day, day, dry_run=True, chunk_size=1)
+        self.assertEqual(preview["deltas"], {rid: 20})
+        self.assertEqual(self.db.get_user(rid)["total_points"], 30)
+
+        recompute_points(self.db, day, day, dry_run=False, chunk_size=1)
+        row = self.db.conn.execute(
+            "SELECT p.points_awarded,r.points_added FROM pickup_request p JOIN recycling_log r ON r.pickup_id=p.pickup_id WHERE p.pickup_id=?",
+            (pid,),
+        ).fetchone()
+        self.assertEqual((row["points_awarded"], row["points_added"]), (50, 50))
+        self.assertEqual(self.db.get_user(rid)["total_points"], 50)
+        self.assertEqual(recompute_points(self.db, day, day)["pickups"], 0)
+
+    def test_demand_forecast_is_incremental_and_persisted(self):
+        rid = self._make_resident()
+        monday = datetime(2026, 3, 2, 9, 0)
+        for week, pickups in enumerate((2, 4)):
+            for _ in range(pickups):
+                dt = (monday + timedelta(weeks=week)).strftime("%Y-%m-%d %H:%M")
+                pid = self.db.create_pickup_with_recycling(rid, dt, "Paper", 5, "")
+                self.db.collector_update_pickup("collector01", pid, "COMPLETED", "done")
+
+        today = monday.date() + timedelta(weeks=1)
+        forecaster = DemandForecaster(self.db, alpha=0.5, clock=lambda: today)
+        self.assertEqual(forecaster.sync(), 6)
+        self.assertEqual(forecaster.expected(1, monday.date(), "09:00"), (3.0, 15.0))
+        self.assertEqual(forecaster.expected(1, monday.date(), "10:00"), (0.0, 0.0))
+
+        restarted = DemandForecaster(self.db, alpha=0.5, clock=lambda: today)
+        self.assertEqual(restarted.sync(), 0)
+        self.assertEqual(restarted.expected_totals(monday.date())[1], (3.0, 15.0))
+
+        # Completing a pickup folds it in straight away; quiet weeks decay the expectation.
+        dt = (monday + timedelta(weeks=1, hours=1)).strftime("%Y-%m-%d %H:%M")
+        pid = self.db.create_pickup_with_recycling(rid, dt, "Paper", 4, "")
+        self.db.collector_update_pickup("collector01", pid, "COMPLETED", "done")
+        self.assertEqual(restarted.expected(1, monday.date(), "10:00"), (1.0, 4.0))
+        today = monday.date() + timedelta(weeks=3, days=1)
+        self.assertEqual(restarted.expected(1, monday.date(), "10:00"), (0.25, 1.0))
+
+        # A worker folds completions from its read-only connection; only flush writes them.
+        self.db.pickup_listeners.clear()
+        pid = self.db.create_pickup_with_recycling(rid, dt, "Paper", 4, "")
+        self.db.collector_update_pickup("collector01", pid, "COMPLETED", "done")
+        reader = SQLiteService(path=self.tmp.name, read_only=True)
+        self.addCleanup(reader.close)
+        self.assertEqual(restarted.fold(restarted.pending(reader)), 1)
+        self.assertEqual(restarted.fold(restarted.pending(reader)), 0)
+        self.assertEqual(restarted.expected(1, monday.date(), "10:00"), (0.5, 2.0))
+        self.assertEqual(len(DemandForecaster(self.db, alpha=0.5, clock=lambda: today).pending()), 1)
+        restarted.flush()
+        self.assertEqual(DemandForecaster(self.db, alpha=0.5, clock=lambda: today).pending(), [])
+
+    def test_geocoded_residents_feed_open_pickup_index(self):
+        self.db.import_geocodes([("12, Jalan Ampang", 3.1598, 101.7123), ("Addr", 3.1390, 101.6869)])
+        rid = self._make_resident()
+        user = self.db.get_user(rid)
+        self.assertEqual((user["latitude"], user["longitude"]), (3.1390, 101.6869))
+
+        index = OpenPickupIndex(self.db)
+        dt = (datetime.now() + timedelta(hours=2)).strftime("%Y-%m-%d %H:%M")
+        pid = self.db.create_pickup_with_recycling(rid, dt, "Paper", 3, "")
+        self.assertEqual([key for _d, key in index.radius(3.14, 101.687, 1.0)], [pid])
+        self.assertEqual(index.nearest(3.16, 101.71, k=1)[0][1], pid)
+        self.assertEqual(index.location(pid), (3.1390, 101.6869))
+        for k in range(20):
+            index.insert(f"far{k}", 3.14 + 0.01 * k, 101.60)
+        self.assertEqual(index.nearest_among(3.16, 101.71, {pid})[1], pid)
+        self.assertIsNone(index.nearest_among(3.16, 101.71, {"missing"}))
+        self.db.cancel_resident_pickup(rid, pid, "Changed my mind")
+        self.assertNotIn(pid, index)
+
+    def test_grid_index_matches_brute_force(self):
+        rnd = random.Random(3)
+        points = {i: (3.0 + rnd.random() * 0.2, 101.5 + rnd.random() * 0.2) for i in range(400)}
+        index = GridIndex(cell_km=0.7)
+        for key, (lat, lon) in points.items():
+            index.insert(key, lat, lon)
+        for key in range(0, 400, 5):
+            index.remove(key)
+            del points[key]
+        lat, lon = 3.1, 101.6
+        brute = sorted((haversine_km(lat, lon, *p), key) for key, p in points.items())
+        self.assertEqual([k for _d, k in index.nearest(lat, lon, 7)], [k for _d, k in brute[:7]])
+        self.assertEqual([k for _d, k in index.radius(lat, lon, 2.5)], [k for d, k in brute if d <= 2.5])
+
+    def test_route_repair_follows_created_and_cancelled_pickups(self):
+        self.db.import_geocodes([("North", 3.20, 101.70), ("Middle", 3.15, 101.70), ("South", 3.10, 101.70)])
+        dt = (datetime.now() + timedelta(hours=2)).strftime("%Y-%m-%d %H:%M")
+        pickups = {}
+        for name in ("North", "South"):
+            rid = self._make_resident(f"res_{name.lower()}")
+            self.db.conn.execute("UPDATE users SET address=? WHERE user_login_id=?", (name, rid))
+            pickups[name] = rid
+        self.db.conn.commit()
+        self.db.geocode_residents()
+        north = self.db.create_pickup_with_recycling(pickups["North"], dt, "Paper", 3, "")
+        south = self.db.create_pickup_with_recycling(pickups["South"], dt, "Paper", 3, "")
+
+        pushed = []
+        service = RouteRepairService(self.db, drift_threshold=10, background=False)
+        plan = service.plan_zone(1, Vehicle("collector01", 100, 3.25, 101.70), on_change=pushed.append)
+        self.assertEqual([s.stop_id for s in plan.route()], [str(north), str(south)])
+
+        middle_rid = self._make_resident("res_middle")
+        self.db.conn.execute("UPDATE users SET latitude=3.15,longitude=101.70 WHERE user_login_id=?", (middle_rid,))
+        self.db.conn.commit()
+        middle = self.db.create_pickup_with_recycling(middle_rid, dt, "Glass", 4, "")
+        self.assertEqual([s.stop_id for s in pushed[-1]], [str(north), str(middle), str(south)])
+
+        self.db.cancel_resident_pickup(pickups["North"], north, "Not needed")
+        self.assertEqual([s.stop_id for s in plan.route()], [str(middle), str(south)])
+
+        plan.drift_threshold = 0.1
+        self.db.collector_update_pickup(self._collector_of(middle), middle, "ACCEPTED")
+        self.db.collector_update_pickup(self._collector_of(south), south, "COMPLETED", "done")
+        self.assertEqual(plan.changes, 0)
+        self.assertEqual([s.stop_id for s in plan.route()], [str(middle)])
+
+        owner = self._collector_of(middle)
+        mine = service.plan_zone(1, Vehicle(owner, 100), collector_id=owner, route=plan.route())
+        self.assertEqual([s.stop_id for s in mine.route()], [str(middle)])
+        late = self.db.create_pickup_with_recycling(middle_rid, dt, "Paper", 2, "")
+        self.assertIn(str(late), plan)
+        self.assertEqual(str(late) in mine, self._collector_of(late) == owner)
+
+    def test_eta_follows_route_order_and_collector_progress(self):
+        dt = (datetime.now() + timedelta(hours=2)).strftime("%Y-%m-%d %H:%M")
+        pickups, stops = [], []
+        for k in range(3):
+            rid = self._make_resident(f"res_eta{k}")
+            pid = self.db.create_pickup_with_recycling(rid, dt, "Paper", 3, "")
+            pickups.append((rid, pid))
+            stops.append(RouteStop(str(pid), 3.10 + 0.01 * k, 101.70, 3))
+        leg = timedelta(minutes=haversine_km(3.10, 101.70, 3.11, 101.70) * 60 / 25)
+        start = datetime(2030, 1, 7, 9, 0)
+        now = [start]
+        eta = EtaService(self.db, speed_kmh=25, service_minutes=5, clock=lambda: now[0])
+
+        planned = eta.set_route("collector01", stops)
+        self.assertEqual([planned[pid] for _rid, pid in pickups], [start, start + timedelta(minutes=5) + leg, start + 2 * (timedelta(minutes=5) + leg)])
+        self.assertEqual(self.db.list_resident_pickups(pickups[1][0])[0]["eta"], (start + timedelta(minutes=5) + leg).strftime("%Y-%m-%d %H:%M"))
+
+        now[0] = start + timedelta(minutes=20)
+        self.db.collector_update_pickup("collector01", pickups[0][1], "COMPLETED", "done")
+        self.assertEqual(self.db.list_resident_pickups(pickups[0][0])[0]["eta"], start.strftime("%Y-%m-%d %H:%M"))
+        self.assertEqual(self.db.list_resident_pickups(pickups[1][0])[0]["eta"], (now[0] + leg).strftime("%Y-%m-%d %H:%M"))
+
+        self.db.cancel_resident_pickup(pickups[1][0], pickups[1][1], "Not needed")
+        self.assertEqual(self.db.list_resident_pickups(pickups[2][0])[0]["eta"], (now[0] + 2 * leg).strftime("%Y-%m-%d %H:%M"))
+
+    def test_open_pickups_are_balanced_across_zone_collectors_and_reassigned(self):
+        dt = (datetime.now() + timedelta(hours=2)).strftime("%Y-%m-%d %H:%M")
+        pids = [self.db.create_pickup_with_recycling(self._make_resident(f"res_bal{k}"), dt, "Paper", 2 + k, "") for k in range(6)]
+        mine = {c: [r["pickup_id"] for r in self.db.list_collector_tasks(c)] for c in ("collector01", "collector02", "collector03")}
+        self.assertEqual(len(mine["collector01"]), 3)
+        self.assertEqual(len(mine["collector02"]), 3)
+        self.assertEqual(mine["collector03"], [])
+        self.assertEqual(sorted(mine["collector01"] + mine["collector02"]), pids)
+
+        with self.assertRaisesRegex(ValueError, "not assigned to you"):
+            self.db.collector_update_pickup("collector02", mine["collector01"][0], "COMPLETED", "done")
+        self.assertEqual(self.db.list_collector_tasks("collector01")[0]["current_status"], "PENDING")
+        with self.assertRaisesRegex(ValueError, "not found"):
+            self.db.collector_update_pickup("collector01", max(pids) + 100, "ACCEPTED")
+        self.db.collector_update_pickup("collector01", mine["collector01"][0], "COMPLETED", "done")
+        extra = self.db.create_pickup_with_recycling(self._make_resident("res_bal_x"), dt, "Glass", 1, "")
+        self.assertIn(extra, [r["pickup_id"] for r in self.db.list_collector_tasks("collector01")])
+
+        self.db.set_collector_available("collector02", False)
+        self.assertEqual(self.db.list_collector_tasks("collector02"), [])
+        self.assertEqual(len(self.db.list_collector_tasks("collector01")), 6)
+        u = self.db.get_user("collector01")
+        self.db.update_user("collector01", u["name"], u["role"], u["zone_id"], "", 0)
+        self.assertEqual(self.db.list_collector_tasks("collector01"), [])
+        self.db.set_collector_available("collector02", True)
+        self.assertEqual(len(self.db.list_collector_tasks("collector02")), 6)
+        plan = self.db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT pickup_id FROM pickup_request WHERE assigned_collector=? AND current_status IN ('PENDING','ACCEPTED','IN_PROGRESS')", ("collector02",)
+        ).fetchall()
+        self.assertIn("idx_pickup_assigned", " ".join(r["detail"] for r in plan))
+
+    def test_unread_notifications_come_first_and_counter_tracks_read_state(self):
+        rid = self._make_resident()
+        for k in range(3):
+            self.db.add_notification(rid, "SYSTEM", f"Note {k}", "body")
+        self.assertEqual(self.db.unread_count(rid), 3)
+        first = self.db.get_notifications(rid)[0]["notification_id"]
+        self.assertEqual(self.db.mark_notifications_read(rid, [first]), 1)
+        self.assertEqual(self.db.unread_count(rid), 2)
+        notes = self.db.get_notifications(rid)
+        self.assertEqual([n["read_at"] is None for n in notes], [True, True, False])
+        self.assertEqual(self.db.mark_all_read(rid), 2)
+        self.assertEqual(self.db.unread_count(rid), 0)
+        self.db.add_notification(rid, "SYSTEM", "Later", "body")
+        self.assertEqual(self.db.unread_count(rid), 1)
+        plan = self.db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM notification WHERE user_id=? AND read_at IS NULL ORDER BY created_at DESC", (rid,)
+        ).fetchall()
+        self.assertIn("idx_notification_unread", " ".join(r["detail"] for r in plan))
+
+    def test_broadcast_is_chunked_and_filters_by_zone_and_role(self):
+        for k in range(5):
+            self._make_resident(f"res_bc{k}", zone="Zone A" if k < 3 else "Zone B")
+        steps = list(self.db.iter_broadcast("Zone A", "hello", zone_id=1, chunk_size=2))
+        self.assertGreater(len(steps), 1)
+        self.assertEqual(steps[-1], (6, 6))  # admin01, collector01, collector02 and three residents
+        self.assertEqual(self.db.broadcast_notification("Crews", "hi", role="WasteCollector"), 3)
+        progress = []
+        self.assertEqual(self.db.broadcast_notification("All", "hi", progress=lambda sent, total: progress.append((sent, total))), 9)
+        self.assertEqual(progress[-1], (9, 9))
+        self.assertEqual(self.db.unread_count("collector03"), 2)
+        self.assertEqual(self.db.unread_count("res_bc0"), 2)
+        self.assertEqual(self.db.send_notification_by_zone(2, "Zone B", "hi"), 3)
+
+    def test_outbox_is_written_with_notifications_and_drained_with_retries(self):
+        rid = self._make_resident()
+        dt = (datetime.now() + timedelta(hours=2)).strftime("%Y-%m-%d %H:%M")
+        self.db.create_pickup_with_recycling(rid, dt, "Paper", 2, "")
+        self.assertEqual(self.db.outbox_status_counts()["PENDING"], 1)  # admins and collectors have no email
+
+        class Flaky:
+            def __init__(self):
+                self.calls = 0
+
+            def send(self, messages):
+                self.calls += 1
+                if self.calls == 1:
+                    raise OSError("connection refused")
+                return {}
+
+        flaky = Flaky()
+        dispatcher = OutboxDispatcher(self.db.path, {"email": flaky}, base_delay_s=0)
+        self.assertEqual(dispatcher.drain_once(), (0, 1))
+        row = self.db.conn.execute("SELECT status,attempts,last_error FROM notification_outbox").fetchone()
+        self.assertEqual((row["status"], row["attempts"], row["last_error"]), ("PENDING", 1, "connection refused"))
+        self.assertEqual(dispatcher.drain_once(), (1, 0))
+        self.assertEqual(self.db.outbox_status_counts()["SENT"], 1)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            mail = os.path.join(tmp, "mail.jsonl")
+            self.db.broadcast_notification("Notice", "Bins out tonight", zone_id=1)
+            dispatcher = OutboxDispatcher(self.db.path, {"email": FileChannel(mail)}, poll_interval_s=0.05)
+            dispatcher.start()
+            dispatcher.wake()
+            for _ in range(100):
+                if self.db.outbox_status_counts()["PENDING"] == 0:
+                    break
+                time.sleep(0.05)
+            dispatcher.stop()
+            with open(mail, encoding="utf-8") as fh:
+                sent = [json.loads(line) for line in fh]
+        self.assertEqual([(m["to"], m["subject"]) for m in sent], [("resident01@example.com", "Notice")])
+
+        failing = OutboxDispatcher(self.db.path, {"email": flaky}, max_attempts=1)
+        self.db.add_notification(rid, "SYSTEM", "Again", "body")
+        flaky.calls = 0
+        self.assertEqual(failing.drain_once(), (0, 1))
+        self.assertEqual(self.db.outbox_status_counts()["FAILED"], 1)
+
+    def test_smtp_channel_fails_only_what_the_broken_connection_left_unsent(self):
+        delivered = []
+
+        class Server:
+            def __init__(self, *_args, **_kwargs):
+                pass
+
+            def send_message(self, email):
+                if email["To"] == "refused@example.com":
+                    raise smtplib.SMTPRecipientsRefused({email["To"]: (550, b"No such user")})
+                if email["To"] == "drop@example.com":
+                    raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+                delivered.append(email["To"])
+
+            def quit(self):
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+
+            def close(self):
+                pass
+
+        recipients = ["a@example.com", "refused@example.com", "b@example.com", "drop@example.com", "c@example.com"]
+        messages = [OutboxMessage(k, to, "Subject", "Body") for k, to in enumerate(recipients, 1)]
+        with mock.patch.object(smtplib, "SMTP", Server):
+            failures = SmtpChannel("mail.example.com").send(messages)
+        self.assertEqual(delivered, ["a@example.com", "b@example.com"])
+        self.assertEqual(sorted(failures), [2, 4, 5])
+
+    def test_rapid_pickup_status_notifications_coalesce_into_one_row(self):
+        rid = self._make_resident()
+        dt = (datetime.now() + timedelta(hours=2)).strftime("%Y-%m-%d %H:%M")
+        pid = self.db.create_pickup_with_recycling(rid, dt, "Paper", 2, "")
+        self.db.mark_all_read(rid)
+        for status in ("ACCEPTED", "IN_PROGRESS", "COMPLETED"):
+            self.db.collector_update_pickup("collector01", pid, status, "done")
+        notes = self.db.get_notifications(rid)
+        self.assertEqual(len(notes), 1)
+        self.assertEqual(notes[0]["message"], f"Pickup #{pid} status updated to COMPLETED. (PENDING -> ACCEPTED -> IN_PROGRESS -> COMPLETED)")
+        self.assertEqual(self.db.unread_count(rid), 1)
+        self.assertEqual(len(self.db.get_notifications("admin01")), 1)
+
+        self.db.status_coalesce_minutes = 0
+        other = self.db.create_pickup_with_recycling(rid, dt, "Glass", 2, "")
+        self.db.collector_update_pickup("collector01", other, "ACCEPTED")
+        self.assertEqual(len(self.db.get_notifications(rid)), 3)
+
+    def test_coalesced_status_change_queues_an_email_and_keeps_its_window(self):
+        rid = self._make_resident()
+        dt = (datetime.now() + timedelta(hours=2)).strftime("%Y-%m-%d %H:%M")
+        pid = self.db.create_pickup_with_recycling(rid, dt, "Paper", 2, "")
+
+        class Recorder:
+            def __init__(self):
+                self.messages = []
+
+            def send(self, messages):
+                self.messages.extend(messages)
+                return {}
+
+        mail = Recorder()
+        dispatcher = OutboxDispatcher(self.db.path, {"email": mail})
+        self.assertEqual(dispatcher.drain_once(), (1, 0))
+        created = self.db.conn.execute("SELECT created_at FROM notification WHERE user_id=?", (rid,)).fetchone()["created_at"]
+        self.db.conn.execute("UPDATE notification SET created_at=datetime(created_at,'-1 minutes') WHERE user_id=?", (rid,))
+        self.db.conn.commit()
+
+        self.db.collector_update_pickup("collector01", pid, "ACCEPTED")
+        self.db.collector_update_pickup("collector01", pid, "COMPLETED", "done")
+        self.assertEqual(self.db.outbox_status_counts()["PENDING"], 1)
+        self.assertEqual(dispatcher.drain_once(), (1, 0))
+        self.assertEqual(mail.messages[-1].body, f"Pickup #{pid} status updated to COMPLETED. (PENDING -> ACCEPTED -> COMPLETED)")
+        row = self.db.conn.execute("SELECT COUNT(*) n,MIN(created_at) created_at,MIN(updated_at) updated_at FROM notification WHERE user_id=?", (rid,)).fetchone()
+        self.assertEqual(row["n"], 1)
+        self.assertLess(row["created_at"], created)
+        self.assertIsNotNone(row["updated_at"])
+
+    def test_reminder_scheduler_sends_each_reminder_once_and_follows_changes(self):
+        rid = self._make_resident()
+        base = datetime(2030, 1, 7, 8, 0)
+        now = [base]
+        at = lambda hours: (base + timedelta(hours=hours)).strftime("%Y-%m-%d %H:%M")
+        soon, later, cancelled, tomorrow = (self.db.create_pickup_with_recycling(rid, at(h), "Paper", 2, "") for h in (1, 3, 2.5, 20))
+        reminders = ReminderScheduler(self.db, lead_minutes=120, window_hours=6, clock=lambda: now[0])
+        self.assertEqual(set(reminders.due), {soon, later, cancelled})
+
+        self.assertEqual(reminders.tick(), 1)
+        self.db.cancel_resident_pickup(rid, cancelled, "Not needed")
+        self.db.reschedule_pickup(rid, later, at(1.5))
+        self.assertEqual(reminders.tick(), 1)
+        now[0] = base + timedelta(hours=19)
+        self.assertEqual(reminders.tick(), 1)
+        self.assertEqual(ReminderScheduler(self.db, clock=lambda: now[0]).tick(), 0)
+
+        sent = [n for n in self.db.get_notifications(rid) if n["type"] == "PICKUP_REMINDER"]
+        self.assertEqual(sorted(n["pickup_id"] for n in sent), sorted([soon, later, tomorrow]))
+        self.assertIn(at(1.5), next(n["message"] for n in sent if n["pickup_id"] == later))
+
+    def test_resident_reschedules_open_pickups_to_valid_slots_only(self):
+        rid = self._make_resident()
+        pid = self.db.create_pickup_with_recycling(rid, "2030-01-07 10:00", "Paper", 2, "")
+        changed = []
+        screen = SimpleNamespace(
+            user_id=rid,
+            pickup_tree=SimpleNamespace(selection=lambda: ("row",), item=lambda _iid, _option: (pid,)),
+            app=SimpleNamespace(db=self.db),
+            tasks=SimpleNamespace(mutate=lambda _channels, action, *args: action(*args)),
+            _data_changed=changed.append,
+        )
+        answers = iter(["2030-01-08", "07:00", "2030-01-08", "09:30"])
+        with mock.patch("ui.dashboard_screen.simpledialog.askstring", lambda *_args: next(answers)), mock.patch("ui.dashboard_screen.messagebox.showerror") as error:
+            DashboardScreen._reschedule_pickup(screen)
+            self.assertIn("between 08:00 and 18:00", error.call_args[0][1])
+            DashboardScreen._reschedule_pickup(screen)
+        self.assertEqual(self.db.list_resident_pickups(rid)[0]["requested_datetime"], "2030-01-08 09:30")
+        self.assertEqual(changed, [{"pickup_request"}])
+
+        self.db.collector_update_pickup(self._collector_of(pid), pid, "IN_PROGRESS")
+        with self.assertRaisesRegex(ValueError, "Only pending/accepted"):
+            self.db.reschedule_pickup(rid, pid, "2030-01-09 10:00")
+        with self.assertRaisesRegex(ValueError, "not found"):
+            self.db.reschedule_pickup("someone_else", pid, "2030-01-09 10:00")
+        self.assertEqual(self.db.list_resident_pickups(rid)[0]["requested_datetime"], "2030-01-08 09:30")
+
+    def test_notifications_store_template_and_render_per_language(self):
+        rid = self._make_resident()
+        pid = self.db.create_pickup_with_recycling(rid, "2030-01-07 10:00", "Paper", 2, "")
+        self.db.collector_update_pickup("collector01", pid, "ACCEPTED")
+        stored = self.db.conn.execute("SELECT title,message,template_key,params FROM notification WHERE user_id=?", (rid,)).fetchone()
+        self.assertEqual((stored["title"], stored["message"], stored["template_key"]), ("", "", "pickup_status"))
+        self.assertEqual(json.loads(stored["params"]), {"pickup_id": pid, "status": "ACCEPTED"})
+
+        en = self.db.get_notifications(rid)[0]
+        self.assertEqual((en["title"], en["message"]), ("Pickup status updated", f"Pickup #{pid} status updated to ACCEPTED. (PENDING -> ACCEPTED)"))
+        compile_template.cache_clear()
+        for _ in range(3):
+            ms = self.db.get_notifications(rid, language="ms")[0]
+        self.assertEqual(ms["message"], f"Status kutipan #{pid} dikemas kini kepada ACCEPTED. (PENDING -> ACCEPTED)")
+        self.assertEqual(compile_template.cache_info().misses, 2)
+
+        class Inbox:
+            def __init__(self):
+                self.messages = []
+
+            def send(self, messages):
+                self.messages.extend(messages)
+                return {}
+
+        inbox = Inbox()
+        self.assertIsNone(self.db.get_user(rid)["language"])  # never chosen: login keeps the screen's language
+        self.db.set_user_language(rid, "ms")
+        OutboxDispatcher(self.db.path, {"email": inbox}).drain_once()
+        self.assertEqual([(m.subject, m.body) for m in inbox.messages], [("Status kutipan dikemas kini", ms["message"])])
+
+        self.db.add_notification(rid, "SYSTEM", "Plain", "Stored text")
+        self.assertIn(("Plain", "Stored text"), [(n["title"], n["message"]) for n in self.db.get_notifications(rid, language="ms")])
+
+        # Without the i18n service the data layer still answers, with the stored text.
+        with mock.patch.dict(SQL_FUNCTIONS, {"note_text": (6, stored_note_text)}):
+            plain = SQLiteService(path=self.tmp.name, read_only=True)
+            try:
+                self.assertIn(("Plain", "Stored text"), [(n["title"], n["message"]) for n in plain.get_notifications(rid)])
+            finally:
+                plain.close()
+
+    def test_task_runner_loads_off_thread_and_drops_superseded_results(self):
+        class Widget:
+            def __init__(self):
+                self.scheduled = []
+
+            def after(self, _ms, callback):
+                self.scheduled.append(callback)
+
+            def winfo_exists(self):
+                return True
+
+        widget, shown, busy = Widget(), [], []
+        runner = TaskRunner(widget, self.tmp.name, on_busy=lambda channel, state: busy.append(state))
+        release = threading.Event()
+        try:
+            runner.load("users", lambda db: release.wait(5) and len(db.list_users()), shown.append)
+            rid = runner.mutate("users", self._make_resident)
+            runner.load("users", lambda db: [u["user_login_id"] for u in db.list_users()], shown.append)
+            release.set()
+            deadline = time.monotonic() + 5
+            while widget.scheduled and time.monotonic() < deadline:
+                time.sleep(0.01)
+                widget.scheduled.pop(0)()
+        finally:
+            runner.close()
+        self.assertEqual(len(shown), 1)
+        self.assertIn(rid, shown[0])
+        self.assertEqual(busy, [True, False])
+        self.assertEqual(runner.pending["users"], 0)
+
+    def test_tree_binding_applies_only_the_diff(self):
+        class Tree:
+            def __init__(self):
+                self.order, self.values, self.calls = [], {}, 0
+
+            def get_children(self):
+                return tuple(self.order)
+
+            def delete(self, *iids):
+                self.calls += 1
+                self.order = [i for i in self.order if i not in iids]
+
+            def move(self, iid, _parent, pos):
+                self.calls += 1
+                self.order.remove(iid)
+                self.order.insert(pos, iid)
+
+            def insert(self, _parent, pos, iid, values, tags):
+                self.calls += 1
+                self.order.insert(pos, iid)
+                self.values[iid] = values
+
+            def item(self, iid, values, tags):
+                self.calls += 1
+                self.values[iid] = values
+
+        tree = Tree()
+        binding = TreeBinding(tree, lambda r: r[0], lambda r: r)
+        rows = [(i, "PENDING") for i in range(1, 1001)]
+        self.assertEqual(binding.update(rows), (1000, 0, 0))
+        tree.calls = 0
+        self.assertEqual(binding.update(rows), (0, 0, 0))
+        self.assertEqual(tree.calls, 0)
+
+        rows = [(0, "PENDING")] + [(i, "ACCEPTED" if i == 500 else "PENDING") for i in range(2, 1001)]
+        self.assertEqual(binding.update(rows), (1, 1, 1))
+        self.assertEqual(tree.calls, 3)
+        self.assertEqual(tree.order, [str(r[0]) for r in rows])
+        self.assertEqual(tree.values["500"], (500, "ACCEPTED"))
+
+        rows.reverse()
+        binding.update(rows)
+        self.assertEqual(tree.order, [str(r[0]) for r in rows])
+
+    def test_paged_list_queries_sort_in_sql_and_do_not_overlap(self):
+        rid = self._make_resident()
+        for day in range(1, 26):
+            self.db.create_pickup_with_recycling(rid, f"2030-01-{day:02d} 09:00", "Paper", 1, "")
+        self.assertEqual(self.db.count_resident_pickups(rid), 25)
+        pages = [self.db.list_resident_pickups_page(rid, offset, 10) for offset in (0, 10, 20)]
+        dates = [r["requested_datetime"] for page in pages for r in page]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+        self.assertEqual(len(set(dates)), 25)
+        self.assertEqual(self.db.list_resident_pickups_page(rid, 0, 1, "dt", False)[0]["requested_datetime"], "2030-01-01 09:00")
+
+        users = [r["user_login_id"] for r in self.db.list_users()]
+        self.assertEqual(self.db.count_users(), len(users))
+        self.assertEqual([r["user_login_id"] for r in self.db.list_users_page(1, 2)], users[1:3])
+        self.assertEqual(self.db.list_users_page(0, 1, "points", True)[0]["user_login_id"], max(self.db.list_users(), key=lambda u: (u["total_points"], u["user_login_id"]))["user_login_id"])
+        with self.assertRaises(ValueError):
+            self.db.list_users_page(0, 10, "password_hash")
+
+        # Seeking past the previous page's last row gives the same pages as OFFSET, NULL sort keys included.
+        self.db.conn.execute("UPDATE pickup_request SET eta='2030-02-01 10:00' WHERE pickup_id % 3 = 0")
+        self.db.conn.commit()
+        for sort, descending in (("eta", False), ("eta", True), ("dt", True), ("zone", False)):
+            by_offset = [r["pickup_id"] for offset in range(0, 30, 4) for r in self.db.list_resident_pickups_page(rid, offset, 4, sort, descending)]
+            seeked, after = [], None
+            for _ in range(8):
+                page = self.db.list_resident_pickups_page(rid, 0, 4, sort, descending, after)
+                seeked.extend(r["pickup_id"] for r in page)
+                after = page[-1] if page else after
+            self.assertEqual(seeked, by_offset)
+        after = self.db.list_users_page(0, 2, "zone")[-1]
+        self.assertEqual(self.db.list_users_page(0, 50, "zone", after=after), self.db.list_users_page(2, 50, "zone"))
+
+    def test_paged_rows_load_the_window_and_evict_old_pages(self):
+        for n in range(30):
+            self.db.add_user(f"user{n:02d}", f"User {n}", "Resident@123", "Resident", 1)
+        calls = []
+
+        def page(db, offset, limit, sort, descending, after):
+            calls.append((offset, after is not None))
+            return db.list_users_page(offset, limit, sort, descending, after)
+
+        paged = PagedRows(RowSource(lambda db: db.count_users(), page), page_size=5, buffer_pages=1, sort="id")
+        users = [r["user_login_id"] for r in self.db.list_users()]
+        self.assertIsNone(paged.rows(visible=4))
+        paged.merge(paged.loader(visible=4)(self.db), visible=4)
+        self.assertEqual(paged.total, len(users))
+        self.assertEqual([r["user_login_id"] for r in paged.rows(visible=4)], users[:4])
+        self.assertEqual(calls, [(0, False), (5, True)])
+        self.assertIsNone(paged.loader(visible=4))
+
+        paged.top = 12
+        self.assertIsNone(paged.rows(visible=4))
+        paged.merge(paged.loader(visible=4)(self.db), visible=4)
+        self.assertEqual([r["user_login_id"] for r in paged.rows(visible=4)], users[12:16])
+        self.assertEqual(calls[2:], [(10, True), (15, True), (20, True)])
+        self.assertEqual(sorted(paged.pages), [1, 2, 3, 4])
+
+        paged.top = len(users)  # clamped to the last full window
+        paged.merge(paged.loader(visible=4)(self.db), visible=4)
+        self.assertEqual([r["user_login_id"] for r in paged.rows(visible=4)], users[-4:])
+        self.assertLessEqual(len(paged.pages), 4)
+
+        paged.invalidate()
+        self.assertIsNone(paged.rows(visible=4))
+        self.assertEqual(paged.loader(visible=4)(self.db)[0], len(users))
+
+    def test_collector_refresh_keeps_the_planned_route_order(self):
+        shown = []
+        screen = SimpleNamespace(route_order={}, collector_rows=[], task_rows=SimpleNamespace(update=shown.append))
+        rows = [{"pickup_id": pid} for pid in (1, 2, 3, 4)]
+        DashboardScreen._show_collector(screen, rows)
+        self.assertEqual([r["pickup_id"] for r in shown[-1]], [1, 2, 3, 4])
+
+        screen.route_order = {"3": 0, "1": 1, "2": 2}
+        DashboardScreen._show_collector(screen, rows + [{"pickup_id": 5}])
+        self.assertEqual([r["pickup_id"] for r in shown[-1]], [3, 1, 2, 4, 5])
+        self.assertEqual(len(screen.collector_rows), 5)
+
+    def test_change_watcher_reports_tables_committed_by_other_connections(self):
+        class Widget:
+            def after(self, _ms, _callback):
+                pass
+
+        watcher = ChangeWatcher(Widget(), self.db, lambda tables: None)
+        self.assertEqual(watcher.check(), set())
+        other = SQLiteService(path=self.tmp.name)
+        try:
+            watcher.check()  # startup re-seeds the demo accounts
+            self.assertEqual(watcher.check(), set())
+            other.create_zone("Zone C")
+            self.assertEqual(watcher.check(), {"zone"})
+            self.assertEqual(watcher.check(), set())
+            other.add_notification("admin01", "SYSTEM", "Hello", "From another terminal")
+            # A notification write bumps everything its triggers may touch (unread count, email outbox).
+            self.assertEqual(watcher.check(), {"notification", "users", "notification_outbox"})
+        finally:
+            other.close()
+
+    def test_dashboard_tabs_build_on_first_show_and_reload_only_when_stale(self):
+        class Notebook:
+            selected = "overview"
+
+            def select(self):
+                return self.selected
+
+        calls = []
+
+        def tab(name, tables):
+            return {"frame": name, "build": lambda _f: calls.append(("build", name)), "refresh": lambda: calls.append(("load", name)), "tables": set(tables), "built": False, "stale": True}
+
+        screen = SimpleNamespace(nb=Notebook(), user={"role": "MunicipalAdmin"}, tabs={"overview": tab("overview", ("pickup_request", "users")), "users": tab("users", ("users",))})
+        screen._show_tab = lambda: DashboardScreen._show_tab(screen)
+        screen._show_tab()
+        self.assertEqual(calls, [("build", "overview"), ("load", "overview")])
+        DashboardScreen._data_changed(screen, {"users"})
+        screen.nb.selected = "users"
+        screen._show_tab()
+        screen.nb.selected = "overview"
+        screen._show_tab()
+        screen._show_tab()
+        self.assertEqual(calls[2:], [("load", "overview"), ("build", "users"), ("load", "users")])
+        DashboardScreen._data_changed(screen, {"pickup_request"})
+        screen.nb.selected = "users"
+        screen._show_tab()
+        self.assertEqual(calls[5:], [("load", "overview")])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,183 @@
+import math
+import random
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from services.distance_cache_service import DistanceMatrixStore, stop_set_key
+from services.fleet_service import plan_fleet, plan_zones
+from services.route_service import (
+    DEPOT_ID,
+    AnytimeSolver,
+    RouteStop,
+    Vehicle,
+    compute_optimal_path,
+    compute_time_window_path,
+    haversine_km,
+    route_length_km,
+    slot_window,
+    solve_anytime,
+)
+
+
+def random_stops(count, seed=7, demand=(5, 30)):
+    rnd = random.Random(seed)
+    return [
+        RouteStop(f"S{i}", 3.10 + rnd.random() * 0.1, 101.60 + rnd.random() * 0.1, rnd.uniform(*demand))
+        for i in range(count)
+    ]
+
+
+class RouteServiceTests(unittest.TestCase):
+    def test_optimal_path_orders_collinear_stops(self):
+        stops = [RouteStop(str(i), 3.0, 101.0 + i * 0.01, 1) for i in (3, 0, 4, 1, 2)]
+        route = compute_optimal_path(stops, Vehicle("truck", 100))
+        ids = [s.stop_id for s in route]
+        self.assertIn(ids, (["0", "1", "2", "3", "4"], ["4", "3", "2", "1", "0"]))
+
+    def test_capacity_inserts_depot_returns(self):
+        stops = random_stops(40)
+        vehicle = Vehicle("truck", 150, 3.15, 101.65)
+        route = compute_optimal_path(stops, vehicle)
+        self.assertEqual(sorted(s.stop_id for s in route if s.stop_id != DEPOT_ID), sorted(s.stop_id for s in stops))
+        load = 0
+        for stop in route:
+            load = 0 if stop.stop_id == DEPOT_ID else load + stop.demand_kg
+            self.assertLessEqual(load, vehicle.capacity_kg)
+        with self.assertRaises(ValueError):
+            compute_optimal_path(stops, Vehicle("truck", 150))
+
+    def test_500_stops_are_fast_and_much_shorter_than_input_order(self):
+        stops = random_stops(500)
+        started = time.perf_counter()
+        route = compute_optimal_path(stops, Vehicle("truck", 10_000))
+        self.assertLess(time.perf_counter() - started, 2.0)
+        self.assertLess(route_length_km(route), route_length_km(stops) / 5)
+
+    def test_fleet_plan_covers_all_stops_within_capacity(self):
+        stops = random_stops(120)
+        fleet = [Vehicle("collector01", 300, 3.15, 101.65), Vehicle("collector02", 200, 3.15, 101.65)]
+        routes = plan_fleet(stops, fleet)
+        visited = [s.stop_id for r in routes for s in r.stops if s.stop_id != DEPOT_ID]
+        self.assertEqual(sorted(visited), sorted(s.stop_id for s in stops))
+        for route, vehicle in zip(routes, fleet):
+            self.assertEqual(route.vehicle_id, vehicle.vehicle_id)
+            self.assertGreater(route.distance_km, 0)
+            load = 0
+            for stop in route.stops:
+                load = 0 if stop.stop_id == DEPOT_ID else load + stop.demand_kg
+                self.assertLessEqual(load, vehicle.capacity_kg + 1e-6)
+        self.assertAlmostEqual(sum(r.load_kg for r in routes), sum(s.demand_kg for s in stops))
+
+    def test_plan_zones_in_process_pool(self):
+        depot = Vehicle("c1", 250, 3.15, 101.65)
+        problems = {zone: (random_stops(30, seed=zone), [depot]) for zone in (1, 2)}
+        plans = plan_zones(problems, max_workers=2)
+        self.assertEqual(sorted(plans), [1, 2])
+        self.assertEqual(plans, plan_zones(problems, max_workers=1))
+
+    def test_plan_zones_reads_distances_from_the_matrix_cache(self):
+        depot = Vehicle("c1", 250, 3.15, 101.65)
+        problems = {zone: (random_stops(30, seed=zone), [depot]) for zone in (1, 2)}
+        with tempfile.TemporaryDirectory() as root:
+            plans = plan_zones(problems, max_workers=1, cache_root=root)
+            for zone, (stops, _vehicles) in problems.items():
+                planned = [s.stop_id for r in plans[zone] for s in r.stops if s.stop_id != DEPOT_ID]
+                self.assertEqual(sorted(planned), sorted(s.stop_id for s in stops))
+                matrix = DistanceMatrixStore(root).open(f"zone_{zone}")
+                self.assertEqual(matrix.n, len(stops) + 1)
+                matrix.close()
+            self.assertEqual(plans, plan_zones(problems, max_workers=2, cache_root=root))
+
+    def test_distance_cache_persists_and_grows_incrementally(self):
+        stops = random_stops(20)
+        with tempfile.TemporaryDirectory() as root:
+            DistanceMatrixStore(root).build("zone_1", stops).close()
+            matrix = DistanceMatrixStore(root).open("zone_1", stop_set_key(stops))
+            self.assertIsNotNone(matrix)
+            rows = matrix.rows_for([s.stop_id for s in stops])
+            a, b = stops[2], stops[9]
+            self.assertAlmostEqual(rows[2][9], haversine_km(a.latitude, a.longitude, b.latitude, b.longitude), places=4)
+            self.assertIsNone(DistanceMatrixStore(root).open("zone_1", stop_set_key(stops[:5])))
+
+            extra = random_stops(30, seed=99)
+            for stop in extra:
+                stop.stop_id = "N" + stop.stop_id
+            grown = DistanceMatrixStore(root).ensure("zone_1", stops + extra)
+            self.assertEqual(grown.key, stop_set_key(stops + extra))
+            self.assertEqual(grown.capacity, 50 + 50 // 4)
+            self.assertAlmostEqual(grown.distance(a.stop_id, extra[0].stop_id), grown.distance(extra[0].stop_id, a.stop_id))
+            c = extra[-1]
+            self.assertAlmostEqual(grown.distance(c.stop_id, a.stop_id), haversine_km(c.latitude, c.longitude, a.latitude, a.longitude), places=4)
+            self.assertAlmostEqual(grown.distance(a.stop_id, b.stop_id), rows[2][9], places=6)
+
+            subset = [extra[3], stops[0], stops[5], extra[7]]
+            route = compute_optimal_path(subset, Vehicle("t", 100), distances=grown.rows_for([s.stop_id for s in subset]))
+            self.assertEqual(len(route), 4)
+            grown.close()
+
+    def test_time_windows_are_met_on_instances_with_a_known_feasible_order(self):
+        start = datetime(2026, 1, 5, 8, 0)
+        self.assertEqual(slot_window("2026-01-05 09:30"), (datetime(2026, 1, 5, 9, 30), datetime(2026, 1, 5, 10, 0)))
+        for count, vehicle in ((30, Vehicle("truck", 10_000, 3.15, 101.65)), (60, Vehicle("truck", 10_000))):
+            stops = random_stops(count, seed=count)
+            # Drive the stops in a random order at 25 km/h and give each the slot it is reached in.
+            known = random.Random(1).sample(stops, count)
+            minutes, prev = 0.0, vehicle.depot_stop() if vehicle.has_depot else None
+            for stop in known:
+                if prev is not None:
+                    minutes += haversine_km(prev.latitude, prev.longitude, stop.latitude, stop.longitude) * 60 / 25
+                stop.window_start, stop.window_end = slot_window((start + timedelta(minutes=30 * math.floor(minutes / 30))).strftime("%Y-%m-%d %H:%M"))
+                minutes += 5
+                prev = stop
+
+            timed = compute_time_window_path(stops, vehicle, start, speed_kmh=25, service_minutes=5)
+            self.assertTrue(timed.feasible)
+            self.assertEqual(sorted(s.stop_id for s in timed.route), sorted(s.stop_id for s in stops))
+            self.assertAlmostEqual(timed.distance_km, route_length_km(timed.route, vehicle))
+            self.assertLessEqual(timed.distance_km, route_length_km(known, vehicle))
+            last = start
+            for visit in timed.stops:
+                self.assertGreaterEqual(visit.arrival, last)
+                self.assertGreaterEqual(visit.service_start, max(visit.arrival, visit.stop.window_start))
+                self.assertLessEqual(visit.service_start, visit.stop.window_end)
+                self.assertEqual(visit.departure - visit.service_start, timedelta(minutes=5))
+                last = visit.departure
+
+        # Far more stops than the windows allow: the search still stops within its budget.
+        stops = random_stops(400, seed=5)
+        for k, stop in enumerate(stops):
+            stop.window_start, stop.window_end = slot_window((start + timedelta(minutes=30 * (k % 4))).strftime("%Y-%m-%d %H:%M"))
+        started = time.perf_counter()
+        timed = compute_time_window_path(stops, Vehicle("truck", 10_000), start, budget_s=0.5)
+        self.assertLess(time.perf_counter() - started, 2.0)
+        self.assertFalse(timed.feasible)
+        self.assertEqual(len(timed.stops), 400)
+
+    def test_anytime_solver_streams_improvements_and_honours_budget_and_cancel(self):
+        stops = random_stops(150)
+        vehicle = Vehicle("truck", 400, 3.15, 101.65)
+        seen = []
+        started = time.perf_counter()
+        route = solve_anytime(stops, vehicle, 0.5, on_improve=lambda r, km, elapsed: seen.append(km))
+        self.assertLess(time.perf_counter() - started, 2.0)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertAlmostEqual(route_length_km(route, vehicle), seen[-1])
+        self.assertLessEqual(seen[-1], route_length_km(compute_optimal_path(stops, vehicle), vehicle) + 1e-9)
+
+        solver = AnytimeSolver(stops, vehicle, budget_s=60)
+        events = []
+        deadline = time.monotonic() + 30
+        while not events and time.monotonic() < deadline:
+            events = solver.poll()
+            time.sleep(0.02)
+        self.assertEqual(events[0][0], "improved")
+        solver.cancel()
+        best = solver.result(timeout=30)
+        self.assertTrue(solver.finished)
+        self.assertEqual(sorted(s.stop_id for s in best if s.stop_id != DEPOT_ID), sorted(s.stop_id for s in stops))
+
+
+if __name__ == "__main__":
+    unittest.main()
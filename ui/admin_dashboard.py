@@ -1,6 +1,6 @@
 from tkinter import ttk, messagebox
 
-from ui.common_widgets import handle_action, guarded_button_call
+from ui.common_widgets import TreeBinding, handle_action, guarded_button_call
 
 
 class AdminDashboard(ttk.Frame):
@@ -32,6 +32,7 @@ class AdminDashboard(ttk.Frame):
         self.zone_tree.heading("id", text="Zone ID")
         self.zone_tree.heading("name", text="Zone Name")
         self.zone_tree.pack(fill="both", expand=True)
+        self.zone_rows = TreeBinding(self.zone_tree, lambda z: z["zone_id"], lambda z: (z["zone_id"], z["zone_name"]))
 
         f = ttk.Frame(tab)
         f.pack(fill="x", pady=5)
@@ -51,6 +52,7 @@ class AdminDashboard(ttk.Frame):
         for c, t in [("id", "User ID"), ("name", "Name"), ("role", "Role"), ("zone", "Zone"), ("points", "Points")]:
             self.user_tree.heading(c, text=t)
         self.user_tree.pack(fill="both", expand=True)
+        self.user_rows = TreeBinding(self.user_tree, lambda u: u["user_id"], lambda u: (u["user_id"], u["name"], u["role"], u["zone_name"], u["total_points"]))
 
         f = ttk.Frame(tab)
         f.pack(fill="x", pady=6)
@@ -108,17 +110,10 @@ class AdminDashboard(ttk.Frame):
         self.zone_map = {f"{z['zone_id']} - {z['zone_name']}": z["zone_id"] for z in zones}
         self.u_zone["values"] = [""] + list(self.zone_map.keys())
 
-        for i in self.zone_tree.get_children():
-            self.zone_tree.delete(i)
-        for z in zones:
-            self.zone_tree.insert("", "end", values=(z["zone_id"], z["zone_name"]))
+        self.zone_rows.update(zones)
 
     def refresh_users(self):
-        for i in self.user_tree.get_children():
-            self.user_tree.delete(i)
-        rows = self.app.admin_service.list_users()
-        for u in rows:
-            self.user_tree.insert("", "end", values=(u["user_id"], u["name"], u["role"], u["zone_name"], u["total_points"]))
+        self.user_rows.update(self.app.admin_service.list_users())
 
     def add_zone(self):
         zid = handle_action(self, lambda: self.app.admin_service.add_zone(self.user, self.zone_name_entry.get()))
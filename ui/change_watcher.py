@@ -0,0 +1,49 @@
+"""Cheap detection of commits made by other connections, for auto-refreshing dashboards."""
+from __future__ import annotations
+
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeWatcher:
+    """Polls ``PRAGMA data_version`` every ``interval_ms`` and reports which tables others changed.
+
+    ``data_version`` only moves when another connection (another terminal, the outbox dispatcher)
+    commits, so an idle poll reads no tables. When it moves, the per-table versions that writers
+    bump in ``change_log`` say which tables changed and ``on_change(tables)`` runs on the Tk
+    thread. Writes through this connection do not start a check; their callers refresh directly.
+    """
+
+    def __init__(self, widget, db, on_change, interval_ms: int = 300):
+        self.widget = widget
+        self.db = db
+        self.on_change = on_change
+        self.interval_ms = interval_ms
+        self.data_version = db.data_version()
+        self.versions = db.change_versions()
+        self.widget.after(self.interval_ms, self._tick)
+
+    def check(self) -> set[str]:
+        """Tables changed since the last check, or an empty set when nothing was committed elsewhere."""
+        data_version = self.db.data_version()
+        if data_version == self.data_version:
+            return set()
+        self.data_version = data_version
+        versions = self.db.change_versions()
+        changed = {table for table, version in versions.items() if self.versions.get(table) != version}
+        self.versions = versions
+        return changed
+
+    def _tick(self):
+        if not self.widget.winfo_exists():
+            return
+        try:
+            changed = self.check()
+            if changed:
+                logger.debug("Tables changed elsewhere: %s", ", ".join(sorted(changed)))
+                self.on_change(changed)
+        except sqlite3.Error:
+            logger.exception("Change detection failed")
+        self.widget.after(self.interval_ms, self._tick)
@@ -1,6 +1,6 @@
 from tkinter import ttk, messagebox
 
-from ui.common_widgets import handle_action, guarded_button_call
+from ui.common_widgets import TreeBinding, handle_action, guarded_button_call
 
 
 class CollectorDashboard(ttk.Frame):
@@ -19,6 +19,7 @@ class CollectorDashboard(ttk.Frame):
         for c, t in [("id", "Pickup ID"), ("resident", "Resident"), ("dt", "Requested"), ("status", "Status")]:
             self.tree.heading(c, text=t)
         self.tree.pack(fill="both", expand=True, pady=8)
+        self.task_rows = TreeBinding(self.tree, lambda r: r["pickup_id"], lambda r: (r["pickup_id"], r["resident_name"], r["requested_datetime"], r["status"]))
 
         frm = ttk.Frame(self)
         frm.pack(fill="x")
@@ -43,12 +44,8 @@ class CollectorDashboard(ttk.Frame):
         self.refresh()
 
     def refresh(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
         rows = handle_action(self, lambda: self.app.pickup_service.get_collector_requests(self.user))
-        if rows:
-            for r in rows:
-                self.tree.insert("", "end", values=(r["pickup_id"], r["resident_name"], r["requested_datetime"], r["status"]))
+        self.task_rows.update(rows or [])
 
     def update_status(self):
         sel = self.tree.selection()
@@ -1,6 +1,9 @@
 """Common UI helpers."""
 import tkinter as tk
+from collections import OrderedDict
+from dataclasses import dataclass
 from tkinter import messagebox, ttk
+from typing import Callable
 
 from utils.errors import AppError
 
@@ -46,3 +49,219 @@ def guarded_button_call(btn: tk.Widget, callback):
             btn.config(state="normal")
 
     return _run
+
+
+class TreeBinding:
+    """Keeps a Treeview in step with a keyed result set, touching only the rows that changed.
+
+    ``key(row)`` gives each row's primary key, used as its item id; ``values(row)`` and the optional
+    ``tags(row)`` give what the item shows. :meth:`update` deletes vanished rows, inserts new ones at
+    their position and reconfigures changed ones, so selection, focus and scroll position survive a
+    refresh. Existing items are only moved when their relative order changed.
+    """
+
+    def __init__(self, tree: ttk.Treeview, key, values, tags=None):
+        self.tree = tree
+        self.key = key
+        self.values = values
+        self.tags = tags
+        self.rows: dict[str, tuple] = {}
+
+    def update(self, rows) -> tuple[int, int, int]:
+        """Apply ``rows`` (in display order); returns ``(inserted, updated, deleted)`` counts."""
+        new, order = {}, []
+        for row in rows:
+            iid = str(self.key(row))
+            new[iid] = (tuple(self.values(row)), tuple(self.tags(row)) if self.tags else ())
+            order.append(iid)
+        gone = [iid for iid in self.rows if iid not in new]
+        if gone:
+            self.tree.delete(*gone)
+        kept = [iid for iid in self.tree.get_children() if iid in new]
+        if kept != [iid for iid in order if iid in self.rows]:
+            for pos, iid in enumerate(iid for iid in order if iid in self.rows):
+                self.tree.move(iid, "", pos)
+        inserted = updated = 0
+        for pos, iid in enumerate(order):
+            values, tags = new[iid]
+            old = self.rows.get(iid)
+            if old is None:
+                self.tree.insert("", pos, iid=iid, values=values, tags=tags)
+                inserted += 1
+            elif old != (values, tags):
+                self.tree.item(iid, values=values, tags=tags)
+                updated += 1
+        self.rows = new
+        return inserted, updated, len(gone)
+
+
+@dataclass
+class RowSource:
+    """Paged access to a result set: ``count(db)`` and ``page(db, offset, limit, sort, descending, after)``.
+
+    ``page`` does the sorting in its query, so a :class:`VirtualTreeview` never holds the whole set.
+    ``after`` is the last row of the preceding page when that page is cached (else ``None``); the
+    query can seek past it instead of skipping ``offset`` rows. Both run on a worker connection.
+    """
+
+    count: Callable[..., int]
+    page: Callable[..., list]
+
+
+class PagedRows:
+    """The page cache behind :class:`VirtualTreeview`: which rows to show, fetch and evict.
+
+    The window is ``visible`` rows from ``top``. Pages of ``page_size`` rows covering it, plus
+    ``buffer_pages`` on each side, are fetched by :meth:`loader`; the least recently shown pages
+    beyond that are evicted. Nothing here touches Tk or the database directly.
+    """
+
+    def __init__(self, source: RowSource, page_size: int = 100, buffer_pages: int = 1, sort: str = "", descending: bool = False):
+        self.source = source
+        self.page_size = page_size
+        self.buffer_pages = buffer_pages
+        self.sort, self.descending = sort, descending
+        self.pages: OrderedDict[int, list] = OrderedDict()
+        self.total = 0
+        self.top = 0
+        self.stale = True
+
+    def invalidate(self):
+        """Drop every page; the next :meth:`loader` re-counts the rows."""
+        self.pages.clear()
+        self.stale = True
+
+    def _window(self, visible: int, total: int) -> tuple[int, int, int, int]:
+        """``(top, end, first page, last page)`` of the window, clamped to ``total`` rows."""
+        top = max(0, min(self.top, total - visible))
+        end = min(total, top + visible)
+        return top, end, top // self.page_size, max(top, end - 1) // self.page_size
+
+    def _wanted(self, visible: int, total: int) -> range:
+        _top, _end, first, last = self._window(visible, total)
+        last_page = max(0, total - 1) // self.page_size
+        return range(max(0, first - self.buffer_pages), min(last_page, last + self.buffer_pages) + 1)
+
+    def rows(self, visible: int) -> list | None:
+        """Rows of the window, or ``None`` while one of its pages is not loaded yet."""
+        if self.stale:
+            return None
+        self.top, end, first, last = self._window(visible, self.total)
+        if any(index not in self.pages for index in range(first, last + 1)):
+            return None
+        rows = []
+        for index in range(first, last + 1):
+            self.pages.move_to_end(index)
+            rows.extend(self.pages[index])
+        start = self.top - first * self.page_size
+        return rows[start : start + end - self.top]
+
+    def loader(self, visible: int):
+        """A ``load(db)`` fetching what the window needs, or ``None`` when all of it is cached."""
+        if not self.stale and all(index in self.pages for index in self._wanted(visible, self.total)):
+            return None
+        source, size, sort, descending = self.source, self.page_size, self.sort, self.descending
+        count = self.stale
+        total = self.total
+        cached = set(self.pages)
+        before = {index + 1: page[-1] for index, page in self.pages.items() if len(page) == size}
+        wanted = self._wanted
+
+        def load(db):
+            known = source.count(db) if count else total
+            pages = {}
+            for index in wanted(visible, known):
+                if index in cached:
+                    continue
+                prev = pages.get(index - 1)
+                after = prev[-1] if prev and len(prev) == size else before.get(index)
+                pages[index] = source.page(db, index * size, size, sort, descending, after)
+            return (known if count else None), pages
+
+        return load
+
+    def merge(self, result, visible: int):
+        """Store a :meth:`loader` result, evicting the least recently shown pages over the limit."""
+        total, pages = result
+        if total is not None:
+            self.total, self.stale = total, False
+        self.pages.update(pages)
+        # Wanted pages become the most recent, so eviction (the limit covers them all) keeps them.
+        for index in self._wanted(visible, self.total):
+            if index in self.pages:
+                self.pages.move_to_end(index)
+        while len(self.pages) > 2 * self.buffer_pages + 2 + visible // self.page_size:
+            self.pages.popitem(last=False)
+
+
+class VirtualTreeview(ttk.Frame):
+    """A Treeview that only holds the visible rows of a possibly huge :class:`RowSource`.
+
+    The tree shows ``height`` items; the scrollbar and mouse wheel move a window over the full
+    result set. Pages are loaded on ``channel`` of ``tasks`` (a :class:`ui.task_runner.TaskRunner`),
+    so counting and paging never run on the Tk thread; the tree keeps its rows until the new ones
+    arrive. Clicking a heading re-sorts through the source's query. The inner widget is ``tree``,
+    for selection and item lookups.
+    """
+
+    def __init__(self, master, columns, source: RowSource, key, values, tasks, channel: str, height: int = 12, page_size: int = 100, buffer_pages: int = 1, sort: str = "", descending: bool = False, headings=None):
+        super().__init__(master)
+        self.tasks = tasks
+        self.channel = channel
+        self.paged = PagedRows(source, page_size, buffer_pages, sort or columns[0], descending)
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=height)
+        for column in columns:
+            self.tree.heading(column, text=(headings or {}).get(column, column), command=lambda c=column: self.sort_by(c))
+        self.scroll = ttk.Scrollbar(self, orient="vertical", command=self._on_scroll)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scroll.grid(row=0, column=1, sticky="ns")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.rows = TreeBinding(self.tree, key, values)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self._on_wheel)
+
+    @property
+    def visible(self) -> int:
+        return int(self.tree.cget("height"))
+
+    def refresh(self):
+        """Re-count and re-fetch, keeping the scroll position where possible."""
+        self.paged.invalidate()
+        self._render()
+
+    def sort_by(self, column: str):
+        paged = self.paged
+        paged.descending = not paged.descending if column == paged.sort else False
+        paged.sort = column
+        paged.top = 0
+        self.refresh()
+
+    def scroll_to(self, top: int):
+        self.paged.top = top
+        self._render()
+
+    def _render(self):
+        rows = self.paged.rows(self.visible)
+        if rows is not None:
+            self.rows.update(rows)
+            total, top = self.paged.total, self.paged.top
+            self.scroll.set(top / total, (top + len(rows)) / total) if total else self.scroll.set(0, 1)
+        load = self.paged.loader(self.visible)
+        if load is not None:
+            self.tasks.load(self.channel, load, self._loaded)
+
+    def _loaded(self, result):
+        self.paged.merge(result, self.visible)
+        self._render()
+
+    def _on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.paged.total))
+        else:
+            self.scroll_to(self.paged.top + int(amount) * (self.visible if unit == "pages" else 1))
+
+    def _on_wheel(self, event):
+        step = -3 if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0 else 3
+        self.scroll_to(self.paged.top + step)
+        return "break"
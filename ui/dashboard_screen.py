@@ -1,11 +1,22 @@
+import math
+import queue
+import threading
+import time
 import tkinter as tk
 from datetime import date, datetime, timedelta
 from tkinter import filedialog, messagebox, simpledialog, ttk
 
+from services.report_service import generate_monthly_reports
+from services.route_service import AnytimeSolver, RouteStop, Vehicle, slot_window
 from services.validation_service import validate_pickup_datetime, validate_password, validate_user_id
 from ui.base_screen import BaseScreen
+from ui.change_watcher import ChangeWatcher
+from ui.common_widgets import RowSource, TreeBinding, VirtualTreeview
+from ui.task_runner import TaskRunner
 
 CATEGORIES = ["Plastic", "Paper", "Glass", "Metal", "E-Waste", "Organic", "Other"]
+ROUTE_BUDGET_S = 10
+ADMIN_OVERVIEW_TABLES = ("users", "zone", "pickup_request", "recycling_log", "notification", "notification_outbox")
 
 
 class DashboardScreen(BaseScreen):
@@ -15,6 +26,8 @@ class DashboardScreen(BaseScreen):
         self.user = self.app.db.get_user(user_id)
         self.recycle_image = ""
         self.evidence_image = ""
+        self.tasks = TaskRunner(self, self.app.db.path, on_busy=self._set_loading)
+        self.loading_labels = {}
 
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
@@ -28,21 +41,78 @@ class DashboardScreen(BaseScreen):
 
         self.nb = ttk.Notebook(top)
         self.nb.grid(row=1, column=0, columnspan=2, sticky="nsew", pady=8)
+        self.tabs = {}
         if self.user["role"] == "Resident":
             self._resident_view()
         elif self.user["role"] == "WasteCollector":
             self._collector_view()
         else:
             self._admin_view()
+        self.nb.bind("<<NotebookTabChanged>>", lambda _e: self._show_tab())
+        self._show_tab()
+        self.watcher = ChangeWatcher(self, self.app.db, self._data_changed)
+
+    def _add_tab(self, text: str, build, refresh=None, tables=()):
+        """Add a tab whose widgets are built, and data loaded, when it is first shown.
+
+        ``refresh`` reloads the tab; it runs again on showing the tab only after a change to one of
+        ``tables`` has made the tab stale.
+        """
+        frame = ttk.Frame(self.nb, padding=8)
+        self.nb.add(frame, text=text)
+        self.tabs[str(frame)] = {"frame": frame, "build": build, "refresh": refresh, "tables": set(tables), "built": False, "stale": True}
+        return frame
+
+    def _show_tab(self):
+        tab = self.tabs.get(self.nb.select())
+        if tab is None:
+            return
+        if not tab["built"]:
+            tab["build"](tab["frame"])
+            tab["built"] = True
+        if tab["stale"] and tab["refresh"]:
+            tab["stale"] = False
+            tab["refresh"]()
+
+    def _data_changed(self, tables: set[str]):
+        """Mark tabs showing ``tables`` stale; the visible one reloads now, the others when next shown."""
+        for tab in self.tabs.values():
+            if tab["tables"] & tables:
+                tab["stale"] = True
+        if self.user["role"] == "Resident" and "notification" in tables:
+            self._refresh_badge()
+        self._show_tab()
+
+    def refresh_ui(self):
+        super().refresh_ui()
+        if self.user["role"] == "Resident":
+            # Notifications are rendered in the current language.
+            self._data_changed({"notification"})
+
+    def destroy(self):
+        self.tasks.close()
+        super().destroy()
+
+    def _add_loading_indicator(self, tab, channel: str):
+        self.loading_labels.setdefault(channel, []).append(ttk.Label(tab, text="Loading..."))
+
+    def _set_loading(self, channel: str, busy: bool):
+        for label in self.loading_labels.get(channel, []):
+            if busy:
+                label.place(relx=1.0, y=0, anchor="ne")
+            else:
+                label.place_forget()
+
+    def _load_failed(self, exc):
+        messagebox.showerror("Error", f"Could not load data: {exc}")
 
     def _resident_view(self):
-        tab1 = ttk.Frame(self.nb, padding=8)
-        tab2 = ttk.Frame(self.nb, padding=8)
-        tab3 = ttk.Frame(self.nb, padding=8)
-        self.nb.add(tab1, text="Create Pickup Request")
-        self.nb.add(tab2, text="My Pickups")
-        self.nb.add(tab3, text="Stats & Notifications")
+        self._add_tab("Create Pickup Request", self._build_pickup_form)
+        self._add_tab("My Pickups", self._build_pickup_list, lambda: self.pickup_list.refresh(), ("pickup_request",))
+        self.notes_tab = self._add_tab("Stats & Notifications", self._build_notes, self._refresh_notes, ("pickup_request", "recycling_log", "notification"))
+        self._refresh_badge()
 
+    def _build_pickup_form(self, tab1):
         ttk.Label(tab1, text="Pickup Date").grid(row=0, column=0, sticky="w")
         self.date_entry = ttk.Entry(tab1, width=12)
         self.date_entry.insert(0, date.today().isoformat())
@@ -63,19 +133,42 @@ class DashboardScreen(BaseScreen):
         ttk.Button(tab1, text="Upload Image (optional)", command=self._pick_recycle_image).grid(row=4, column=0, sticky="w", pady=8)
         ttk.Button(tab1, text="Submit Pickup + Recycling", command=self._submit_pickup).grid(row=5, column=0, sticky="w")
 
-        self.pickup_tree = ttk.Treeview(tab2, columns=("id", "zone", "dt", "status", "updated", "points"), show="headings", height=12)
-        for c in ("id", "zone", "dt", "status", "updated", "points"):
-            self.pickup_tree.heading(c, text=c.upper())
-        self.pickup_tree.pack(fill="both", expand=True)
-        ttk.Button(tab2, text="Cancel Selected", command=self._cancel_pickup).pack(anchor="w", pady=6)
+    def _build_pickup_list(self, tab2):
+        self._add_loading_indicator(tab2, "pickups")
+        columns = ("id", "zone", "dt", "status", "eta", "updated", "points")
+        user_id = self.user_id
+        self.pickup_list = VirtualTreeview(
+            tab2,
+            columns,
+            RowSource(lambda db: db.count_resident_pickups(user_id), lambda db, *page: db.list_resident_pickups_page(user_id, *page)),
+            lambda r: r["pickup_id"],
+            lambda r: (r["pickup_id"], r["zone"], r["requested_datetime"], r["current_status"], r["eta"] or "", r["last_update"], r["points_awarded"]),
+            self.tasks,
+            "pickups",
+            sort="dt",
+            descending=True,
+            headings={c: c.upper() for c in columns},
+        )
+        self.pickup_list.pack(fill="both", expand=True)
+        self.pickup_tree = self.pickup_list.tree
+        btns = ttk.Frame(tab2)
+        btns.pack(fill="x", pady=6)
+        ttk.Button(btns, text="Cancel Selected", command=self._cancel_pickup).pack(side="left")
+        ttk.Button(btns, text="Reschedule Selected", command=self._reschedule_pickup).pack(side="left", padx=6)
 
+    def _build_notes(self, tab3):
+        self._add_loading_indicator(tab3, "notes")
         self.stats_lbl = ttk.Label(tab3, text="")
         self.stats_lbl.pack(anchor="w")
         self.note_tree = ttk.Treeview(tab3, columns=("title", "message", "time"), show="headings", height=8)
         for c in ("title", "message", "time"):
             self.note_tree.heading(c, text=c.title())
+        self.note_tree.tag_configure("unread", font=("Segoe UI", 9, "bold"))
         self.note_tree.pack(fill="both", expand=True)
-        self._refresh_resident()
+        self.note_rows = TreeBinding(
+            self.note_tree, lambda n: n["notification_id"], lambda n: (n["title"], n["message"], n["created_at"]), lambda n: () if n["read_at"] else ("unread",)
+        )
+        ttk.Button(tab3, text=self.app.translate("mark_read"), command=self._mark_all_read).pack(anchor="w", pady=6)
 
     def _pick_recycle_image(self):
         self.recycle_image = filedialog.askopenfilename(title="Select image")
@@ -86,23 +179,38 @@ class DashboardScreen(BaseScreen):
             weight = float(self.weight_entry.get())
             if not (0 < weight <= 200):
                 raise ValueError("Weight must be more than 0 and no more than 200kg.")
-            self.app.db.create_pickup_with_recycling(self.user_id, dt, self.cat_combo.get(), weight, self.recycle_image)
+            self.tasks.mutate("notes", self.app.db.create_pickup_with_recycling, self.user_id, dt, self.cat_combo.get(), weight, self.recycle_image)
             messagebox.showinfo("Success", "Pickup request submitted")
-            self._refresh_resident()
+            self._data_changed({"pickup_request", "notification"})
         except Exception as exc:
             messagebox.showerror("Validation", str(exc))
 
-    def _refresh_resident(self):
-        for i in self.pickup_tree.get_children():
-            self.pickup_tree.delete(i)
-        for row in self.app.db.list_resident_pickups(self.user_id):
-            self.pickup_tree.insert("", "end", values=(row["pickup_id"], row["zone"], row["requested_datetime"], row["current_status"], row["last_update"], row["points_awarded"]))
-        stats = self.app.db.get_resident_stats(self.user_id)
+    def _refresh_notes(self):
+        user_id, language = self.user_id, self.app.language
+        self.tasks.load(
+            "notes",
+            lambda db: (db.get_resident_stats(user_id), db.get_notifications(user_id, language=language)),
+            self._show_notes,
+            self._load_failed,
+        )
+
+    def _show_notes(self, result):
+        stats, notes = result
         self.stats_lbl.config(text=f"Total: {stats['total']} | Completed: {stats['completed']} | Cancelled: {stats['cancelled']} | Failed: {stats['failed']} | Completed Weight: {stats['weight']}kg | Rate: {stats['rate']:.2%}")
-        for i in self.note_tree.get_children():
-            self.note_tree.delete(i)
-        for n in self.app.db.get_notifications(self.user_id):
-            self.note_tree.insert("", "end", values=(n["title"], n["message"], n["created_at"]))
+        self.note_rows.update(notes)
+
+    def _refresh_badge(self):
+        # A single-row read of the trigger-maintained counter, so the badge stays current on any tab.
+        user_id = self.user_id
+        self.tasks.load("badge", lambda db: db.unread_count(user_id), self._show_badge, self._load_failed)
+
+    def _show_badge(self, unread: int):
+        badge = f" ({unread} {self.app.translate('unread')})" if unread else ""
+        self.nb.tab(self.notes_tab, text=f"Stats & Notifications{badge}")
+
+    def _mark_all_read(self):
+        self.tasks.mutate("notes", self.app.db.mark_all_read, self.user_id)
+        self._data_changed({"notification"})
 
     def _cancel_pickup(self):
         sel = self.pickup_tree.selection()
@@ -113,23 +221,53 @@ class DashboardScreen(BaseScreen):
         if not reason or len(reason.strip()) < 5:
             messagebox.showerror("Error", "Cancellation reason too short.")
             return
-        self.app.db.cancel_resident_pickup(self.user_id, pid, reason)
-        self._refresh_resident()
+        self.tasks.mutate("notes", self.app.db.cancel_resident_pickup, self.user_id, pid, reason)
+        self._data_changed({"pickup_request", "notification"})
+
+    def _reschedule_pickup(self):
+        sel = self.pickup_tree.selection()
+        if not sel:
+            return
+        pid = int(self.pickup_tree.item(sel[0], "values")[0])
+        day = simpledialog.askstring("Reschedule", "New pickup date (YYYY-MM-DD):")
+        slot = day and simpledialog.askstring("Reschedule", "New pickup time (HH:MM, on the hour or half hour):")
+        if not slot:
+            return
+        try:
+            dt = validate_pickup_datetime(day.strip(), slot.strip()).strftime("%Y-%m-%d %H:%M")
+            self.tasks.mutate("notes", self.app.db.reschedule_pickup, self.user_id, pid, dt)
+            self._data_changed({"pickup_request"})
+        except Exception as exc:
+            messagebox.showerror("Reschedule", str(exc))
 
     def _collector_view(self):
-        tab = ttk.Frame(self.nb, padding=8)
-        self.nb.add(tab, text="Assigned Pickup Requests")
+        self._add_tab("Assigned Pickup Requests", self._build_collector, self._refresh_collector, ("pickup_request",))
+
+    def _build_collector(self, tab):
+        self._add_loading_indicator(tab, "collector")
         self.ctree = ttk.Treeview(tab, columns=("id", "resident", "zone", "dt", "status"), show="headings", height=12)
         for c in ("id", "resident", "zone", "dt", "status"):
             self.ctree.heading(c, text=c.title())
         self.ctree.pack(fill="both", expand=True)
+        self.task_rows = TreeBinding(
+            self.ctree, lambda r: r["pickup_id"], lambda r: (r["pickup_id"], r["resident_id"], r["zone"], r["requested_datetime"], r["current_status"])
+        )
 
         btns = ttk.Frame(tab)
         btns.pack(fill="x", pady=6)
         for col, status in enumerate(["ACCEPTED", "IN_PROGRESS", "COMPLETED", "FAILED", "CANCELLED"]):
             ttk.Button(btns, text=status, command=lambda s=status: self._collector_update(s)).grid(row=0, column=col, padx=3)
         ttk.Button(btns, text="Evidence Image", command=self._pick_evidence).grid(row=0, column=5, padx=4)
-        self._refresh_collector()
+        self.route_btn = ttk.Button(btns, text="Plan Route", command=self._collector_plan_route)
+        self.route_btn.grid(row=0, column=6, padx=4)
+        ttk.Button(btns, text="Nearest Next", command=self._collector_select_nearest).grid(row=0, column=7, padx=4)
+        self.route_progress = ttk.Progressbar(tab, maximum=ROUTE_BUDGET_S)
+        self.route_progress.pack(fill="x")
+        self.route_status = ttk.Label(tab, text="")
+        self.route_status.pack(anchor="w")
+        self.route_solver = None
+        self.route_order = {}
+        self.collector_rows = []
 
     def _pick_evidence(self):
         self.evidence_image = filedialog.askopenfilename(title="Evidence image")
@@ -143,32 +281,121 @@ class DashboardScreen(BaseScreen):
         if status in ("FAILED", "CANCELLED", "COMPLETED"):
             comment = simpledialog.askstring("Comment", "Enter comment/reason:") or ""
         try:
-            self.app.db.collector_update_pickup(self.user_id, pid, status, comment, self.evidence_image)
-            self._refresh_collector()
+            self.tasks.mutate("collector", self.app.db.collector_update_pickup, self.user_id, pid, status, comment, self.evidence_image)
+            self._data_changed({"pickup_request"})
         except Exception as exc:
             messagebox.showerror("Error", str(exc))
 
+    def _collector_select_nearest(self):
+        sel = self.ctree.selection()
+        if not sel:
+            return
+        index = self.app.pickup_index
+        here = index.location(int(sel[0]))
+        if here is None:
+            self.route_status.config(text="The selected pickup has no location.")
+            return
+        found = index.nearest_among(*here, {int(iid) for iid in self.task_rows.rows} - {int(sel[0])})
+        if found is None:
+            self.route_status.config(text="No other located pickup is assigned to you.")
+            return
+        distance_km, pickup_id = found
+        self.ctree.selection_set(str(pickup_id))
+        self.ctree.see(str(pickup_id))
+        self.route_status.config(text=f"Nearest next: pickup {pickup_id}, {distance_km:.2f} km away")
+
     def _refresh_collector(self):
-        for i in self.ctree.get_children():
-            self.ctree.delete(i)
-        for row in self.app.db.list_collector_tasks(self.user_id):
-            self.ctree.insert("", "end", values=(row["pickup_id"], row["resident_id"], row["zone"], row["requested_datetime"], row["current_status"]))
+        user_id = self.user_id
+        self.tasks.load("collector", lambda db: db.list_collector_tasks(user_id), self._show_collector, self._load_failed)
+
+    def _show_collector(self, rows):
+        # Refreshes keep the planned route's order; stops it has not seen yet go last, by time.
+        self.collector_rows = rows
+        order = self.route_order
+        if order:
+            rows = sorted(rows, key=lambda r: order.get(str(r["pickup_id"]), len(order)))
+        self.task_rows.update(rows)
+
+    def _collector_plan_route(self):
+        if self.route_solver is not None:
+            self.route_solver.cancel()
+            return
+        rows = self.app.db.list_route_stops(self.user["zone_id"], self.user_id)
+        if len(rows) < 2:
+            self.route_status.config(text="Need at least two located pickups to plan a route.")
+            return
+        stops = [RouteStop(str(r["pickup_id"]), r["latitude"], r["longitude"], r["weight_kg"], *slot_window(r["requested_datetime"])) for r in rows]
+        self.route_solver = AnytimeSolver(stops, Vehicle(self.user_id, math.inf), ROUTE_BUDGET_S)
+        self.route_started = time.monotonic()
+        self.route_btn.config(text="Stop Planning")
+        self.route_status.config(text="Planning...")
+        self.after(100, self._poll_route)
+
+    def _poll_route(self):
+        solver = self.route_solver
+        if not self.winfo_exists():
+            solver.cancel()
+            return
+        for kind, route, distance_km, extra in solver.poll():
+            if kind == "error":
+                self.route_status.config(text=f"Route planning failed: {extra}")
+                continue
+            self.route_order = {stop.stop_id: pos for pos, stop in enumerate(route)}
+            self._show_collector(self.collector_rows)
+            if kind == "improved":
+                self.route_status.config(text=f"Best so far: {distance_km:.2f} km")
+            else:
+                self.app.eta.set_route(self.user_id, route)
+                # Later creates and cancellations splice into this order instead of re-planning.
+                self.app.route_repair.plan_zone(self.user["zone_id"], solver.vehicle, self._route_repaired, self.user_id, route)
+                self.route_status.config(text=f"Route planned: {distance_km:.2f} km, resident ETAs updated")
+        self.route_progress.config(value=min(time.monotonic() - self.route_started, ROUTE_BUDGET_S))
+        if solver.finished:
+            self.route_solver = None
+            self.route_progress.config(value=0)
+            self.route_btn.config(text="Plan Route")
+            return
+        self.after(100, self._poll_route)
 
-    def _admin_view(self):
-        t1 = ttk.Frame(self.nb, padding=8)
-        t2 = ttk.Frame(self.nb, padding=8)
-        t3 = ttk.Frame(self.nb, padding=8)
-        self.nb.add(t1, text="Overview")
-        self.nb.add(t2, text="Users & Zones")
-        self.nb.add(t3, text="Notifications")
+    def _route_repaired(self, route):
+        if not self.winfo_exists():
+            self.app.route_repair.drop(self.user["zone_id"], self.user_id)
+            return
+        added = any(stop.stop_id not in self.route_order for stop in route)
+        self.route_order = {stop.stop_id: pos for pos, stop in enumerate(route)}
+        self._show_collector(self.collector_rows)
+        if added:
+            # EtaService re-times removals itself; a new stop needs the whole order.
+            self.app.eta.set_route(self.user_id, route)
 
+    def _admin_view(self):
+        self.zone_map = {}
+        self._add_tab("Overview", self._build_overview, self._refresh_overview, ADMIN_OVERVIEW_TABLES)
+        self._add_tab("Users & Zones", self._build_users, self._refresh_users, ("users", "zone"))
+        self._add_tab("Notifications", self._build_send_note, self._refresh_zone_choices, ("zone",))
+        self._add_tab("Reports", self._build_reports)
+
+    def _build_overview(self, t1):
+        self._add_loading_indicator(t1, "overview")
         self.overview = ttk.Label(t1, text="")
         self.overview.pack(anchor="w")
-
-        self.user_tree = ttk.Treeview(t2, columns=("id", "name", "role", "zone", "active", "points"), show="headings", height=9)
-        for c in ("id", "name", "role", "zone", "active", "points"):
-            self.user_tree.heading(c, text=c)
-        self.user_tree.pack(fill="both", expand=True)
+        self.forecast_lbl = ttk.Label(t1, text="")
+        self.forecast_lbl.pack(anchor="w", pady=(6, 0))
+
+    def _build_users(self, t2):
+        self._add_loading_indicator(t2, "users")
+        self.user_list = VirtualTreeview(
+            t2,
+            ("id", "name", "role", "zone", "active", "points"),
+            RowSource(lambda db: db.count_users(), lambda db, *page: db.list_users_page(*page)),
+            lambda u: u["user_login_id"],
+            lambda u: (u["user_login_id"], u["name"], u["role"], u["zone_name"], u["is_active"], u["total_points"]),
+            self.tasks,
+            "users",
+            height=9,
+        )
+        self.user_list.pack(fill="both", expand=True)
+        self.user_tree = self.user_list.tree
 
         form = ttk.Frame(t2)
         form.pack(fill="x", pady=6)
@@ -183,6 +410,7 @@ class DashboardScreen(BaseScreen):
         ttk.Button(form, text="Create", command=self._admin_create_user).grid(row=1, column=5, padx=3)
         ttk.Button(form, text="Update", command=self._admin_update_user).grid(row=1, column=6, padx=3)
         ttk.Button(form, text="Deactivate", command=self._admin_deactivate).grid(row=1, column=7, padx=3)
+        ttk.Button(form, text="Absent/Present", command=self._admin_toggle_available).grid(row=1, column=8, padx=3)
 
         zf = ttk.Frame(t2)
         zf.pack(fill="x", pady=6)
@@ -195,6 +423,7 @@ class DashboardScreen(BaseScreen):
         ttk.Button(zf, text="Add Zone", command=self._admin_add_zone).grid(row=1, column=2, padx=3)
         ttk.Button(zf, text="Rename/Set Active", command=self._admin_update_zone).grid(row=1, column=3, padx=3)
 
+    def _build_send_note(self, t3):
         ttk.Label(t3, text="Target User ID").grid(row=0, column=0, sticky="w")
         ttk.Label(t3, text="OR Target Zone").grid(row=0, column=1, sticky="w")
         ttk.Label(t3, text="Title").grid(row=0, column=2, sticky="w")
@@ -204,32 +433,74 @@ class DashboardScreen(BaseScreen):
         self.n_title = ttk.Entry(t3, width=20)
         self.n_msg = ttk.Entry(t3, width=30)
         self.n_user.grid(row=1, column=0); self.n_zone.grid(row=1, column=1); self.n_title.grid(row=1, column=2); self.n_msg.grid(row=1, column=3)
-        ttk.Button(t3, text="Send", command=self._admin_send_note).grid(row=1, column=4)
-        self._refresh_admin()
-
-    def _refresh_admin(self):
-        ov = self.app.db.get_admin_overview()
-        self.overview.config(text=f"Users: {ov['users']} | Pickups: {ov['pickups']} | Recycling Logs: {ov['recycling_logs']} | Notifications: {ov['notifications']}")
-        zones = self.app.db.list_zones()
+        self.n_send = ttk.Button(t3, text="Send", command=self._admin_send_note)
+        self.n_send.grid(row=1, column=4)
+        ttk.Label(t3, text="AND Target Role").grid(row=2, column=1, sticky="w", pady=(6, 0))
+        self.n_role = ttk.Combobox(t3, values=["", "Resident", "WasteCollector", "MunicipalAdmin"], width=14, state="readonly")
+        self.n_role.grid(row=3, column=1)
+        self.n_progress = ttk.Progressbar(t3, length=320, mode="determinate")
+        self.n_progress.grid(row=4, column=0, columnspan=4, sticky="w", pady=8)
+        self.n_status = ttk.Label(t3, text="")
+        self.n_status.grid(row=5, column=0, columnspan=4, sticky="w")
+
+    def _build_reports(self, t4):
+        ttk.Label(t4, text="Month (YYYY-MM)").grid(row=0, column=0, sticky="w")
+        self.r_month = ttk.Entry(t4, width=10)
+        self.r_month.insert(0, date.today().strftime("%Y-%m"))
+        self.r_month.grid(row=1, column=0, sticky="w")
+        self.r_btn = ttk.Button(t4, text="Generate Zone Reports", command=self._admin_generate_reports)
+        self.r_btn.grid(row=1, column=1, padx=6)
+        self.r_progress = ttk.Progressbar(t4, length=320, mode="determinate")
+        self.r_progress.grid(row=2, column=0, columnspan=2, sticky="w", pady=8)
+        self.r_status = ttk.Label(t4, text="")
+        self.r_status.grid(row=3, column=0, columnspan=2, sticky="w")
+
+    def _refresh_overview(self):
+        forecaster, tomorrow = self.app.forecaster, date.today() + timedelta(days=1)
+
+        def load(db):
+            # Completions through this app sync as they happen; this folds in those made on other
+            # terminals, in memory only, and the app's next sync persists them.
+            forecaster.fold(forecaster.pending(db))
+            return db.get_admin_overview(), db.list_zones(), tomorrow, forecaster.expected_totals(tomorrow)
+
+        self.tasks.load("overview", load, self._show_overview, self._load_failed)
+
+    def _show_overview(self, result):
+        ov, zones, tomorrow, expected = result
+        self.overview.config(text=f"Users: {ov['users']} | Pickups: {ov['pickups']} | Recycling Logs: {ov['recycling_logs']} | Notifications: {ov['notifications']} | Email outbox: {ov['outbox']['PENDING']} pending, {ov['outbox']['SENT']} sent, {ov['outbox']['FAILED']} failed")
+        self.forecast_lbl.config(
+            text=f"Expected {tomorrow:%a %d %b}: "
+            + " | ".join(f"{z['name']}: {expected.get(z['zone_id'], (0, 0))[0]:.1f} pickups / {expected.get(z['zone_id'], (0, 0))[1]:.1f}kg" for z in zones)
+        )
+
+    def _refresh_users(self):
+        # Pages of the user list are fetched on the worker as the list scrolls.
+        self.user_list.refresh()
+        self._refresh_zone_choices()
+
+    def _refresh_zone_choices(self):
+        self.tasks.load("zones", lambda db: db.list_zones(), self._set_zone_choices, self._load_failed)
+
+    def _set_zone_choices(self, zones):
         self.zone_map = {f"{z['zone_id']}:{z['name']}": z['zone_id'] for z in zones}
-        self.u_zone["values"] = [""] + list(self.zone_map.keys())
-        self.n_zone["values"] = [""] + list(self.zone_map.keys())
-        for i in self.user_tree.get_children():
-            self.user_tree.delete(i)
-        for u in self.app.db.list_users():
-            self.user_tree.insert("", "end", values=(u["user_login_id"], u["name"], u["role"], u["zone_name"], u["is_active"], u["total_points"]))
+        choices = [""] + list(self.zone_map.keys())
+        # Only the zone pickers of tabs that have been built exist yet.
+        for name in ("u_zone", "n_zone"):
+            if hasattr(self, name):
+                getattr(self, name)["values"] = choices
 
     def _admin_create_user(self):
         validate_user_id(self.u_login.get())
         validate_password(self.u_pwd.get(), self.u_login.get())
         zid = self.zone_map.get(self.u_zone.get())
-        self.app.db.add_user(self.u_login.get(), self.u_name.get(), self.u_pwd.get(), self.u_role.get(), zid)
-        self._refresh_admin()
+        self.tasks.mutate("overview", self.app.db.add_user, self.u_login.get(), self.u_name.get(), self.u_pwd.get(), self.u_role.get(), zid)
+        self._data_changed({"users"})
 
     def _admin_update_user(self):
         zid = self.zone_map.get(self.u_zone.get())
-        self.app.db.update_user(self.u_login.get(), self.u_name.get(), self.u_role.get(), zid, self.u_pwd.get())
-        self._refresh_admin()
+        self.tasks.mutate("overview", self.app.db.update_user, self.u_login.get(), self.u_name.get(), self.u_role.get(), zid, self.u_pwd.get())
+        self._data_changed({"users"})
 
     def _admin_deactivate(self):
         sel = self.user_tree.selection()
@@ -237,21 +508,98 @@ class DashboardScreen(BaseScreen):
             return
         uid = self.user_tree.item(sel[0], "values")[0]
         u = self.app.db.get_user(uid)
-        self.app.db.update_user(uid, u["name"], u["role"], u["zone_id"], "", 0)
-        self._refresh_admin()
+        self.tasks.mutate("overview", self.app.db.update_user, uid, u["name"], u["role"], u["zone_id"], "", 0)
+        self._data_changed({"users"})
+
+    def _admin_toggle_available(self):
+        sel = self.user_tree.selection()
+        if not sel:
+            return
+        u = self.app.db.get_user(self.user_tree.item(sel[0], "values")[0])
+        if u["role"] != "WasteCollector":
+            messagebox.showerror("Error", "Select a waste collector.")
+            return
+        self.tasks.mutate("overview", self.app.db.set_collector_available, u["user_login_id"], not u["available"])
+        messagebox.showinfo("Collector", f"{u['user_login_id']} marked {'absent' if u['available'] else 'present'}; open pickups rebalanced.")
+        self._data_changed({"users", "pickup_request"})
 
     def _admin_add_zone(self):
-        self.app.db.create_zone(self.z_name.get())
-        self._refresh_admin()
+        self.tasks.mutate("overview", self.app.db.create_zone, self.z_name.get())
+        self._data_changed({"zone"})
 
     def _admin_update_zone(self):
-        self.app.db.update_zone(int(self.z_id.get()), self.z_name.get(), 1)
-        self._refresh_admin()
+        self.tasks.mutate("overview", self.app.db.update_zone, int(self.z_id.get()), self.z_name.get(), 1)
+        self._data_changed({"zone"})
+
+    def _admin_generate_reports(self):
+        month = self.r_month.get().strip()
+        events = queue.Queue()
+
+        def _run():
+            try:
+                result = generate_monthly_reports(self.app.db.path, month, progress=lambda done, total: events.put(("progress", done, total)))
+                events.put(("done", result))
+            except Exception as exc:
+                events.put(("error", exc))
+
+        self.r_btn.config(state="disabled")
+        self.r_status.config(text="Generating...")
+        threading.Thread(target=_run, daemon=True).start()
+        self.after(100, self._poll_reports, events, month)
+
+    def _poll_reports(self, events, month):
+        if not self.winfo_exists():
+            return
+        while True:
+            try:
+                event = events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "progress":
+                _kind, done, total = event
+                self.r_progress.config(maximum=max(total, 1), value=done)
+                self.r_status.config(text=f"{done}/{total} zones")
+                continue
+            self.r_btn.config(state="normal")
+            if event[0] == "error":
+                messagebox.showerror("Reports", str(event[1]))
+            else:
+                result = event[1]
+                self.r_status.config(text=f"reports/{month}: {len(result['generated'])} generated, {len(result['skipped'])} already done, {len(result['failed'])} failed")
+            return
+        self.after(100, self._poll_reports, events, month)
 
     def _admin_send_note(self):
         if self.n_user.get():
-            self.app.db.conn.execute("INSERT INTO notification(user_id,type,title,message) VALUES(?,?,?,?)", (self.n_user.get(), "SYSTEM", self.n_title.get(), self.n_msg.get()))
-            self.app.db.conn.commit()
-        elif self.n_zone.get():
-            self.app.db.send_notification_by_zone(self.zone_map[self.n_zone.get()], self.n_title.get(), self.n_msg.get())
-        self._refresh_admin()
+            self.tasks.mutate("overview", self.app.db.add_notification, self.n_user.get(), "SYSTEM", self.n_title.get(), self.n_msg.get())
+            self._data_changed({"notification"})
+            return
+        zone_id = self.zone_map.get(self.n_zone.get())
+        role = self.n_role.get() or None
+        if zone_id is None and role is None and not messagebox.askyesno("Broadcast", "Send to all active users?"):
+            return
+        # One short transaction per chunk, driven from the event loop so the UI stays live between chunks.
+        chunks = self.app.db.iter_broadcast(self.n_title.get(), self.n_msg.get(), zone_id=zone_id, role=role)
+        self.n_send.config(state="disabled")
+        self.n_progress.config(value=0)
+        self.n_status.config(text="Sending...")
+        self.after(1, self._broadcast_step, chunks)
+
+    def _broadcast_step(self, chunks):
+        if not self.winfo_exists():
+            chunks.close()
+            return
+        try:
+            sent, total = next(chunks)
+        except StopIteration:
+            self.n_send.config(state="normal")
+            self.n_status.config(text=f"Sent to {int(self.n_progress['value'])} users")
+            self._data_changed({"notification"})
+            return
+        except Exception as exc:
+            self.n_send.config(state="normal")
+            messagebox.showerror("Broadcast", str(exc))
+            return
+        self.n_progress.config(maximum=max(total, 1), value=sent)
+        self.n_status.config(text=f"{sent}/{total} users")
+        self.after(1, self._broadcast_step, chunks)
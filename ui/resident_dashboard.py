@@ -1,7 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
-from ui.common_widgets import handle_action, guarded_button_call
+from ui.common_widgets import TreeBinding, handle_action, guarded_button_call
 
 
 class ResidentDashboard(ttk.Frame):
@@ -52,6 +52,7 @@ class ResidentDashboard(ttk.Frame):
         for c, t in [("id", "Pickup ID"), ("dt", "Requested Datetime"), ("status", "Status")]:
             self.pickup_tree.heading(c, text=t)
         self.pickup_tree.pack(fill="both", expand=True, pady=8)
+        self.pickup_rows = TreeBinding(self.pickup_tree, lambda r: r["pickup_id"], lambda r: (r["pickup_id"], r["requested_datetime"], r["status"]))
 
         hist_btn = ttk.Button(tab, text="View Status History", command=self.show_pickup_history)
         hist_btn.pack(anchor="w")
@@ -80,6 +81,7 @@ class ResidentDashboard(ttk.Frame):
         for c, t in [("id", "Log ID"), ("cat", "Category"), ("wt", "Weight"), ("at", "Logged At")]:
             self.recycling_tree.heading(c, text=t)
         self.recycling_tree.pack(fill="both", expand=True, pady=8)
+        self.recycling_rows = TreeBinding(self.recycling_tree, lambda r: r["log_id"], lambda r: (r["log_id"], r["category"], r["weight_kg"], r["logged_at"]))
 
     def _build_notifications_tab(self, nb):
         tab = ttk.Frame(nb, padding=8)
@@ -89,6 +91,7 @@ class ResidentDashboard(ttk.Frame):
         for c, t in [("id", "ID"), ("title", "Title"), ("created", "Created"), ("read", "Read At")]:
             self.note_tree.heading(c, text=t)
         self.note_tree.pack(fill="both", expand=True)
+        self.note_rows = TreeBinding(self.note_tree, lambda r: r["notification_id"], lambda r: (r["notification_id"], r["title"], r["created_at"], r["read_at"] or "UNREAD"))
 
         ttk.Button(tab, text="Mark Selected Read", command=self.mark_read).pack(anchor="w", pady=5)
 
@@ -99,28 +102,16 @@ class ResidentDashboard(ttk.Frame):
         self.refresh_notifications()
 
     def refresh_pickups(self):
-        for i in self.pickup_tree.get_children():
-            self.pickup_tree.delete(i)
         rows = handle_action(self, lambda: self.app.pickup_service.get_resident_requests(self.user))
-        if rows:
-            for r in rows:
-                self.pickup_tree.insert("", "end", values=(r["pickup_id"], r["requested_datetime"], r["status"]))
+        self.pickup_rows.update(rows or [])
 
     def refresh_recycling(self):
-        for i in self.recycling_tree.get_children():
-            self.recycling_tree.delete(i)
         rows = handle_action(self, lambda: self.app.recycling_service.get_history(self.user))
-        if rows:
-            for r in rows:
-                self.recycling_tree.insert("", "end", values=(r["log_id"], r["category"], r["weight_kg"], r["logged_at"]))
+        self.recycling_rows.update(rows or [])
 
     def refresh_notifications(self):
-        for i in self.note_tree.get_children():
-            self.note_tree.delete(i)
         rows = handle_action(self, lambda: self.app.notification_service.list_my_notifications(self.user))
-        if rows:
-            for r in rows:
-                self.note_tree.insert("", "end", values=(r["notification_id"], r["title"], r["created_at"], r["read_at"] or "UNREAD"))
+        self.note_rows.update(rows or [])
 
     def create_pickup(self):
         result = handle_action(self, lambda: self.app.pickup_service.create_pickup_request(self.user, self.pickup_dt.get()))
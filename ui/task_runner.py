@@ -0,0 +1,106 @@
+"""Runs dashboard data loads off the Tk thread and hands the results back through ``after()`` polling."""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+
+from database.sqlite_service import SQLiteService
+
+logger = logging.getLogger(__name__)
+
+
+class TaskRunner:
+    """One worker thread, with its own read-only :class:`SQLiteService`, runs ``load(db)`` calls in order.
+
+    Results come back through a queue that ``widget.after`` polls while work is outstanding, so
+    ``on_done``/``on_error`` and ``on_busy(channel, busy)`` always run on the Tk thread. Loads are
+    grouped by ``channel`` (typically one per tab): a newer :meth:`load` or a :meth:`mutate` on the
+    channel makes earlier loads stale, and their results are dropped. Mutations run immediately on
+    the Tk thread through the app's writable connection, in call order, so any load submitted after
+    one sees its write.
+    """
+
+    def __init__(self, widget, db_path: str, poll_ms: int = 50, on_busy=None):
+        self.widget = widget
+        self.db_path = db_path
+        self.poll_ms = poll_ms
+        self.on_busy = on_busy
+        self.generations: dict[str, int] = {}
+        self.pending: dict[str, int] = {}
+        self._callbacks: dict[tuple[str, int], tuple] = {}
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._polling = False
+        self._thread = threading.Thread(target=self._work, name="ui-task-runner", daemon=True)
+        self._thread.start()
+
+    def _work(self):
+        db = None
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    return
+                channel, generation, load = job
+                if generation != self.generations.get(channel):
+                    self._results.put((channel, generation, False, None))
+                    continue
+                try:
+                    db = db or SQLiteService(self.db_path, read_only=True)
+                    self._results.put((channel, generation, True, load(db)))
+                except Exception as exc:
+                    self._results.put((channel, generation, False, exc))
+        finally:
+            if db is not None:
+                db.close()
+
+    def load(self, channel: str, load, on_done, on_error=None) -> int:
+        """Queue ``load(db)``; ``on_done(result)`` runs later on the Tk thread unless superseded."""
+        generation = self.generations.get(channel, 0) + 1
+        self.generations[channel] = generation
+        self._callbacks[(channel, generation)] = (on_done, on_error)
+        self.pending[channel] = self.pending.get(channel, 0) + 1
+        if self.pending[channel] == 1 and self.on_busy:
+            self.on_busy(channel, True)
+        self._jobs.put((channel, generation, load))
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._poll)
+        return generation
+
+    def mutate(self, channels, action, *args, **kwargs):
+        """Run a write now and invalidate loads already in flight for ``channels``."""
+        for channel in [channels] if isinstance(channels, str) else channels:
+            self.generations[channel] = self.generations.get(channel, 0) + 1
+        return action(*args, **kwargs)
+
+    def _poll(self):
+        if not self.widget.winfo_exists():
+            self._polling = False
+            return
+        while True:
+            try:
+                channel, generation, ok, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            on_done, on_error = self._callbacks.pop((channel, generation), (None, None))
+            self.pending[channel] -= 1
+            if self.pending[channel] == 0 and self.on_busy:
+                self.on_busy(channel, False)
+            if generation != self.generations.get(channel):
+                logger.debug("Dropped stale %s result (generation %s)", channel, generation)
+                continue
+            if ok:
+                on_done(value)
+            elif on_error:
+                on_error(value)
+            else:
+                logger.error("Background %s load failed", channel, exc_info=value)
+        if any(self.pending.values()):
+            self.widget.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def close(self):
+        self._jobs.put(None)